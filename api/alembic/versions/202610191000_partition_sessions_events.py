@@ -0,0 +1,186 @@
+"""monthly range partitions for study_sessions and activity_events
+
+Revision ID: 202610191000
+Revises: 202509201600
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '202610191000'
+down_revision = '202509201600'
+branch_labels = None
+depends_on = None
+
+
+# Months created ahead of "now" at migration time (db/partitions.py keeps it rolling)
+MONTHS_AHEAD = 3
+
+ENSURE_PARTITION_FN = """
+CREATE OR REPLACE FUNCTION fuurin_ensure_month_partition(parent text, col text, month_start date)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    m date := date_trunc('month', month_start)::date;
+    lo timestamptz := m::timestamp AT TIME ZONE 'UTC';
+    hi timestamptz := (m + interval '1 month')::timestamp AT TIME ZONE 'UTC';
+    part text := format('%s_p%s', parent, to_char(m, 'YYYYMM'));
+    dflt text := parent || '_default';
+    has_rows boolean := false;
+BEGIN
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    -- Serialize concurrent callers (several workers at boot)
+    PERFORM pg_advisory_xact_lock(hashtext('fuurin_partitions:' || parent));
+    IF to_regclass(part) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    IF to_regclass(dflt) IS NOT NULL THEN
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I WHERE %I >= $1 AND %I < $2)', dflt, col, col)
+            INTO has_rows USING lo, hi;
+    END IF;
+    IF has_rows THEN
+        -- Rows for this month landed in the default partition: move them out,
+        -- otherwise attaching the new range would fail validation.
+        EXECUTE format('CREATE TABLE %I (LIKE %I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', part, parent);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %I WHERE %I >= $1 AND %I < $2 RETURNING *) INSERT INTO %I SELECT * FROM moved',
+            dflt, col, col, part
+        ) USING lo, hi;
+        EXECUTE format('ALTER TABLE %I ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)', parent, part, lo, hi);
+    ELSE
+        EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)', part, parent, lo, hi);
+    END IF;
+END $$;
+"""
+
+ENSURE_PARTITIONS_FN = """
+CREATE OR REPLACE FUNCTION fuurin_ensure_month_partitions(parent text, col text, from_month date, months_ahead int)
+RETURNS void LANGUAGE plpgsql AS $$
+DECLARE
+    m date := date_trunc('month', from_month)::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => months_ahead))::date;
+BEGIN
+    WHILE m <= last_month LOOP
+        PERFORM fuurin_ensure_month_partition(parent, col, m);
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END $$;
+"""
+
+
+def _fk(table: str, column: str, target: str) -> sa.ForeignKey:
+    # Explicit names: the default ones are still taken by the table being replaced
+    return sa.ForeignKey(target, name=f'{table}_{column}_fkey')
+
+
+def _study_sessions_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=False), _fk('study_sessions', 'user_id', 'users.id'), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('ended_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('duration_sec', sa.Integer(), nullable=False),
+        sa.Column('modality', sa.String(), nullable=False),
+        sa.Column('work_id', postgresql.UUID(as_uuid=False), _fk('study_sessions', 'work_id', 'works.id')),
+        sa.Column('work_segment_id', postgresql.UUID(as_uuid=False), _fk('study_sessions', 'work_segment_id', 'work_segments.id')),
+        sa.Column('words_reviewed', sa.Integer()),
+        sa.Column('words_learned', sa.Integer()),
+        sa.Column('notes', sa.Text()),
+    ]
+
+
+def _activity_events_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', postgresql.UUID(as_uuid=False), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=False), _fk('activity_events', 'user_id', 'users.id'), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('ref_kind', sa.String()),
+        sa.Column('ref_id', postgresql.UUID(as_uuid=False)),
+        sa.Column('summary', sa.Text()),
+        sa.Column('metadata', sa.JSON()),
+        sa.Column('visibility', sa.String(), nullable=False),
+    ]
+
+
+# table -> (partition column, column factory, indexes)
+TABLES = {
+    'study_sessions': (
+        'started_at',
+        _study_sessions_columns,
+        {'ix_study_sessions_user_started': ['user_id', 'started_at']},
+    ),
+    'activity_events': (
+        'occurred_at',
+        _activity_events_columns,
+        {
+            'ix_activity_user_occurred': ['user_id', 'occurred_at'],
+            'ix_activity_type_occurred': ['type', 'occurred_at'],
+        },
+    ),
+}
+
+
+def _swap_out(table: str, indexes: dict[str, list[str]]) -> str:
+    """Rename the current table and its index-backed names out of the way."""
+    old = f'{table}_unpartitioned'
+    op.execute(f'ALTER TABLE {table} RENAME TO {old}')
+    op.execute(f'ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey')
+    for name in indexes:
+        op.execute(f'ALTER INDEX {name} RENAME TO {name}_unpartitioned')
+    return old
+
+
+def _copy(src: str, dst: str, columns: list[sa.Column]) -> None:
+    names = ', '.join(c.name for c in columns)
+    op.execute(f'INSERT INTO {dst} ({names}) SELECT {names} FROM {src}')
+
+
+def upgrade() -> None:
+    op.execute(ENSURE_PARTITION_FN)
+    op.execute(ENSURE_PARTITIONS_FN)
+
+    for table, (col, columns, indexes) in TABLES.items():
+        old = _swap_out(table, indexes)
+        cols = columns()
+        # The partition key must be part of the primary key
+        op.create_table(
+            table,
+            *cols,
+            sa.PrimaryKeyConstraint('id', col, name=f'{table}_pkey'),
+            postgresql_partition_by=f'RANGE ({col})',
+        )
+        op.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+        op.execute(
+            f"SELECT fuurin_ensure_month_partitions('{table}', '{col}', "
+            f"(coalesce((SELECT min({col}) FROM {old}), now()) AT TIME ZONE 'UTC')::date, {MONTHS_AHEAD})"
+        )
+        _copy(old, table, cols)
+        op.drop_table(old)
+        for name, index_cols in indexes.items():
+            op.create_index(name, table, index_cols)
+
+
+def downgrade() -> None:
+    for table, (col, columns, indexes) in TABLES.items():
+        partitioned = f'{table}_partitioned'
+        op.execute(f'ALTER TABLE {table} RENAME TO {partitioned}')
+        for name in indexes:
+            op.drop_index(name, table_name=partitioned)
+        op.execute(f'ALTER TABLE {partitioned} RENAME CONSTRAINT {table}_pkey TO {partitioned}_pkey')
+        cols = columns()
+        op.create_table(table, *cols, sa.PrimaryKeyConstraint('id', name=f'{table}_pkey'))
+        _copy(partitioned, table, cols)
+        # Dropping the parent drops every partition (default included)
+        op.drop_table(partitioned)
+        for name, index_cols in indexes.items():
+            op.create_index(name, table, index_cols)
+
+    op.execute('DROP FUNCTION IF EXISTS fuurin_ensure_month_partitions(text, text, date, int)')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_ensure_month_partition(text, text, date)')
@@ -0,0 +1,71 @@
+"""study_sessions.local_day: user's local study day computed at write time
+
+Revision ID: 202610191100
+Revises: 202610191000
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '202610191100'
+down_revision = '202610191000'
+branch_labels = None
+depends_on = None
+
+
+LOCAL_DAY_FN = """
+CREATE OR REPLACE FUNCTION fuurin_local_day(ts timestamptz, tz text)
+RETURNS date LANGUAGE plpgsql STABLE AS $$
+BEGIN
+    RETURN (ts AT TIME ZONE coalesce(nullif(tz, ''), 'UTC'))::date;
+EXCEPTION WHEN invalid_parameter_value THEN
+    -- Unknown zone name in users.timezone: bucket in UTC (core/localtime.py does the same)
+    RETURN (ts AT TIME ZONE 'UTC')::date;
+END $$;
+"""
+
+TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION fuurin_study_sessions_local_day()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' AND NEW.local_day IS NOT NULL THEN
+        RETURN NEW;  -- computed by the writer
+    END IF;
+    NEW.local_day := fuurin_local_day(
+        NEW.started_at,
+        (SELECT timezone FROM users WHERE id = NEW.user_id)
+    );
+    RETURN NEW;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    op.execute(LOCAL_DAY_FN)
+    op.execute(TRIGGER_FN)
+
+    op.add_column('study_sessions', sa.Column('local_day', sa.Date()))
+    op.execute(
+        "UPDATE study_sessions s SET local_day = fuurin_local_day(s.started_at, u.timezone) "
+        "FROM users u WHERE u.id = s.user_id"
+    )
+    op.alter_column('study_sessions', 'local_day', nullable=False)
+
+    op.execute(
+        "CREATE TRIGGER trg_study_sessions_local_day "
+        "BEFORE INSERT OR UPDATE OF started_at, user_id ON study_sessions "
+        "FOR EACH ROW EXECUTE FUNCTION fuurin_study_sessions_local_day()"
+    )
+    op.create_index('ix_study_sessions_user_local_day', 'study_sessions', ['user_id', 'local_day'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_study_sessions_user_local_day', table_name='study_sessions')
+    op.execute('DROP TRIGGER IF EXISTS trg_study_sessions_local_day ON study_sessions')
+    op.drop_column('study_sessions', 'local_day')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_study_sessions_local_day()')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_local_day(timestamptz, text)')
@@ -0,0 +1,103 @@
+"""daily and monthly study rollups maintained by trigger
+
+Revision ID: 202610191200
+Revises: 202610191100
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '202610191200'
+down_revision = '202610191100'
+branch_labels = None
+depends_on = None
+
+
+APPLY_FN = """
+CREATE OR REPLACE FUNCTION fuurin_study_rollups_apply(
+    p_user uuid, p_day date, p_modality text, p_seconds bigint, p_words bigint, p_sessions int
+) RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO study_daily_rollups AS r (user_id, day, modality, seconds, words, sessions)
+    VALUES (p_user, p_day, p_modality, p_seconds, p_words, p_sessions)
+    ON CONFLICT (user_id, day, modality) DO UPDATE
+        SET seconds = r.seconds + EXCLUDED.seconds,
+            words = r.words + EXCLUDED.words,
+            sessions = r.sessions + EXCLUDED.sessions;
+
+    INSERT INTO study_monthly_rollups AS r (user_id, month, modality, seconds, words, sessions)
+    VALUES (p_user, date_trunc('month', p_day)::date, p_modality, p_seconds, p_words, p_sessions)
+    ON CONFLICT (user_id, month, modality) DO UPDATE
+        SET seconds = r.seconds + EXCLUDED.seconds,
+            words = r.words + EXCLUDED.words,
+            sessions = r.sessions + EXCLUDED.sessions;
+END $$;
+"""
+
+TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION fuurin_study_sessions_rollups()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fuurin_study_rollups_apply(
+            OLD.user_id, OLD.local_day, OLD.modality,
+            -OLD.duration_sec, -coalesce(OLD.words_learned, 0), -1
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fuurin_study_rollups_apply(
+            NEW.user_id, NEW.local_day, NEW.modality,
+            NEW.duration_sec, coalesce(NEW.words_learned, 0), 1
+        );
+    END IF;
+    RETURN NULL;
+END $$;
+"""
+
+
+def _rollup_columns(bucket: str) -> list[sa.Column]:
+    return [
+        sa.Column('user_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column(bucket, sa.Date(), primary_key=True),
+        sa.Column('modality', sa.String(), primary_key=True),
+        sa.Column('seconds', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('words', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('sessions', sa.Integer(), nullable=False, server_default='0'),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table('study_daily_rollups', *_rollup_columns('day'))
+    op.create_table('study_monthly_rollups', *_rollup_columns('month'))
+
+    op.execute(
+        "INSERT INTO study_daily_rollups (user_id, day, modality, seconds, words, sessions) "
+        "SELECT user_id, local_day, modality, sum(duration_sec), sum(coalesce(words_learned, 0)), count(*) "
+        "FROM study_sessions GROUP BY 1, 2, 3"
+    )
+    op.execute(
+        "INSERT INTO study_monthly_rollups (user_id, month, modality, seconds, words, sessions) "
+        "SELECT user_id, date_trunc('month', day)::date, modality, sum(seconds), sum(words), sum(sessions) "
+        "FROM study_daily_rollups GROUP BY 1, 2, 3"
+    )
+
+    op.execute(APPLY_FN)
+    op.execute(TRIGGER_FN)
+    op.execute(
+        "CREATE TRIGGER trg_study_sessions_rollups "
+        "AFTER INSERT OR UPDATE OR DELETE ON study_sessions "
+        "FOR EACH ROW EXECUTE FUNCTION fuurin_study_sessions_rollups()"
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS trg_study_sessions_rollups ON study_sessions')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_study_sessions_rollups()')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_study_rollups_apply(uuid, date, text, bigint, bigint, int)')
+    op.drop_table('study_monthly_rollups')
+    op.drop_table('study_daily_rollups')
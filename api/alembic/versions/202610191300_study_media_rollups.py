@@ -0,0 +1,117 @@
+"""per (user, day, work type) study rollup maintained by trigger
+
+Revision ID: 202610191300
+Revises: 202610191200
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '202610191300'
+down_revision = '202610191200'
+branch_labels = None
+depends_on = None
+
+
+APPLY_FN = """
+CREATE OR REPLACE FUNCTION fuurin_study_media_apply(
+    p_user uuid, p_day date, p_work_type text, p_seconds bigint, p_words bigint, p_sessions int
+) RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    -- Sessions without a work are not media consumption
+    IF p_work_type IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO study_media_rollups AS r (user_id, day, work_type, seconds, words, sessions)
+    VALUES (p_user, p_day, p_work_type, p_seconds, p_words, p_sessions)
+    ON CONFLICT (user_id, day, work_type) DO UPDATE
+        SET seconds = r.seconds + EXCLUDED.seconds,
+            words = r.words + EXCLUDED.words,
+            sessions = r.sessions + EXCLUDED.sessions;
+END $$;
+"""
+
+SESSIONS_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION fuurin_study_sessions_media_rollups()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.work_id IS NOT NULL THEN
+        PERFORM fuurin_study_media_apply(
+            OLD.user_id, OLD.local_day, (SELECT type FROM works WHERE id = OLD.work_id),
+            -OLD.duration_sec, -coalesce(OLD.words_learned, 0), -1
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.work_id IS NOT NULL THEN
+        PERFORM fuurin_study_media_apply(
+            NEW.user_id, NEW.local_day, (SELECT type FROM works WHERE id = NEW.work_id),
+            NEW.duration_sec, coalesce(NEW.words_learned, 0), 1
+        );
+    END IF;
+    RETURN NULL;
+END $$;
+"""
+
+# Re-typing a work moves its sessions' totals to the new bucket (rare, admin-only)
+WORKS_TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION fuurin_works_media_rollups()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN
+        SELECT user_id, local_day, sum(duration_sec) AS seconds,
+               sum(coalesce(words_learned, 0)) AS words, count(*)::int AS sessions
+        FROM study_sessions WHERE work_id = NEW.id GROUP BY 1, 2
+    LOOP
+        PERFORM fuurin_study_media_apply(t.user_id, t.local_day, OLD.type, -t.seconds, -t.words, -t.sessions);
+        PERFORM fuurin_study_media_apply(t.user_id, t.local_day, NEW.type, t.seconds, t.words, t.sessions);
+    END LOOP;
+    RETURN NULL;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        'study_media_rollups',
+        sa.Column('user_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('work_type', sa.String(), primary_key=True),
+        sa.Column('seconds', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('words', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('sessions', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.execute(
+        "INSERT INTO study_media_rollups (user_id, day, work_type, seconds, words, sessions) "
+        "SELECT s.user_id, s.local_day, w.type, sum(s.duration_sec), sum(coalesce(s.words_learned, 0)), count(*) "
+        "FROM study_sessions s JOIN works w ON w.id = s.work_id GROUP BY 1, 2, 3"
+    )
+
+    op.execute(APPLY_FN)
+    op.execute(SESSIONS_TRIGGER_FN)
+    op.execute(WORKS_TRIGGER_FN)
+    op.execute(
+        "CREATE TRIGGER trg_study_sessions_media_rollups "
+        "AFTER INSERT OR UPDATE OR DELETE ON study_sessions "
+        "FOR EACH ROW EXECUTE FUNCTION fuurin_study_sessions_media_rollups()"
+    )
+    op.execute(
+        "CREATE TRIGGER trg_works_media_rollups "
+        "AFTER UPDATE OF type ON works "
+        "FOR EACH ROW WHEN (OLD.type IS DISTINCT FROM NEW.type) "
+        "EXECUTE FUNCTION fuurin_works_media_rollups()"
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS trg_works_media_rollups ON works')
+    op.execute('DROP TRIGGER IF EXISTS trg_study_sessions_media_rollups ON study_sessions')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_works_media_rollups()')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_study_sessions_media_rollups()')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_study_media_apply(uuid, date, text, bigint, bigint, int)')
+    op.drop_table('study_media_rollups')
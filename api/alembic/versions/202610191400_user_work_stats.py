@@ -0,0 +1,124 @@
+"""per (user, work) progress summary and work_id indexes
+
+Revision ID: 202610191400
+Revises: 202610191300
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '202610191400'
+down_revision = '202610191300'
+branch_labels = None
+depends_on = None
+
+
+# Rebuild one summary row from the sessions (served by ix_study_sessions_user_work_started)
+REFRESH_FN = """
+CREATE OR REPLACE FUNCTION fuurin_user_work_stats_refresh(p_user uuid, p_work uuid)
+RETURNS void LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM user_work_stats WHERE user_id = p_user AND work_id = p_work;
+    INSERT INTO user_work_stats (
+        user_id, work_id, seconds, sessions, words, first_at, last_at, last_segment_id, last_segment_index
+    )
+    SELECT p_user, p_work, sum(s.duration_sec), count(*), sum(coalesce(s.words_learned, 0)),
+           min(s.started_at), max(s.started_at),
+           (array_agg(g.id ORDER BY g.index_no DESC) FILTER (WHERE g.id IS NOT NULL))[1],
+           max(g.index_no)
+    FROM study_sessions s
+    LEFT JOIN work_segments g ON g.id = s.work_segment_id
+    WHERE s.user_id = p_user AND s.work_id = p_work
+    HAVING count(*) > 0;
+END $$;
+"""
+
+# Inserts (the hot path) are applied incrementally; updates and deletes
+# rebuild the affected rows since "furthest segment" can't be decremented.
+TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION fuurin_study_sessions_work_stats()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    seg_index int;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.work_id IS NULL THEN
+            RETURN NULL;
+        END IF;
+        SELECT index_no INTO seg_index FROM work_segments WHERE id = NEW.work_segment_id;
+        INSERT INTO user_work_stats AS w (
+            user_id, work_id, seconds, sessions, words, first_at, last_at, last_segment_id, last_segment_index
+        )
+        VALUES (
+            NEW.user_id, NEW.work_id, NEW.duration_sec, 1, coalesce(NEW.words_learned, 0),
+            NEW.started_at, NEW.started_at,
+            CASE WHEN seg_index IS NOT NULL THEN NEW.work_segment_id END, seg_index
+        )
+        ON CONFLICT (user_id, work_id) DO UPDATE SET
+            seconds = w.seconds + EXCLUDED.seconds,
+            sessions = w.sessions + 1,
+            words = w.words + EXCLUDED.words,
+            first_at = least(w.first_at, EXCLUDED.first_at),
+            last_at = greatest(w.last_at, EXCLUDED.last_at),
+            last_segment_id = CASE
+                WHEN EXCLUDED.last_segment_index > coalesce(w.last_segment_index, -1)
+                THEN EXCLUDED.last_segment_id ELSE w.last_segment_id END,
+            last_segment_index = greatest(w.last_segment_index, EXCLUDED.last_segment_index);
+        RETURN NULL;
+    END IF;
+    IF OLD.work_id IS NOT NULL THEN
+        PERFORM fuurin_user_work_stats_refresh(OLD.user_id, OLD.work_id);
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.work_id IS NOT NULL
+            AND (NEW.work_id, NEW.user_id) IS DISTINCT FROM (OLD.work_id, OLD.user_id) THEN
+        PERFORM fuurin_user_work_stats_refresh(NEW.user_id, NEW.work_id);
+    END IF;
+    RETURN NULL;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    op.create_index('ix_study_sessions_user_work_started', 'study_sessions', ['user_id', 'work_id', 'started_at'])
+    op.create_index('ix_reading_speeds_user_work_measured', 'reading_speeds', ['user_id', 'work_id', 'measured_at'])
+
+    op.create_table(
+        'user_work_stats',
+        sa.Column('user_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('work_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('works.id'), primary_key=True),
+        sa.Column('seconds', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('sessions', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('words', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('first_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_segment_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('work_segments.id')),
+        sa.Column('last_segment_index', sa.Integer()),
+    )
+    op.create_index('ix_user_work_stats_user_last', 'user_work_stats', ['user_id', 'last_at'])
+
+    op.execute(REFRESH_FN)
+    op.execute(
+        "SELECT fuurin_user_work_stats_refresh(user_id, work_id) "
+        "FROM (SELECT DISTINCT user_id, work_id FROM study_sessions WHERE work_id IS NOT NULL) t"
+    )
+    op.execute(TRIGGER_FN)
+    op.execute(
+        "CREATE TRIGGER trg_study_sessions_work_stats "
+        "AFTER INSERT OR UPDATE OR DELETE ON study_sessions "
+        "FOR EACH ROW EXECUTE FUNCTION fuurin_study_sessions_work_stats()"
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS trg_study_sessions_work_stats ON study_sessions')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_study_sessions_work_stats()')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_user_work_stats_refresh(uuid, uuid)')
+    op.drop_index('ix_user_work_stats_user_last', table_name='user_work_stats')
+    op.drop_table('user_work_stats')
+    op.drop_index('ix_reading_speeds_user_work_measured', table_name='reading_speeds')
+    op.drop_index('ix_study_sessions_user_work_started', table_name='study_sessions')
@@ -0,0 +1,54 @@
+"""works.search_text with pg_trgm GIN and prefix indexes
+
+Revision ID: 202610191500
+Revises: 202610191400
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '202610191500'
+down_revision = '202610191400'
+branch_labels = None
+depends_on = None
+
+
+KATAKANA = ''.join(chr(c) for c in range(0x30A1, 0x30F7))
+HIRAGANA = ''.join(chr(c - 0x60) for c in range(0x30A1, 0x30F7))
+
+# Same rules as core.kana.normalize: NFKC, lowercase, katakana -> hiragana
+NORM_FN = f"""
+CREATE OR REPLACE FUNCTION fuurin_search_norm(t text)
+RETURNS text LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT translate(lower(normalize(t, NFKC)), '{KATAKANA}', '{HIRAGANA}')
+$$;
+"""
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(NORM_FN)
+    op.add_column(
+        'works',
+        sa.Column(
+            'search_text',
+            sa.Text(),
+            sa.Computed("fuurin_search_norm(title || coalesce(' ' || author, ''))", persisted=True),
+            nullable=False,
+        ),
+    )
+    # Substring / similarity search (queries of 3+ characters)
+    op.execute('CREATE INDEX ix_works_search_trgm ON works USING gin (search_text gin_trgm_ops)')
+    # Prefix search (autocomplete on 1-2 characters, where trigrams can't help)
+    op.execute('CREATE INDEX ix_works_search_prefix ON works (search_text text_pattern_ops)')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_works_search_prefix')
+    op.execute('DROP INDEX IF EXISTS ix_works_search_trgm')
+    op.drop_column('works', 'search_text')
+    op.execute('DROP FUNCTION IF EXISTS fuurin_search_norm(text)')
@@ -0,0 +1,38 @@
+"""client idempotency keys on study_sessions and activity_events
+
+Revision ID: 202610191600
+Revises: 202610191500
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '202610191600'
+down_revision = '202610191500'
+branch_labels = None
+depends_on = None
+
+
+# Unique indexes on a partitioned table must contain the partition key, so the
+# key is unique per (user, client_key, timestamp); a retried item is resent
+# unchanged, timestamp included. Rows without a client_key (NULL) never conflict.
+UNIQUE_INDEXES = {
+    'study_sessions': ('ux_study_sessions_user_client_key', 'started_at'),
+    'activity_events': ('ux_activity_events_user_client_key', 'occurred_at'),
+}
+
+
+def upgrade() -> None:
+    for table, (name, ts_col) in UNIQUE_INDEXES.items():
+        op.add_column(table, sa.Column('client_key', sa.Text(), nullable=True))
+        op.create_index(name, table, ['user_id', 'client_key', ts_col], unique=True)
+
+
+def downgrade() -> None:
+    for table, (name, _) in UNIQUE_INDEXES.items():
+        op.drop_index(name, table_name=table)
+        op.drop_column(table, 'client_key')
@@ -0,0 +1,88 @@
+"""covering (INCLUDE) and partial indexes for the feed and stats reads
+
+Revision ID: 202610191700
+Revises: 202610191600
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '202610191700'
+down_revision = '202610191600'
+branch_labels = None
+depends_on = None
+
+
+# name -> (table, key columns, INCLUDE columns, WHERE, partition index suffix)
+# Each keeps its name; only the payload changes, so the queries and models are unaffected.
+COVERING = {
+    # Activity feed: everything list_activity_events reads from activity_events
+    'ix_activity_user_occurred': (
+        'activity_events', 'user_id, occurred_at', 'id, type, ref_kind, ref_id, summary', None, 'user_occurred_cov',
+    ),
+    # Summary: words total and 7-day time
+    'ix_study_sessions_user_started': (
+        'study_sessions', 'user_id, started_at', 'duration_sec, words_learned', None, 'user_started_cov',
+    ),
+    # /stats/daily, /stats/weekly, streaks (started_at: partition pruning bound)
+    'ix_study_sessions_user_local_day': (
+        'study_sessions', 'user_id, local_day', 'started_at, duration_sec, words_learned', None, 'user_day_cov',
+    ),
+    # Per-work session lists and user_work_stats refreshes; sessions without a work never match
+    'ix_study_sessions_user_work_started': (
+        'study_sessions', 'user_id, work_id, started_at', 'id, ended_at, duration_sec, modality, words_learned',
+        'work_id IS NOT NULL', 'user_work_cov',
+    ),
+}
+
+PREVIOUS = {
+    'ix_activity_user_occurred': ('activity_events', 'user_id, occurred_at', None, None, 'user_occurred'),
+    'ix_study_sessions_user_started': ('study_sessions', 'user_id, started_at', None, None, 'user_started'),
+    'ix_study_sessions_user_local_day': ('study_sessions', 'user_id, local_day', None, None, 'user_day'),
+    'ix_study_sessions_user_work_started': (
+        'study_sessions', 'user_id, work_id, started_at', None, None, 'user_work',
+    ),
+}
+
+
+def _rebuild(name: str, table: str, columns: str, include: str | None, where: str | None, suffix: str) -> None:
+    """Replace index ``name`` on a partitioned table without blocking writes.
+
+    CREATE INDEX CONCURRENTLY can't target a partitioned table: the parent
+    index is created ON ONLY (invalid, empty), each partition's index is
+    built concurrently and attached, which makes the parent valid. The old
+    index is then dropped and the new one takes its name. Partitions created
+    later inherit the definition.
+    """
+    spec = f'({columns})' + (f' INCLUDE ({include})' if include else '') + (f' WHERE {where}' if where else '')
+    tmp = f'{name}_new'
+    bind = op.get_bind()
+    # Leftovers of an interrupted run (an invalid concurrent build can't be reused)
+    op.execute(f'DROP INDEX IF EXISTS {tmp}')
+    op.execute(f'CREATE INDEX {tmp} ON ONLY {table} {spec}')
+    partitions = bind.execute(
+        text('SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = CAST(:t AS regclass) ORDER BY 1'),
+        {'t': table},
+    ).scalars().all()
+    for part in partitions:
+        child = f'{part}_{suffix}_idx'
+        with op.get_context().autocommit_block():
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {child}')
+            op.execute(f'CREATE INDEX CONCURRENTLY {child} ON {part} {spec}')
+        op.execute(f'ALTER INDEX {tmp} ATTACH PARTITION {child}')
+    op.execute(f'DROP INDEX IF EXISTS {name}')
+    op.execute(f'ALTER INDEX {tmp} RENAME TO {name}')
+
+
+def upgrade() -> None:
+    for name, definition in COVERING.items():
+        _rebuild(name, *definition)
+
+
+def downgrade() -> None:
+    for name, definition in PREVIOUS.items():
+        _rebuild(name, *definition)
@@ -0,0 +1,78 @@
+"""vocabulary items, SRS review state and review log
+
+Revision ID: 202610191800
+Revises: 202610191700
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '202610191800'
+down_revision = '202610191700'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'vocab_items',
+        sa.Column('id', postgresql.UUID(as_uuid=False), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('term', sa.Text(), nullable=False),
+        sa.Column('reading', sa.Text(), nullable=False, server_default=''),
+        sa.Column('meaning', sa.Text()),
+        sa.Column('work_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('works.id')),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.text('now()')),
+    )
+    # One card per (user, term, reading): re-adding a word is a no-op
+    op.create_index('ux_vocab_items_user_term', 'vocab_items', ['user_id', 'term', 'reading'], unique=True)
+
+    # Scheduling state, one row per item, kept narrow since it is rewritten on every grade
+    op.create_table(
+        'review_states',
+        sa.Column(
+            'item_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('vocab_items.id', ondelete='CASCADE'),
+            primary_key=True,
+        ),
+        sa.Column('user_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('due_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('interval_days', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('ease', sa.Float(), nullable=False, server_default='2.5'),
+        sa.Column('reps', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('lapses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_reviewed_at', sa.DateTime(timezone=True)),
+    )
+    # Due queue: "next N due cards" is a range scan, index-only for the item ids
+    op.create_index('ix_review_states_user_due', 'review_states', ['user_id', 'due_at', 'item_id'])
+
+    # Append-only history of grades (future FSRS fitting, review stats)
+    op.create_table(
+        'review_logs',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column(
+            'item_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('vocab_items.id', ondelete='CASCADE'),
+            nullable=False,
+        ),
+        sa.Column('reviewed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('grade', sa.SmallInteger(), nullable=False),
+        sa.Column('interval_days', sa.Float(), nullable=False),
+        sa.Column('ease', sa.Float(), nullable=False),
+    )
+    op.create_index('ix_review_logs_user_reviewed', 'review_logs', ['user_id', 'reviewed_at'])
+    op.create_index('ix_review_logs_item', 'review_logs', ['item_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_review_logs_item', table_name='review_logs')
+    op.drop_index('ix_review_logs_user_reviewed', table_name='review_logs')
+    op.drop_table('review_logs')
+    op.drop_index('ix_review_states_user_due', table_name='review_states')
+    op.drop_table('review_states')
+    op.drop_index('ux_vocab_items_user_term', table_name='vocab_items')
+    op.drop_table('vocab_items')
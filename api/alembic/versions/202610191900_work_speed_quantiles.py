@@ -0,0 +1,36 @@
+"""per-work reading speed quantile sketches
+
+Revision ID: 202610191900
+Revises: 202610191800
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '202610191900'
+down_revision = '202610191800'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Refreshed periodically by services/reading_speeds.py: percentile lookups
+    # read one row instead of every reader's measurements
+    op.create_table(
+        'work_speed_quantiles',
+        sa.Column('work_id', postgresql.UUID(as_uuid=False), sa.ForeignKey('works.id'), primary_key=True),
+        sa.Column('readers', sa.Integer(), nullable=False),
+        sa.Column('measurements', sa.Integer(), nullable=False),
+        # chars/min at percentiles 0, 1, ..., 100 of the readers' recent speeds
+        sa.Column('quantiles', postgresql.ARRAY(sa.Float()), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('work_speed_quantiles')
@@ -0,0 +1,139 @@
+"""apply same-row study session updates to user_work_stats as deltas
+
+Revision ID: 202610192000
+Revises: 202610191900
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '202610192000'
+down_revision = '202610191900'
+branch_labels = None
+depends_on = None
+
+
+# Inserts are applied incrementally as before. An update that keeps the row in
+# the same (user, work, segment) at the same started_at (a heartbeat extending
+# duration_sec, words_learned edits) only moves the sums: apply the difference.
+# Other updates and deletes still rebuild the affected rows, since "furthest
+# segment" and first/last can't be decremented.
+TRIGGER_FN = """
+CREATE OR REPLACE FUNCTION fuurin_study_sessions_work_stats()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    seg_index int;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.work_id IS NULL THEN
+            RETURN NULL;
+        END IF;
+        SELECT index_no INTO seg_index FROM work_segments WHERE id = NEW.work_segment_id;
+        INSERT INTO user_work_stats AS w (
+            user_id, work_id, seconds, sessions, words, first_at, last_at, last_segment_id, last_segment_index
+        )
+        VALUES (
+            NEW.user_id, NEW.work_id, NEW.duration_sec, 1, coalesce(NEW.words_learned, 0),
+            NEW.started_at, NEW.started_at,
+            CASE WHEN seg_index IS NOT NULL THEN NEW.work_segment_id END, seg_index
+        )
+        ON CONFLICT (user_id, work_id) DO UPDATE SET
+            seconds = w.seconds + EXCLUDED.seconds,
+            sessions = w.sessions + 1,
+            words = w.words + EXCLUDED.words,
+            first_at = least(w.first_at, EXCLUDED.first_at),
+            last_at = greatest(w.last_at, EXCLUDED.last_at),
+            last_segment_id = CASE
+                WHEN EXCLUDED.last_segment_index > coalesce(w.last_segment_index, -1)
+                THEN EXCLUDED.last_segment_id ELSE w.last_segment_id END,
+            last_segment_index = greatest(w.last_segment_index, EXCLUDED.last_segment_index);
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE'
+            AND (NEW.user_id, NEW.work_id, NEW.work_segment_id, NEW.started_at)
+                IS NOT DISTINCT FROM (OLD.user_id, OLD.work_id, OLD.work_segment_id, OLD.started_at) THEN
+        IF NEW.work_id IS NOT NULL THEN
+            UPDATE user_work_stats SET
+                seconds = seconds + NEW.duration_sec - OLD.duration_sec,
+                words = words + coalesce(NEW.words_learned, 0) - coalesce(OLD.words_learned, 0)
+            WHERE user_id = NEW.user_id AND work_id = NEW.work_id;
+        END IF;
+        RETURN NULL;
+    END IF;
+    IF OLD.work_id IS NOT NULL THEN
+        PERFORM fuurin_user_work_stats_refresh(OLD.user_id, OLD.work_id);
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.work_id IS NOT NULL
+            AND (NEW.work_id, NEW.user_id) IS DISTINCT FROM (OLD.work_id, OLD.user_id) THEN
+        PERFORM fuurin_user_work_stats_refresh(NEW.user_id, NEW.work_id);
+    END IF;
+    RETURN NULL;
+END $$;
+"""
+
+PREVIOUS_FN = """
+CREATE OR REPLACE FUNCTION fuurin_study_sessions_work_stats()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    seg_index int;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.work_id IS NULL THEN
+            RETURN NULL;
+        END IF;
+        SELECT index_no INTO seg_index FROM work_segments WHERE id = NEW.work_segment_id;
+        INSERT INTO user_work_stats AS w (
+            user_id, work_id, seconds, sessions, words, first_at, last_at, last_segment_id, last_segment_index
+        )
+        VALUES (
+            NEW.user_id, NEW.work_id, NEW.duration_sec, 1, coalesce(NEW.words_learned, 0),
+            NEW.started_at, NEW.started_at,
+            CASE WHEN seg_index IS NOT NULL THEN NEW.work_segment_id END, seg_index
+        )
+        ON CONFLICT (user_id, work_id) DO UPDATE SET
+            seconds = w.seconds + EXCLUDED.seconds,
+            sessions = w.sessions + 1,
+            words = w.words + EXCLUDED.words,
+            first_at = least(w.first_at, EXCLUDED.first_at),
+            last_at = greatest(w.last_at, EXCLUDED.last_at),
+            last_segment_id = CASE
+                WHEN EXCLUDED.last_segment_index > coalesce(w.last_segment_index, -1)
+                THEN EXCLUDED.last_segment_id ELSE w.last_segment_id END,
+            last_segment_index = greatest(w.last_segment_index, EXCLUDED.last_segment_index);
+        RETURN NULL;
+    END IF;
+    IF OLD.work_id IS NOT NULL THEN
+        PERFORM fuurin_user_work_stats_refresh(OLD.user_id, OLD.work_id);
+    END IF;
+    IF TG_OP = 'UPDATE' AND NEW.work_id IS NOT NULL
+            AND (NEW.work_id, NEW.user_id) IS DISTINCT FROM (OLD.work_id, OLD.user_id) THEN
+        PERFORM fuurin_user_work_stats_refresh(NEW.user_id, NEW.work_id);
+    END IF;
+    RETURN NULL;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    op.execute(TRIGGER_FN)
+    # Updates touching none of the aggregated columns (ended_at, notes, ...) don't fire at all
+    op.execute('DROP TRIGGER IF EXISTS trg_study_sessions_work_stats ON study_sessions')
+    op.execute(
+        "CREATE TRIGGER trg_study_sessions_work_stats "
+        "AFTER INSERT OR DELETE OR UPDATE OF user_id, work_id, work_segment_id, started_at, "
+        "duration_sec, words_learned ON study_sessions "
+        "FOR EACH ROW EXECUTE FUNCTION fuurin_study_sessions_work_stats()"
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS trg_study_sessions_work_stats ON study_sessions')
+    op.execute(PREVIOUS_FN)
+    op.execute(
+        "CREATE TRIGGER trg_study_sessions_work_stats "
+        "AFTER INSERT OR UPDATE OR DELETE ON study_sessions "
+        "FOR EACH ROW EXECUTE FUNCTION fuurin_study_sessions_work_stats()"
+    )
@@ -0,0 +1,65 @@
+"""drop the unbounded summary column from ix_activity_user_occurred's INCLUDE
+
+Revision ID: 202610192100
+Revises: 202610192000
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision = '202610192100'
+down_revision = '202610192000'
+branch_labels = None
+depends_on = None
+
+
+# summary is free text of any length: as an INCLUDE column, a long one makes
+# the index tuple exceed the btree limit (~2.7 kB) and the INSERT fails. The
+# feed keeps its range scan and fetches summary from the heap (one page of rows).
+FEED = (
+    'activity_events', 'user_id, occurred_at', 'id, type, ref_kind, ref_id', None, 'user_occurred_feed',
+)
+PREVIOUS = (
+    'activity_events', 'user_id, occurred_at', 'id, type, ref_kind, ref_id, summary', None, 'user_occurred_cov',
+)
+
+
+def _rebuild(name: str, table: str, columns: str, include: str | None, where: str | None, suffix: str) -> None:
+    """Replace index ``name`` on a partitioned table without blocking writes.
+
+    CREATE INDEX CONCURRENTLY can't target a partitioned table: the parent
+    index is created ON ONLY (invalid, empty), each partition's index is
+    built concurrently and attached, which makes the parent valid. The old
+    index is then dropped and the new one takes its name. Partitions created
+    later inherit the definition.
+    """
+    spec = f'({columns})' + (f' INCLUDE ({include})' if include else '') + (f' WHERE {where}' if where else '')
+    tmp = f'{name}_new'
+    bind = op.get_bind()
+    # Leftovers of an interrupted run (an invalid concurrent build can't be reused)
+    op.execute(f'DROP INDEX IF EXISTS {tmp}')
+    op.execute(f'CREATE INDEX {tmp} ON ONLY {table} {spec}')
+    partitions = bind.execute(
+        text('SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = CAST(:t AS regclass) ORDER BY 1'),
+        {'t': table},
+    ).scalars().all()
+    for part in partitions:
+        child = f'{part}_{suffix}_idx'
+        with op.get_context().autocommit_block():
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {child}')
+            op.execute(f'CREATE INDEX CONCURRENTLY {child} ON {part} {spec}')
+        op.execute(f'ALTER INDEX {tmp} ATTACH PARTITION {child}')
+    op.execute(f'DROP INDEX IF EXISTS {name}')
+    op.execute(f'ALTER INDEX {tmp} RENAME TO {name}')
+
+
+def upgrade() -> None:
+    _rebuild('ix_activity_user_occurred', *FEED)
+
+
+def downgrade() -> None:
+    _rebuild('ix_activity_user_occurred', *PREVIOUS)
@@ -0,0 +1,41 @@
+"""cover the due-queue columns in ix_review_states_user_due
+
+Revision ID: 202610192200
+Revises: 202610192100
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '202610192200'
+down_revision = '202610192100'
+branch_labels = None
+depends_on = None
+
+
+# due_cards reads interval_days and reps besides the key: with them in INCLUDE
+# the review_states side of the due queue is an index-only scan. due_at is
+# indexed, so grade updates were never HOT; the wider tuples cost only size.
+COVERING = '(user_id, due_at, item_id) INCLUDE (interval_days, reps)'
+PREVIOUS = '(user_id, due_at, item_id)'
+
+
+def _rebuild(spec: str) -> None:
+    """Replace ix_review_states_user_due without blocking grades (build concurrently, swap names)."""
+    with op.get_context().autocommit_block():
+        # Leftovers of an interrupted run (an invalid concurrent build can't be reused)
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_review_states_user_due_new')
+        op.execute(f'CREATE INDEX CONCURRENTLY ix_review_states_user_due_new ON review_states {spec}')
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_review_states_user_due')
+    op.execute('ALTER INDEX ix_review_states_user_due_new RENAME TO ix_review_states_user_due')
+
+
+def upgrade() -> None:
+    _rebuild(COVERING)
+
+
+def downgrade() -> None:
+    _rebuild(PREVIOUS)
@@ -0,0 +1,32 @@
+"""last run time of the reading speed sketch refresh
+
+Revision ID: 202610192300
+Revises: 202610192200
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '202610192300'
+down_revision = '202610192200'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One row: when the sketches were last rebuilt. max(refreshed_at) can't
+    # tell, since a run that leaves no sketch (few readers) writes no row there
+    op.create_table(
+        'work_speed_quantiles_meta',
+        sa.Column('id', sa.SmallInteger(), primary_key=True, server_default='1'),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.CheckConstraint('id = 1', name='ck_work_speed_quantiles_meta_one_row'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('work_speed_quantiles_meta')
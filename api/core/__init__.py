@@ -0,0 +1 @@
+# Cross-cutting infrastructure (tracing, middleware helpers) shared by routers and db
@@ -0,0 +1,146 @@
+"""Stateless auth: HS256 JWTs and scrypt password hashes, standard library only.
+
+Tokens are verified in-process (HMAC with keys decoded once at import), so
+resolving the caller's identity costs microseconds and no query. Keys carry a
+``kid`` (digest prefix of the secret): setting ``AUTH_PREVIOUS_SECRET`` keeps
+tokens signed with the old secret valid during a rotation.
+
+Password hashing (scrypt, ~16 MB and tens of ms per call) runs in a small
+dedicated pool (``AUTH_HASH_WORKERS``) and is awaited, so a burst of logins
+can't take every request thread or blow up memory, and nothing blocks while
+waiting for a hash.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Optional
+
+APP_ENV = os.getenv("APP_ENV", "development")
+AUTH_SECRET = os.getenv("AUTH_SECRET") or None
+AUTH_PREVIOUS_SECRET = os.getenv("AUTH_PREVIOUS_SECRET") or None
+AUTH_TOKEN_TTL = int(os.getenv("AUTH_TOKEN_TTL", str(7 * 24 * 3600)))
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+
+if AUTH_SECRET is None:
+    if APP_ENV == "production":
+        raise RuntimeError("AUTH_SECRET must be set in production")
+    AUTH_SECRET = "fuurin-dev-secret"  # development only: tokens are forgeable
+
+# scrypt cost: N=2^14, r=8 -> 16 MiB per hash
+SCRYPT_N, SCRYPT_R, SCRYPT_P, SCRYPT_DKLEN = 2 ** 14, 8, 1, 32
+
+# Subject of the verified bearer token for the current request (set by the
+# router-level dependency in routers/api_v1/auth.py)
+current_user: ContextVar[Optional[str]] = ContextVar("current_user", default=None)
+
+
+class TokenError(Exception):
+    """Malformed, badly signed or expired token."""
+
+
+def _kid(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()[:8]
+
+
+# kid -> key bytes; the first one signs
+_KEYS: dict[str, bytes] = {
+    _kid(s): s.encode() for s in (AUTH_SECRET, AUTH_PREVIOUS_SECRET) if s
+}
+_SIGNING_KID = _kid(AUTH_SECRET)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def encode_token(subject: str, ttl: int = AUTH_TOKEN_TTL, **claims: Any) -> str:
+    now = int(time.time())
+    header = {"alg": "HS256", "typ": "JWT", "kid": _SIGNING_KID}
+    payload = {"sub": subject, "iat": now, "exp": now + ttl, **claims}
+    signing_input = (
+        _b64encode(json.dumps(header, separators=(",", ":")).encode())
+        + "."
+        + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    )
+    signature = hmac.new(_KEYS[_SIGNING_KID], signing_input.encode(), hashlib.sha256).digest()
+    return signing_input + "." + _b64encode(signature)
+
+
+def decode_token(token: str) -> dict[str, Any]:
+    """Verified claims of ``token``; raises ``TokenError``."""
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64decode(header_b64))
+        signature = _b64decode(signature_b64)
+    except ValueError as e:  # also covers JSON and base64 errors
+        raise TokenError("Malformed token") from e
+    if not isinstance(header, dict) or header.get("alg") != "HS256":
+        raise TokenError("Unsupported token algorithm")
+    kid = header.get("kid", _SIGNING_KID)
+    # Read before the signature is checked: anything but a known str is refused
+    key = _KEYS.get(kid) if isinstance(kid, str) else None
+    if key is None:
+        raise TokenError("Unknown signing key")
+    expected = hmac.new(key, f"{header_b64}.{payload_b64}".encode(), hashlib.sha256).digest()
+    if not hmac.compare_digest(signature, expected):
+        raise TokenError("Bad signature")
+    try:
+        payload = json.loads(_b64decode(payload_b64))
+    except ValueError as e:
+        raise TokenError("Malformed token") from e
+    if not isinstance(payload, dict) or not isinstance(payload.get("sub"), str) or not payload["sub"]:
+        raise TokenError("Token without subject")
+    if not isinstance(payload.get("exp", 0), (int, float)) or payload.get("exp", 0) < time.time():
+        raise TokenError("Token expired")
+    return payload
+
+
+# ---- passwords ----
+
+_hash_pool = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=64 * 1024 * 1024, dklen=SCRYPT_DKLEN)
+
+
+def _hash(password: str) -> str:
+    salt = secrets.token_bytes(16)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64encode(salt)}${_b64encode(digest)}"
+
+
+def _verify(password: str, stored: Optional[str]) -> bool:
+    try:
+        scheme, n, r, p, salt, digest = (stored or "").split("$")
+        if scheme != "scrypt":
+            return False
+        params = int(n), int(r), int(p)
+        salt_bytes, digest_bytes = _b64decode(salt), _b64decode(digest)
+    except ValueError:
+        # Unknown user or unusable hash: burn the same time as a real check
+        _scrypt(password, b"\0" * 16, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+        return False
+    return hmac.compare_digest(_scrypt(password, salt_bytes, *params), digest_bytes)
+
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, _hash, password)
+
+
+async def verify_password(password: str, stored: Optional[str]) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(_hash_pool, _verify, password, stored)
@@ -0,0 +1,171 @@
+"""Calendar analytics (streaks, active-day ratio, weekday distribution) with NumPy.
+
+The per-day totals are loaded once as two int arrays (days since 1970-01-01,
+seconds) and scattered into a dense array of one slot per day of the range;
+every metric is then a vectorized pass over it:
+- streaks: run boundaries are where ``diff`` of the padded active mask is +1 / -1
+- weekday distribution: ``bincount`` over ``(slot + weekday of start) % 7``
+No per-day Python loop, so a 10-year history costs about as much as a month.
+``python -m core.calendar_stats`` benchmarks it against a per-day loop (which
+tests/test_calendar_stats.py also checks it against).
+
+A day is active when it has any study time. The current streak is the run
+that reaches the last day of the range (today by default), as in the summary.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from datetime import date, timedelta
+from typing import Any, Sequence
+
+import numpy as np
+
+EPOCH = date(1970, 1, 1)
+
+
+def epoch_day(d: date) -> int:
+    return (d - EPOCH).days
+
+
+def dense(start: date, days: int, epoch_days: Sequence[int], seconds: Sequence[int]) -> np.ndarray:
+    """Seconds per day of ``[start, start + days)``; days outside the range are dropped."""
+    out = np.zeros(days, dtype=np.int64)
+    idx = np.asarray(epoch_days, dtype=np.int64) - epoch_day(start)
+    val = np.asarray(seconds, dtype=np.int64)
+    keep = (idx >= 0) & (idx < days)
+    # Days are unique (grouped upstream): plain fancy assignment, no accumulation needed
+    out[idx[keep]] = val[keep]
+    return out
+
+
+def runs(active: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(first slot, length) of each run of active days, in order."""
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+def _streak(start: date, first: int, length: int) -> dict[str, Any]:
+    begin = start + timedelta(days=int(first))
+    return {
+        "start": begin.isoformat(),
+        "end": (begin + timedelta(days=int(length) - 1)).isoformat(),
+        "days": int(length),
+    }
+
+
+def calendar_stats(start: date, seconds: np.ndarray, min_streak: int = 2, limit: int = 20) -> dict[str, Any]:
+    """All metrics for the dense series ``seconds`` (slot 0 is ``start``)."""
+    days = len(seconds)
+    active = seconds > 0
+    active_days = int(np.count_nonzero(active))
+    starts, lengths = runs(active)
+
+    current = int(lengths[-1]) if len(lengths) and starts[-1] + lengths[-1] == days else 0
+    longest = None
+    if len(lengths):
+        # argmax returns the first maximum: ties go to the oldest streak
+        i = int(np.argmax(lengths))
+        longest = _streak(start, starts[i], lengths[i])
+    # History: streaks of min_streak days or more, most recent first
+    kept = np.flatnonzero(lengths >= min_streak)[::-1][:limit]
+
+    weekday = (np.arange(days) + start.weekday()) % 7
+    wd_days = np.bincount(weekday, minlength=7)
+    wd_active = np.bincount(weekday, weights=active, minlength=7).astype(np.int64)
+    wd_seconds = np.bincount(weekday, weights=seconds, minlength=7).astype(np.int64)
+    total = int(seconds.sum())
+
+    return {
+        "start": start.isoformat(),
+        "end": (start + timedelta(days=days)).isoformat(),
+        "days": days,
+        "active_days": active_days,
+        "active_ratio": round(active_days / days, 4) if days else 0.0,
+        "current_streak": current,
+        "longest_streak": longest,
+        "streak_count": int(np.count_nonzero(lengths >= min_streak)),
+        "streaks": [_streak(start, starts[i], lengths[i]) for i in kept],
+        # Monday first
+        "weekdays": [
+            {
+                "weekday": d,
+                "minutes": int(wd_seconds[d] // 60),
+                "active_days": int(wd_active[d]),
+                "active_ratio": round(int(wd_active[d]) / int(wd_days[d]), 4) if wd_days[d] else 0.0,
+                "share": round(int(wd_seconds[d]) / total, 4) if total else 0.0,
+            }
+            for d in range(7)
+        ],
+    }
+
+
+# ---- benchmark ----
+
+def _loop_stats(start: date, by_day: dict[date, int], days: int, min_streak: int = 2, limit: int = 20) -> dict[str, Any]:
+    """Per-day loop over a {day: seconds} dict: the baseline for the benchmark and the tests."""
+    streaks: list[tuple[date, int]] = []
+    run_start, run = None, 0
+    wd_seconds, wd_active, wd_days = [0] * 7, [0] * 7, [0] * 7
+    active_days = 0
+    cur = start
+    for _ in range(days):
+        sec = by_day.get(cur, 0)
+        wd = cur.weekday()
+        wd_days[wd] += 1
+        wd_seconds[wd] += sec
+        if sec > 0:
+            active_days += 1
+            wd_active[wd] += 1
+            if run == 0:
+                run_start = cur
+            run += 1
+        elif run:
+            streaks.append((run_start, run))
+            run = 0
+        cur += timedelta(days=1)
+    if run:
+        streaks.append((run_start, run))
+    longest = max(streaks, key=lambda s: s[1], default=None)
+    current = run
+    kept = [s for s in reversed(streaks) if s[1] >= min_streak][:limit]
+    return {
+        "active_days": active_days,
+        "current_streak": current,
+        "longest_streak": longest,
+        "streaks": kept,
+        "weekday_seconds": wd_seconds,
+        "weekday_active": wd_active,
+    }
+
+
+def benchmark(years: int = 10, repeat: int = 200) -> None:
+    rng = np.random.default_rng(0)
+    days = 365 * years + years // 4
+    start = date.today() - timedelta(days=days - 1)
+    # ~70% active days with streaky behaviour, 5-90 minutes on active days
+    active = np.repeat(rng.random(days // 7 + 1) < 0.85, 7)[:days] & (rng.random(days) < 0.8)
+    secs = np.where(active, rng.integers(300, 5400, days), 0)
+    slots = np.flatnonzero(secs)
+    epoch_days = (slots + epoch_day(start)).tolist()
+    values = secs[slots].tolist()
+    by_day = {start + timedelta(days=int(i)): int(secs[i]) for i in slots}
+
+    def timed(fn) -> float:
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - t0) / repeat * 1000
+
+    ms_vec = timed(lambda: calendar_stats(start, dense(start, days, epoch_days, values)))
+    ms_loop = timed(lambda: _loop_stats(start, by_day, days))
+    print(f"{years} years, {days} days, {len(slots)} active")
+    print(f"  numpy (dense + metrics): {ms_vec:.3f} ms")
+    print(f"  per-day loop:            {ms_loop:.3f} ms  ({ms_loop / ms_vec:.1f}x)")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,272 @@
+"""Response compression (gzip always; brotli / zstd when installed).
+
+Pure ASGI middleware, streaming-aware:
+- single-message bodies smaller than ``COMPRESSION_MIN_SIZE`` go out untouched
+- single-message bodies are compressed in one shot, and the compressed bytes
+  are kept in a small LRU keyed by (encoding, body digest) so identical hot
+  payloads (cached health probes, unchanged lists) are compressed only once
+- streamed bodies (NDJSON exports, batch stats) are compressed chunk by chunk
+  with a sync flush after each chunk, so clients keep receiving complete lines
+
+``brotli`` and ``zstandard`` are optional: without them only gzip is offered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import zlib
+from collections import OrderedDict
+from typing import Callable, Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Server preference order; encodings whose module is missing are skipped
+COMPRESSION_ENCODINGS = [
+    e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "br,zstd,gzip").split(",") if e.strip()
+]
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+# Compressed-bytes cache: total budget and largest body worth caching
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(8 * 1024 * 1024)))
+COMPRESSION_CACHE_MAX_ENTRY = int(os.getenv("COMPRESSION_CACHE_MAX_ENTRY", str(512 * 1024)))
+# Bodies above this are compressed in a worker thread instead of the event loop
+COMPRESSION_THREAD_THRESHOLD = int(os.getenv("COMPRESSION_THREAD_THRESHOLD", str(256 * 1024)))
+
+# Content types worth compressing (prefix match). The packed heatmap is
+# application/octet-stream and compresses well (long zero runs).
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/octet-stream",
+)
+
+
+def available_encodings() -> list[str]:
+    supported = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    return [e for e in COMPRESSION_ENCODINGS if supported.get(e)]
+
+
+def choose_encoding(accept_encoding: str, offered: list[str]) -> Optional[str]:
+    """First server-preferred encoding the client accepts (q > 0)."""
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    for enc in offered:
+        q = accepted.get(enc, accepted.get("*", 0.0))
+        if q > 0:
+            return enc
+    return None
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=COMPRESSION_BROTLI_QUALITY)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(data)
+    c = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return c.compress(data) + c.flush()
+
+
+class _StreamCompressor:
+    """Incremental compressor; ``chunk`` output is decodable up to that point."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._c = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        elif encoding == "zstd":
+            self._c = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+        else:
+            self._c = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._c.process(data) + self._c.flush()
+        if self.encoding == "zstd":
+            return self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._c.finish()
+        return self._c.flush()
+
+
+class CompressedCache:
+    """LRU of compressed bodies bounded by total size. Event-loop only (no lock)."""
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+
+    def get(self, key: tuple[str, bytes]) -> Optional[bytes]:
+        value = self._items.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple[str, bytes], value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._items[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self.size = 0
+
+
+compressed_cache = CompressedCache()
+
+
+def _header(headers: list[tuple[bytes, bytes]], name: bytes) -> Optional[bytes]:
+    for k, v in headers:
+        if k.lower() == name:
+            return v
+    return None
+
+
+def _without(headers: list[tuple[bytes, bytes]], *names: bytes) -> list[tuple[bytes, bytes]]:
+    return [(k, v) for k, v in headers if k.lower() not in names]
+
+
+def _add_vary(headers: list[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+    vary = _header(headers, b"vary")
+    if vary is None:
+        return headers + [(b"vary", b"Accept-Encoding")]
+    if b"accept-encoding" in vary.lower():
+        return headers
+    return _without(headers, b"vary") + [(b"vary", vary + b", Accept-Encoding")]
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE, cache: CompressedCache = compressed_cache):
+        self.app = app
+        self.min_size = min_size
+        self.cache = cache
+        self.encodings = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for k, v in scope.get("headers", []):
+            if k == b"accept-encoding":
+                accept = v.decode("latin-1")
+                break
+        encoding = choose_encoding(accept, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(send, encoding, self.min_size, self.cache).send)
+
+
+class _Responder:
+    """Per-response state: holds ``http.response.start`` until the first body chunk."""
+
+    def __init__(self, send: Callable, encoding: str, min_size: int, cache: CompressedCache):
+        self._send = send
+        self.encoding = encoding
+        self.min_size = min_size
+        self.cache = cache
+        self.start: Optional[dict] = None
+        self.passthrough = False
+        self.stream: Optional[_StreamCompressor] = None
+
+    def _eligible(self, headers: list[tuple[bytes, bytes]]) -> bool:
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        ctype = (_header(headers, b"content-type") or b"").decode("latin-1").lower()
+        return ctype.startswith(COMPRESSIBLE_TYPES)
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            self.passthrough = not self._eligible(list(message.get("headers", [])))
+            if self.passthrough:
+                await self._send(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.stream is None and self.start is not None:
+            start, self.start = self.start, None
+            headers = list(start.get("headers", []))
+            if not more:
+                await self._send_whole(start, headers, body)
+                return
+            self.stream = _StreamCompressor(self.encoding)
+            headers = _add_vary(_without(headers, b"content-length")) + [
+                (b"content-encoding", self.encoding.encode())
+            ]
+            await self._send({**start, "headers": headers})
+
+        data = self.stream.chunk(body) if body else b""
+        if not more:
+            data += self.stream.finish()
+        if data or not more:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more})
+
+    async def _send_whole(self, start: dict, headers: list[tuple[bytes, bytes]], body: bytes) -> None:
+        if len(body) < self.min_size:
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+        cacheable = len(body) <= COMPRESSION_CACHE_MAX_ENTRY
+        key = (self.encoding, hashlib.blake2b(body, digest_size=16).digest()) if cacheable else None
+        out = self.cache.get(key) if key else None
+        if out is None:
+            if len(body) > COMPRESSION_THREAD_THRESHOLD:
+                out = await asyncio.to_thread(compress, self.encoding, body)
+            else:
+                out = compress(self.encoding, body)
+            if key:
+                self.cache.put(key, out)
+        headers = _add_vary(_without(headers, b"content-length")) + [
+            (b"content-encoding", self.encoding.encode()),
+            (b"content-length", str(len(out)).encode()),
+        ]
+        await self._send({**start, "headers": headers})
+        await self._send({"type": "http.response.body", "body": out})
@@ -0,0 +1,109 @@
+"""Search normalization for Japanese titles: NFKC, lowercase, katakana→hiragana, romaji→hiragana.
+
+``normalize`` must stay in sync with the SQL function ``fuurin_search_norm``
+(alembic revision 202610191500) that fills ``works.search_text``.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+
+# Katakana ァ..ヶ map onto hiragana ぁ..ゖ (same order, offset 0x60)
+KATAKANA = "".join(chr(c) for c in range(0x30A1, 0x30F7))
+HIRAGANA = "".join(chr(c - 0x60) for c in range(0x30A1, 0x30F7))
+_KATA_TO_HIRA = str.maketrans(KATAKANA, HIRAGANA)
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower().translate(_KATA_TO_HIRA)
+
+
+# Hepburn plus common kunrei / wāpuro spellings
+_ROMAJI = {
+    "a": "あ", "i": "い", "u": "う", "e": "え", "o": "お",
+    "ka": "か", "ki": "き", "ku": "く", "ke": "け", "ko": "こ",
+    "sa": "さ", "shi": "し", "si": "し", "su": "す", "se": "せ", "so": "そ",
+    "ta": "た", "chi": "ち", "ti": "ち", "tsu": "つ", "tu": "つ", "te": "て", "to": "と",
+    "na": "な", "ni": "に", "nu": "ぬ", "ne": "ね", "no": "の",
+    "ha": "は", "hi": "ひ", "fu": "ふ", "hu": "ふ", "he": "へ", "ho": "ほ",
+    "ma": "ま", "mi": "み", "mu": "む", "me": "め", "mo": "も",
+    "ya": "や", "yu": "ゆ", "yo": "よ",
+    "ra": "ら", "ri": "り", "ru": "る", "re": "れ", "ro": "ろ",
+    "wa": "わ", "wo": "を",
+    "ga": "が", "gi": "ぎ", "gu": "ぐ", "ge": "げ", "go": "ご",
+    "za": "ざ", "ji": "じ", "zi": "じ", "zu": "ず", "ze": "ぜ", "zo": "ぞ",
+    "da": "だ", "di": "ぢ", "du": "づ", "de": "で", "do": "ど",
+    "ba": "ば", "bi": "び", "bu": "ぶ", "be": "べ", "bo": "ぼ",
+    "pa": "ぱ", "pi": "ぴ", "pu": "ぷ", "pe": "ぺ", "po": "ぽ",
+    "kya": "きゃ", "kyu": "きゅ", "kyo": "きょ",
+    "sha": "しゃ", "shu": "しゅ", "sho": "しょ", "sya": "しゃ", "syu": "しゅ", "syo": "しょ",
+    "cha": "ちゃ", "chu": "ちゅ", "cho": "ちょ", "tya": "ちゃ", "tyu": "ちゅ", "tyo": "ちょ",
+    "nya": "にゃ", "nyu": "にゅ", "nyo": "にょ",
+    "hya": "ひゃ", "hyu": "ひゅ", "hyo": "ひょ",
+    "mya": "みゃ", "myu": "みゅ", "myo": "みょ",
+    "rya": "りゃ", "ryu": "りゅ", "ryo": "りょ",
+    "gya": "ぎゃ", "gyu": "ぎゅ", "gyo": "ぎょ",
+    "ja": "じゃ", "ju": "じゅ", "jo": "じょ", "zya": "じゃ", "zyu": "じゅ", "zyo": "じょ",
+    "bya": "びゃ", "byu": "びゅ", "byo": "びょ",
+    "pya": "ぴゃ", "pyu": "ぴゅ", "pyo": "ぴょ",
+    "fa": "ふぁ", "fi": "ふぃ", "fe": "ふぇ", "fo": "ふぉ",
+    "she": "しぇ", "che": "ちぇ", "je": "じぇ",
+    "-": "ー",
+}
+_VOWELS = set("aeiou")
+
+
+def romaji_to_hiragana(text: str) -> str:
+    """Best-effort romaji → hiragana; characters that don't convert are kept."""
+    s = text.lower()
+    out: list[str] = []
+    i = 0
+    while i < len(s):
+        c = s[i]
+        nxt = s[i + 1] if i + 1 < len(s) else ""
+        if c == "n":
+            after = s[i + 2] if i + 2 < len(s) else ""
+            if nxt == "'" or (nxt == "n" and after not in _VOWELS and after != "y"):
+                out.append("ん")
+                i += 2
+                continue
+            if nxt == "n":
+                # "nn" + vowel: ん then the n-row kana (konnichiwa → こんにちわ)
+                out.append("ん")
+                i += 1
+                continue
+            if nxt == "" or (nxt not in _VOWELS and nxt != "y"):
+                out.append("ん")
+                i += 1
+                continue
+        # Doubled consonant → small tsu (kk, tt, ss, tch...)
+        if c == nxt and c.isalpha() and c not in _VOWELS:
+            out.append("っ")
+            i += 1
+            continue
+        if c == "t" and nxt == "c":
+            out.append("っ")
+            i += 1
+            continue
+        for size in (3, 2, 1):
+            kana = _ROMAJI.get(s[i:i + size])
+            if kana:
+                out.append(kana)
+                i += size
+                break
+        else:
+            out.append(c)
+            i += 1
+    return "".join(out)
+
+
+def search_terms(query: str) -> list[str]:
+    """Normalized forms to match a query against: as typed, plus its kana reading if it looks like romaji."""
+    q = normalize(query).strip()
+    terms = [q] if q else []
+    if q and q.isascii() and any(ch.isalpha() for ch in q):
+        # Japanese titles are written without spaces
+        kana = romaji_to_hiragana(q).replace(" ", "")
+        if kana != q and not any("a" <= ch <= "z" for ch in kana):
+            terms.append(kana)
+    return terms
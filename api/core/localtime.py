@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Widest UTC offsets in use (UTC-12 .. UTC+14): local day d always falls
+# inside [d 00:00 - 14h, d+1 00:00 + 12h) in UTC.
+_MAX_BEHIND = timedelta(hours=12)
+_MAX_AHEAD = timedelta(hours=14)
+
+
+def user_tz(name: Optional[str]) -> ZoneInfo:
+    """ZoneInfo for ``Users.timezone``; unknown or empty names fall back to UTC."""
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return ZoneInfo("UTC")
+
+
+def as_utc(ts: datetime) -> datetime:
+    """Client timestamps without an offset are taken as UTC."""
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc)
+
+
+def local_day(ts: datetime, tz_name: Optional[str]) -> date:
+    """Local calendar day of an instant (same rule as the DB's fuurin_local_day)."""
+    return as_utc(ts).astimezone(user_tz(tz_name)).date()
+
+
+def today_for(tz_name: Optional[str]) -> date:
+    return datetime.now(user_tz(tz_name)).date()
+
+
+def utc_bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    """Conservative UTC instants covering local days [start, end) in any timezone.
+
+    Added next to a ``local_day`` filter so range queries keep partition pruning
+    on ``started_at``.
+    """
+    lo = datetime.combine(start, time.min, tzinfo=timezone.utc) - _MAX_AHEAD
+    hi = datetime.combine(end, time.min, tzinfo=timezone.utc) + _MAX_BEHIND
+    return lo, hi
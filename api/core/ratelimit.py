@@ -0,0 +1,186 @@
+"""Per-client token-bucket rate limiting and load shedding (pure ASGI middleware).
+
+Every ``/api/`` request takes a token from its client's bucket for the route
+class:
+- ``expensive``: aggregates (stats, progress, summary, export, sync) and auth
+  (password hashing), small budget
+- ``cheap``: everything else under ``/api/``
+The client is the verified bearer token's subject, else the peer IP
+(``X-Forwarded-For`` only with ``RATE_LIMIT_TRUST_FORWARDED=1``). Client-supplied
+ids (``user_id`` query parameter, ``/users/{id}`` path) are never used: a caller
+could rotate them to get a fresh bucket per request.
+An empty bucket answers 429 with ``Retry-After``.
+
+Shedding: while the DB pool is loaded beyond ``RATE_LIMIT_SHED_AT`` (checked-out
+share of its capacity), expensive requests get 503 + Retry-After right away,
+leaving the remaining connections to cheap requests.
+
+Budgets are per process (each gunicorn worker has its own buckets).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from core.auth import TokenError, decode_token
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true", "yes")
+# Tokens per second and bucket size, per client
+RATE_LIMIT_CHEAP_RATE = float(os.getenv("RATE_LIMIT_CHEAP_RATE", "20"))
+RATE_LIMIT_CHEAP_BURST = float(os.getenv("RATE_LIMIT_CHEAP_BURST", "40"))
+RATE_LIMIT_EXPENSIVE_RATE = float(os.getenv("RATE_LIMIT_EXPENSIVE_RATE", "2"))
+RATE_LIMIT_EXPENSIVE_BURST = float(os.getenv("RATE_LIMIT_EXPENSIVE_BURST", "10"))
+# Pool load (0-1) from which expensive requests are shed; 0 disables shedding
+RATE_LIMIT_SHED_AT = float(os.getenv("RATE_LIMIT_SHED_AT", "0.8"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "0").lower() in ("1", "true", "yes")
+
+CHEAP = "cheap"
+EXPENSIVE = "expensive"
+
+EXPENSIVE_PATHS = re.compile(
+    r"^/api/v1/(stats/|works/progress|works/[^/]+/stats|users/[^/]+/summary|activity-events/export|sync$|auth/)"
+)
+
+
+class TokenBuckets:
+    """Buckets of ``burst`` tokens refilled at ``rate`` per second, one per key."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: dict[str, list[float]] = {}  # key -> [tokens, updated_at]
+        self._lock = threading.Lock()
+
+    def take(self, key: str) -> float:
+        """Take a token: 0 when allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict(now)
+                bucket = self._buckets[key] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / self.rate if self.rate > 0 else 60.0
+
+    def _evict(self, now: float) -> None:
+        # Full buckets carry no state: dropping them changes nothing
+        full = [k for k, (tokens, at) in self._buckets.items() if tokens + (now - at) * self.rate >= self.burst]
+        for k in full:
+            del self._buckets[k]
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def route_class(path: str) -> Optional[str]:
+    if not path.startswith("/api/"):
+        return None  # health, readiness, docs, metrics
+    return EXPENSIVE if EXPENSIVE_PATHS.match(path) else CHEAP
+
+
+def client_key(scope: dict[str, Any]) -> str:
+    for k, v in scope.get("headers", []):
+        if k == b"authorization" and v[:7].lower() == b"bearer ":
+            try:
+                return "u:" + decode_token(v[7:].decode("latin-1").strip())["sub"]
+            except TokenError:
+                break  # rejected later with a 401; count it against the IP
+    if RATE_LIMIT_TRUST_FORWARDED:
+        for k, v in scope.get("headers", []):
+            if k == b"x-forwarded-for":
+                return "ip:" + v.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class RateLimitMiddleware:
+    """The buckets and counters belong to the instance. Starlette builds the
+    middleware stack lazily, so the instance publishes itself as
+    ``state.ratelimit`` (pass ``app.state``) for /metrics.
+    """
+
+    def __init__(
+        self,
+        app,
+        pool_load: Optional[Callable[[], Optional[float]]] = None,
+        enabled: bool = RATE_LIMIT_ENABLED,
+        shed_at: float = RATE_LIMIT_SHED_AT,
+        state: Any = None,
+    ):
+        self.app = app
+        self.enabled = enabled
+        self.pool_load = pool_load
+        self.shed_at = shed_at
+        self.buckets = {
+            CHEAP: TokenBuckets(RATE_LIMIT_CHEAP_RATE, RATE_LIMIT_CHEAP_BURST),
+            EXPENSIVE: TokenBuckets(RATE_LIMIT_EXPENSIVE_RATE, RATE_LIMIT_EXPENSIVE_BURST),
+        }
+        self.counts = {name: {"allowed": 0, "limited": 0, "shed": 0} for name in self.buckets}
+        if state is not None:
+            state.ratelimit = self
+
+    async def __call__(self, scope, receive, send):
+        kind = route_class(scope.get("path", "")) if scope["type"] == "http" and self.enabled else None
+        if kind is None:
+            await self.app(scope, receive, send)
+            return
+        counts = self.counts[kind]
+        if kind == EXPENSIVE and self.shed_at > 0 and self.pool_load is not None:
+            load = self.pool_load()
+            if load is not None and load >= self.shed_at:
+                counts["shed"] += 1
+                await _reject(send, 503, "Server busy, retry shortly", 1)
+                return
+        wait = self.buckets[kind].take(client_key(scope))
+        if wait > 0:
+            counts["limited"] += 1
+            await _reject(send, 429, "Too many requests", wait)
+            return
+        counts["allowed"] += 1
+        await self.app(scope, receive, send)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "shed_at": self.shed_at,
+            "pool_load": self.pool_load() if self.pool_load is not None else None,
+            "classes": {
+                name: {
+                    "rate": b.rate,
+                    "burst": b.burst,
+                    "clients": len(b),
+                    **self.counts[name],
+                }
+                for name, b in self.buckets.items()
+            },
+        }
+
+
+async def _reject(send: Callable, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
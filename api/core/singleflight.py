@@ -0,0 +1,84 @@
+"""Single-flight: concurrent identical calls share one execution.
+
+The first caller for a key (the leader) runs the function; callers arriving
+with the same key while it runs wait for and receive the same result (or
+exception). Nothing is kept once the call finishes, so this never serves stale
+data: it only collapses duplicates that overlap in time (several dashboard
+tabs, client retries). Results are shared, so callers must not mutate them.
+
+Handlers are sync (threadpool), hence threads and not asyncio.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        # name (first element of the key) -> [executions, collapsed, errors]
+        self._counts: dict[str, list[int]] = {}
+
+    def do(self, key: tuple, fn: Callable[[], T]) -> T:
+        """Return ``fn()``, sharing the execution with concurrent callers of ``key``.
+
+        ``key[0]`` names the call site in the metrics.
+        """
+        name = str(key[0])
+        with self._lock:
+            counts = self._counts.setdefault(name, [0, 0, 0])
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                counts[0] += 1
+            else:
+                counts[1] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                counts[2] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            by_name = {
+                name: {"executions": c[0], "collapsed": c[1], "errors": c[2]}
+                for name, c in sorted(self._counts.items())
+            }
+        return {
+            "in_flight": self.in_flight(),
+            "executions": sum(c["executions"] for c in by_name.values()),
+            "collapsed": sum(c["collapsed"] for c in by_name.values()),
+            "by_name": by_name,
+        }
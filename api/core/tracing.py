@@ -0,0 +1,239 @@
+"""Minimal in-process tracing: request → dependency → SQL spans.
+
+Spans are handed to an exporter that needs no external service:
+- ``InMemoryExporter`` keeps the last N spans (handy in tests / the REPL)
+- ``JsonlExporter`` appends one JSON object per finished span to a local file
+
+Configuration (env):
+- TRACE_EXPORTER = off (default) | memory | jsonl
+- TRACE_FILE = path of the JSONL file (default: traces.jsonl)
+
+When tracing is off every helper is a cheap no-op.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional, Protocol
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    duration_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    _t0: int = field(default=0, repr=False)
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_ns / 1_000_000
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+        }
+
+
+class Exporter(Protocol):
+    def export(self, span: Span) -> None: ...
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a bounded deque."""
+
+    def __init__(self, maxlen: int = 10_000):
+        self._spans: deque[Span] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self, trace_id: Optional[str] = None) -> list[Span]:
+        with self._lock:
+            items = list(self._spans)
+        if trace_id is None:
+            return items
+        return [s for s in items if s.trace_id == trace_id]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class JsonlExporter:
+    """Appends finished spans to a JSONL file (one span per line)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._fh = open(path, "a", encoding="utf-8", buffering=1)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._fh.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+_exporter: Optional[Exporter] = None
+_current: ContextVar[Optional[Span]] = ContextVar("fuurin_current_span", default=None)
+
+
+def configure(exporter: Optional[Exporter]) -> None:
+    """Install (or remove, with None) the process-wide exporter."""
+    global _exporter
+    _exporter = exporter
+
+
+def configure_from_env() -> Optional[Exporter]:
+    kind = os.getenv("TRACE_EXPORTER", "off").lower()
+    if kind == "memory":
+        configure(InMemoryExporter())
+    elif kind == "jsonl":
+        configure(JsonlExporter(os.getenv("TRACE_FILE", "traces.jsonl")))
+    else:
+        configure(None)
+    return _exporter
+
+
+def get_exporter() -> Optional[Exporter]:
+    return _exporter
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """Create a child of the current span without making it current.
+
+    Used for leaf spans whose start and end happen in different callbacks
+    (SQL statements). Pair with ``finish_span``.
+    """
+    if _exporter is None:
+        return None
+    parent = _current.get()
+    return Span(
+        name=name,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+        _t0=time.perf_counter_ns(),
+    )
+
+
+def finish_span(s: Optional[Span]) -> None:
+    if s is None:
+        return
+    s.duration_ns = time.perf_counter_ns() - s._t0
+    exporter = _exporter
+    if exporter is not None:
+        exporter.export(s)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a span around a block and make it the parent of nested spans."""
+    s = start_span(name, **attributes)
+    if s is None:
+        yield None
+        return
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        finish_span(s)
+
+
+def instrument_engine(engine: Engine, max_statement_len: int = 500) -> None:
+    """Emit one ``db.query`` span per SQL statement executed on ``engine``."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _exporter is None or context is None:
+            return
+        context._fuurin_span = start_span(
+            "db.query",
+            statement=statement[:max_statement_len],
+            executemany=bool(executemany),
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        s = getattr(context, "_fuurin_span", None)
+        if s is None:
+            return
+        s.attributes["rowcount"] = cursor.rowcount
+        context._fuurin_span = None
+        finish_span(s)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        context = exception_context.execution_context
+        s = getattr(context, "_fuurin_span", None)
+        if s is None:
+            return
+        s.attributes["error"] = type(exception_context.original_exception).__name__
+        context._fuurin_span = None
+        finish_span(s)
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root ``http.request`` span.
+
+    The trace id is returned in the ``X-Trace-Id`` response header so a test
+    (or a curious developer) can pull the matching spans from the exporter.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _exporter is None:
+            await self.app(scope, receive, send)
+            return
+
+        with span("http.request", method=scope.get("method"), path=scope.get("path")) as s:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    s.attributes["status_code"] = message["status"]
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", s.trace_id.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                s.attributes["route"] = route.path
@@ -2,14 +2,35 @@ from __future__ import annotations
 
 from typing import Generator
 
+from fastapi import Request
 from sqlalchemy.orm import Session
 
-from db.database import SessionLocal
+from core.tracing import span
+from db.database import ReadSessionLocal, SessionLocal
+from db.replica import use_replica
 
 
 def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
+    # Setup and teardown are traced separately: a generator dependency is
+    # entered and exited in different threadpool calls.
+    with span("dependency.get_db"):
+        db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        with span("dependency.get_db.close"):
+            db.close()
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """Session for read-only handlers: the replica when safe, else the primary (see db/replica.py)."""
+    with span("dependency.get_read_db") as s:
+        replica = use_replica(request)
+        if s is not None:
+            s.attributes["replica"] = replica
+        db = (ReadSessionLocal if replica else SessionLocal)()
+    try:
+        yield db
+    finally:
+        with span("dependency.get_read_db.close"):
+            db.close()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Optional
+
+from sqlalchemy import text
+
+from db.database import engine, pool_status
+
+DB_HEALTH_TTL = float(os.getenv("DB_HEALTH_TTL", "5"))
+
+
+class DbHealth:
+    """Cached DB reachability for /db/health.
+
+    At most one probe runs at a time and at most once per ``ttl`` seconds;
+    concurrent or frequent callers get the cached result. The probe is skipped
+    when the pool is saturated so health checks never queue behind (or take a
+    connection from) real traffic.
+    """
+
+    def __init__(self, ttl: float = DB_HEALTH_TTL):
+        self.ttl = ttl
+        self._last: Optional[dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._last is not None and time.monotonic() - self._checked_at < self.ttl
+
+    async def status(self) -> dict[str, Any]:
+        if self._fresh() or self._lock.locked():
+            return self._cached()
+        async with self._lock:
+            if not self._fresh():
+                self._last = await asyncio.to_thread(self._probe)
+                self._checked_at = time.monotonic()
+        return self._cached()
+
+    def _cached(self) -> dict[str, Any]:
+        if self._last is None:
+            return {"reachable": None, "age_sec": None}
+        return {**self._last, "age_sec": round(time.monotonic() - self._checked_at, 3)}
+
+    def _probe(self) -> dict[str, Any]:
+        if pool_status()["saturated"]:
+            previous = self._last["reachable"] if self._last else None
+            return {"reachable": previous, "skipped": "pool saturated"}
+        t0 = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception as e:
+            return {"reachable": False, "error": str(e)}
+        return {"reachable": True, "latency_ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+
+def overall_status(db: dict[str, Any], pool: dict[str, Any]) -> str:
+    """"error" when the last probe failed, "unknown" before any probe succeeded,
+    "degraded" while the pool is saturated (probe skipped), else "ok"."""
+    if db["reachable"] is False:
+        return "error"
+    if db["reachable"] is None:
+        return "unknown"
+    if pool.get("saturated") or "skipped" in db:
+        return "degraded"
+    return "ok"
+
+
+db_health = DbHealth()
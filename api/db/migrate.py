@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+import sys
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from db.database import engine
+from db.partitions import ensure_partitions
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def _config() -> Config:
+    return Config(ALEMBIC_INI)
+
+
+def pending(cfg: Config) -> bool:
+    """Cheap check: compare alembic_version with the script heads (one SELECT)."""
+    heads = set(ScriptDirectory.from_config(cfg).get_heads())
+    with engine.connect() as conn:
+        current = set(MigrationContext.configure(conn).get_current_heads())
+    return current != heads
+
+
+def main() -> int:
+    cfg = _config()
+    if pending(cfg):
+        command.upgrade(cfg, "head")
+    else:
+        print("Database already at head, skipping migrations")
+    ensure_partitions()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,10 +15,18 @@ from sqlalchemy import (
     Boolean,
     JSON,
     UniqueConstraint,
+    CheckConstraint,
     Index,
     Numeric,
+    BigInteger,
+    SmallInteger,
+    Float,
+    Identity,
+    FetchedValue,
+    Computed,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
 
 Base = declarative_base()
@@ -149,6 +157,18 @@ class Works(Base):
     meta: Mapped[Optional[dict]] = mapped_column("metadata", JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    # Normalized title + author for search (see core.kana.normalize); trigram and prefix indexed
+    search_text: Mapped[str] = mapped_column(
+        Text, Computed("fuurin_search_norm(title || coalesce(' ' || author, ''))", persisted=True)
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_works_search_trgm", "search_text",
+            postgresql_using="gin", postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+        Index("ix_works_search_prefix", "search_text", postgresql_ops={"search_text": "text_pattern_ops"}),
+    )
 
 
 class WorkSegments(Base):
@@ -173,8 +193,11 @@ class StudySessions(Base):
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
     user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), nullable=False)
-    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Partition key (monthly RANGE partitions): part of the primary key
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
     ended_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # User's local calendar day of started_at, filled by a DB trigger from users.timezone
+    local_day: Mapped[date] = mapped_column(Date, nullable=False, server_default=FetchedValue())
     duration_sec: Mapped[int] = mapped_column(Integer, nullable=False)
     modality: Mapped[Modality] = mapped_column(String, nullable=False)
     work_id: Mapped[Optional[str]] = mapped_column(UUID(as_uuid=False), ForeignKey("works.id"))
@@ -182,12 +205,68 @@ class StudySessions(Base):
     words_reviewed: Mapped[Optional[int]] = mapped_column(Integer)
     words_learned: Mapped[Optional[int]] = mapped_column(Integer)
     notes: Mapped[Optional[str]] = mapped_column(Text)
+    # Client-generated idempotency key (offline sync); unique per user and started_at
+    client_key: Mapped[Optional[str]] = mapped_column(Text)
 
     __table_args__ = (
-        Index("ix_study_sessions_user_started", "user_id", "started_at"),
+        # Covering indexes (INCLUDE): summary and stats reads don't touch the heap
+        Index(
+            "ix_study_sessions_user_started", "user_id", "started_at",
+            postgresql_include=["duration_sec", "words_learned"],
+        ),
+        Index("ux_study_sessions_user_client_key", "user_id", "client_key", "started_at", unique=True),
+        Index(
+            "ix_study_sessions_user_local_day", "user_id", "local_day",
+            postgresql_include=["started_at", "duration_sec", "words_learned"],
+        ),
+        Index(
+            "ix_study_sessions_user_work_started", "user_id", "work_id", "started_at",
+            postgresql_include=["id", "ended_at", "duration_sec", "modality", "words_learned"],
+            postgresql_where=text("work_id IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (started_at)"},
     )
 
 
+class StudyDailyRollups(Base):
+    """Per (user, local day, modality) totals, maintained by a trigger on study_sessions."""
+
+    __tablename__ = "study_daily_rollups"
+
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    modality: Mapped[Modality] = mapped_column(String, primary_key=True)
+    seconds: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    words: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class StudyMonthlyRollups(Base):
+    """Per (user, local month, modality) totals, maintained by the same trigger."""
+
+    __tablename__ = "study_monthly_rollups"
+
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), primary_key=True)
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    modality: Mapped[Modality] = mapped_column(String, primary_key=True)
+    seconds: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    words: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class StudyMediaRollups(Base):
+    """Per (user, local day, work type) totals of sessions linked to a work, maintained by triggers."""
+
+    __tablename__ = "study_media_rollups"
+
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    work_type: Mapped[WorkType] = mapped_column(String, primary_key=True)
+    seconds: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    words: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
 class ReadingSpeeds(Base):
     __tablename__ = "reading_speeds"
 
@@ -198,23 +277,142 @@ class ReadingSpeeds(Base):
     chars_per_min: Mapped[int] = mapped_column(Integer, nullable=False)
     method: Mapped[ReadingSpeedMethod] = mapped_column(String, nullable=False)
 
+    __table_args__ = (
+        Index("ix_reading_speeds_user_work_measured", "user_id", "work_id", "measured_at"),
+    )
+
+
+class WorkSpeedQuantiles(Base):
+    """Per-work quantile sketch of the readers' recent speeds (services/reading_speeds.py)."""
+
+    __tablename__ = "work_speed_quantiles"
+
+    work_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("works.id"), primary_key=True)
+    readers: Mapped[int] = mapped_column(Integer, nullable=False)
+    measurements: Mapped[int] = mapped_column(Integer, nullable=False)
+    # chars/min at percentiles 0, 1, ..., 100
+    quantiles: Mapped[list[float]] = mapped_column(ARRAY(Float), nullable=False)
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class WorkSpeedQuantilesMeta(Base):
+    """One row: when the sketches were last rebuilt, even if that left none."""
+
+    __tablename__ = "work_speed_quantiles_meta"
+
+    id: Mapped[int] = mapped_column(SmallInteger, primary_key=True, default=1, server_default="1")
+    refreshed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (CheckConstraint("id = 1", name="ck_work_speed_quantiles_meta_one_row"),)
+
+
+class UserWorkStats(Base):
+    """Per (user, work) progress summary, maintained by a trigger on study_sessions."""
+
+    __tablename__ = "user_work_stats"
+
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), primary_key=True)
+    work_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("works.id"), primary_key=True)
+    seconds: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    sessions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    words: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    first_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    # Furthest segment reached (highest work_segments.index_no seen in a session)
+    last_segment_id: Mapped[Optional[str]] = mapped_column(UUID(as_uuid=False), ForeignKey("work_segments.id"))
+    last_segment_index: Mapped[Optional[int]] = mapped_column(Integer)
+
+    __table_args__ = (
+        Index("ix_user_work_stats_user_last", "user_id", "last_at"),
+    )
+
 
 class ActivityEvents(Base):
     __tablename__ = "activity_events"
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
     user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), nullable=False)
-    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    # Partition key (monthly RANGE partitions): part of the primary key
+    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True, default=datetime.utcnow)
     type: Mapped[ActivityType] = mapped_column(String, nullable=False)
     ref_kind: Mapped[Optional[str]] = mapped_column(String)
     ref_id: Mapped[Optional[str]] = mapped_column(UUID(as_uuid=False))
     summary: Mapped[Optional[str]] = mapped_column(Text)
     meta: Mapped[Optional[dict]] = mapped_column("metadata", JSON)
     visibility: Mapped[Visibility] = mapped_column(String, nullable=False, default=Visibility.private.value)
+    # Client-generated idempotency key (offline sync); unique per user and occurred_at
+    client_key: Mapped[Optional[str]] = mapped_column(Text)
 
     __table_args__ = (
-        Index("ix_activity_user_occurred", "user_id", "occurred_at"),
+        # Activity feed: range scan in time order; summary (unbounded text) stays
+        # out of the INCLUDE list, it could exceed the btree tuple size
+        Index(
+            "ix_activity_user_occurred", "user_id", "occurred_at",
+            postgresql_include=["id", "type", "ref_kind", "ref_id"],
+        ),
+        Index("ux_activity_events_user_client_key", "user_id", "client_key", "occurred_at", unique=True),
         Index("ix_activity_type_occurred", "type", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+
+class VocabItems(Base):
+    __tablename__ = "vocab_items"
+
+    id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True)
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    term: Mapped[str] = mapped_column(Text, nullable=False)
+    reading: Mapped[str] = mapped_column(Text, nullable=False, default="", server_default="")
+    meaning: Mapped[Optional[str]] = mapped_column(Text)
+    work_id: Mapped[Optional[str]] = mapped_column(UUID(as_uuid=False), ForeignKey("works.id"))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=text("now()"))
+
+    __table_args__ = (
+        Index("ux_vocab_items_user_term", "user_id", "term", "reading", unique=True),
+    )
+
+
+class ReviewStates(Base):
+    """SRS scheduling state of a vocabulary item (services/srs.py)."""
+
+    __tablename__ = "review_states"
+
+    item_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("vocab_items.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    interval_days: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    ease: Mapped[float] = mapped_column(Float, nullable=False, default=2.5, server_default="2.5")
+    reps: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    lapses: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    last_reviewed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Due queue: range scan in due order, index-only for what due_cards reads here
+        Index(
+            "ix_review_states_user_due", "user_id", "due_at", "item_id",
+            postgresql_include=["interval_days", "reps"],
+        ),
+    )
+
+
+class ReviewLogs(Base):
+    __tablename__ = "review_logs"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    user_id: Mapped[str] = mapped_column(UUID(as_uuid=False), ForeignKey("users.id"), nullable=False)
+    item_id: Mapped[str] = mapped_column(
+        UUID(as_uuid=False), ForeignKey("vocab_items.id", ondelete="CASCADE"), nullable=False
+    )
+    reviewed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    grade: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    interval_days: Mapped[float] = mapped_column(Float, nullable=False)
+    ease: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_review_logs_user_reviewed", "user_id", "reviewed_at"),
+        Index("ix_review_logs_item", "item_id"),
     )
 
 
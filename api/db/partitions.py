@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from db.database import engine
+
+# Partitioned tables -> partition key (see alembic revision 202610191000)
+PARTITIONED_TABLES = {
+    "study_sessions": "started_at",
+    "activity_events": "occurred_at",
+}
+
+# Monthly partitions kept ready ahead of the current month
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# How often long-running API processes re-check (seconds)
+PARTITION_CHECK_INTERVAL = float(os.getenv("PARTITION_CHECK_INTERVAL", str(6 * 3600)))
+
+
+def ensure_partitions(months_ahead: int = PARTITION_MONTHS_AHEAD, target: Engine = engine) -> None:
+    """Create the current and next ``months_ahead`` monthly partitions if missing.
+
+    Idempotent and safe to run concurrently (the SQL function takes an advisory lock).
+    """
+    with target.begin() as conn:
+        for table, column in PARTITIONED_TABLES.items():
+            conn.execute(
+                text("SELECT fuurin_ensure_month_partitions(:t, :c, CAST(now() AT TIME ZONE 'UTC' AS date), :n)"),
+                {"t": table, "c": column, "n": months_ahead},
+            )
+
+
+def main():
+    ensure_partitions()
+    print("Partitions ensured")
+
+
+if __name__ == "__main__":
+    main()
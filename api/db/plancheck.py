@@ -0,0 +1,337 @@
+"""Query-plan regression check for the api_v1 read endpoints.
+
+    python -m db.plancheck            # exit 1 on any violation
+    python -m db.plancheck --verbose  # also print every plan summary
+
+The same check runs under pytest (tests/test_plancheck.py).
+
+1. Calls each endpoint of ``checks()`` in-process and records the SQL it runs
+   (so the statements checked are exactly the ones the handlers build).
+2. In one transaction that is rolled back at the end: bulk-seeds
+   ``PLANCHECK_USERS`` users x ``PLANCHECK_DAYS`` days of sessions, events and
+   reading speeds (rollups are filled by the usual triggers), ANALYZEs, then
+   runs ``EXPLAIN (FORMAT JSON)`` on every recorded statement.
+3. Fails when a large table is read with a sequential scan, an endpoint's
+   expected index is missing from its plans, or a scan of a large table is
+   estimated to return more than ``PLANCHECK_MAX_FRACTION`` of it.
+
+Needs a migrated database with at least one user and one work
+(``python -m db.seed``); nothing is left behind.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import Connection
+
+from db.database import SessionLocal, engine
+from db.models import Users, Works
+from db.partitions import PARTITIONED_TABLES
+from services.reading_speeds import compute_sketches
+
+PLANCHECK_USERS = int(os.getenv("PLANCHECK_USERS", "200"))
+PLANCHECK_DAYS = int(os.getenv("PLANCHECK_DAYS", "365"))
+PLANCHECK_MAX_FRACTION = float(os.getenv("PLANCHECK_MAX_FRACTION", "0.05"))
+# Sequential scans of smaller relations (empty future partitions) are fine
+PLANCHECK_MIN_ROWS = int(os.getenv("PLANCHECK_MIN_ROWS", "1000"))
+
+# Tables that grow with usage: never sequentially scanned by a request
+LARGE_TABLES = {
+    "study_sessions",
+    "activity_events",
+    "reading_speeds",
+    "study_daily_rollups",
+    "study_monthly_rollups",
+    "study_media_rollups",
+    "user_work_stats",
+    "vocab_items",
+    "review_states",
+    "review_logs",
+}
+
+
+@dataclass
+class Check:
+    name: str
+    method: str
+    path: str
+    params: dict[str, Any] = field(default_factory=dict)
+    json: Optional[dict[str, Any]] = None
+    # Index names (parent index for partitioned tables) that must show up in the plans
+    indexes: set[str] = field(default_factory=set)
+    # Call once unrecorded first: periodic rebuilds of in-process caches aren't per-request queries
+    warm_up: bool = False
+
+
+def checks(user_id: str, work_id: str) -> list[Check]:
+    today = date.today()
+    start, end = (today - timedelta(days=90)).isoformat(), today.isoformat()
+    return [
+        # Catalogue and user lookups: small tables (seq scans are fine), but nothing large may be read.
+        # The search's prefix index is rebuilt every WORK_SEARCH_INDEX_TTL from all of user_work_stats
+        Check("works", "GET", "/works"),
+        Check("works search", "GET", "/works/search", {"q": "a1"}, indexes={"ix_works_search_prefix"}, warm_up=True),
+        Check("users", "GET", "/users"),
+        Check("user", "GET", f"/users/{user_id}"),
+        Check("study-sessions", "GET", "/study-sessions", {"user_id": user_id}, indexes={"ix_study_sessions_user_started"}),
+        Check(
+            "study-sessions by work", "GET", "/study-sessions", {"user_id": user_id, "work_id": work_id},
+            indexes={"ix_study_sessions_user_work_started"},
+        ),
+        Check("activity-events", "GET", "/activity-events", {"user_id": user_id}, indexes={"ix_activity_user_occurred"}),
+        Check(
+            "activity-events export", "GET", "/activity-events/export", {"user_id": user_id, "start": start},
+            indexes={"ix_activity_user_occurred"},
+        ),
+        Check("users summary", "GET", f"/users/{user_id}/summary", indexes={"ix_study_sessions_user_started"}),
+        Check(
+            "reading-speeds", "GET", "/reading-speeds", {"user_id": user_id, "work_id": work_id},
+            indexes={"ix_reading_speeds_user_work_measured"},
+        ),
+        Check(
+            "reading-speed trends", "GET", "/reading-speeds/trends", {"user_id": user_id, "work_id": work_id},
+            indexes={"ix_reading_speeds_user_work_measured"},
+        ),
+        Check(
+            "speed percentile", "GET", f"/works/{work_id}/speed-percentile", {"user_id": user_id},
+            indexes={"ix_reading_speeds_user_work_measured"},
+        ),
+        Check("works progress", "GET", "/works/progress", {"user_id": user_id}, indexes={"user_work_stats_pkey"}),
+        Check(
+            "work stats", "GET", f"/works/{work_id}/stats", {"user_id": user_id},
+            indexes={"ix_reading_speeds_user_work_measured"},
+        ),
+        Check(
+            "stats daily", "GET", "/stats/daily", {"user_id": user_id, "start": start, "end": end},
+            indexes={"ix_study_sessions_user_local_day"},
+        ),
+        Check("stats weekly", "GET", "/stats/weekly", {"user_id": user_id}, indexes={"ix_study_sessions_user_local_day"}),
+        Check(
+            "stats media", "GET", "/stats/media", {"user_id": user_id, "start": start, "end": end},
+            indexes={"study_media_rollups_pkey"},
+        ),
+        Check(
+            "stats calendar", "GET", "/stats/calendar", {"user_id": user_id},
+            indexes={"study_daily_rollups_pkey"},
+        ),
+        Check(
+            "stats series", "GET", "/stats/series",
+            {"user_id": user_id, "start": start, "end": end, "granularity": "week"},
+            indexes={"study_daily_rollups_pkey"},
+        ),
+        Check("reviews due", "GET", "/reviews/due", {"user_id": user_id}, indexes={"ix_review_states_user_due"}),
+        Check(
+            "stats batch", "POST", "/stats/batch", json={"user_ids": [user_id], "start": start, "end": end},
+            indexes={"study_daily_rollups_pkey"},
+        ),
+    ]
+
+
+# ---- 1. record the statements ----
+
+def record_statements(items: list[Check]) -> dict[str, list[tuple[str, Any]]]:
+    from fastapi.testclient import TestClient
+
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")  # a dozen aggregates in a row
+    from main import app
+
+    recorded: dict[str, list[tuple[str, Any]]] = {}
+    current: list[str] = []
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if current and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            recorded[current[0]].append((statement, parameters))
+
+    client = TestClient(app)  # no lifespan: no pool warm-up, no background tasks
+    event.listen(engine, "before_cursor_execute", _before)
+    try:
+        for check in items:
+            if check.warm_up:
+                current.clear()
+                client.request(check.method, "/api/v1" + check.path, params=check.params, json=check.json)
+            current[:] = [check.name]
+            recorded[check.name] = []
+            r = client.request(check.method, "/api/v1" + check.path, params=check.params, json=check.json)
+            if r.status_code >= 400:
+                raise SystemExit(f"{check.name}: {check.method} {check.path} answered {r.status_code}: {r.text[:200]}")
+    finally:
+        event.remove(engine, "before_cursor_execute", _before)
+    return recorded
+
+
+# ---- 2. seed (inside the caller's transaction) ----
+
+SEED_SQL = [
+    # created_at in the future: the dev default user (oldest) stays the same
+    """
+    INSERT INTO users (id, email, display_name, timezone, created_at, updated_at)
+    SELECT gen_random_uuid(), 'plancheck-' || g || '@example.com', 'Plan check ' || g, 'Europe/Paris',
+           now() + interval '1 day', now()
+    FROM generate_series(1, :users) g
+    """,
+    """
+    INSERT INTO study_sessions (id, user_id, started_at, ended_at, duration_sec, modality, work_id, words_learned)
+    SELECT gen_random_uuid(), u.id, d, d + interval '30 minutes', 1800,
+           (ARRAY['read', 'listen', 'review'])[1 + (extract(doy FROM d)::int % 3)],
+           (SELECT id FROM works ORDER BY id LIMIT 1), 5
+    FROM users u, generate_series(now() - :days * interval '1 day', now() - interval '1 hour', interval '1 day') d
+    WHERE u.email LIKE 'plancheck-%'
+    """,
+    """
+    INSERT INTO activity_events (id, user_id, occurred_at, type, summary, visibility)
+    SELECT gen_random_uuid(), u.id, d, 'session_logged', 'Plan check', 'private'
+    FROM users u, generate_series(now() - :days * interval '1 day', now() - interval '1 hour', interval '12 hours') d
+    WHERE u.email LIKE 'plancheck-%'
+    """,
+    """
+    INSERT INTO reading_speeds (id, user_id, work_id, measured_at, chars_per_min, method)
+    SELECT gen_random_uuid(), u.id, w.id, d, 150, 'manual'
+    FROM users u, works w, generate_series(now() - :days * interval '1 day', now(), interval '7 days') d
+    WHERE u.email LIKE 'plancheck-%'
+    """,
+    """
+    INSERT INTO vocab_items (id, user_id, term)
+    SELECT gen_random_uuid(), u.id, 'plancheck ' || g
+    FROM users u, generate_series(1, :days) g
+    WHERE u.email LIKE 'plancheck-%'
+    """,
+    # Due dates spread over +/- a year
+    """
+    INSERT INTO review_states (item_id, user_id, due_at, interval_days, reps)
+    SELECT v.id, v.user_id, now() + (random() * 730 - 365) * interval '1 day', 10, 3
+    FROM vocab_items v JOIN users u ON u.id = v.user_id
+    WHERE u.email LIKE 'plancheck-%'
+    """,
+    # A catalogue for /works/search, added last: the statements above read every work
+    """
+    INSERT INTO works (id, title, type, author, created_at, updated_at)
+    SELECT gen_random_uuid(), md5(g::text), 'book', 'Plan check', now(), now()
+    FROM generate_series(1, :users * 25) g
+    """,
+]
+
+
+def seed(conn: Connection, users: int, days: int) -> None:
+    first = date.today() - timedelta(days=days)
+    for table, column in PARTITIONED_TABLES.items():
+        conn.execute(
+            text("SELECT fuurin_ensure_month_partitions(:t, :c, :d, 1)"), {"t": table, "c": column, "d": first}
+        )
+    for sql in SEED_SQL:
+        conn.execute(text(sql), {"users": users, "days": days})
+    compute_sketches(conn)
+    conn.execute(text("ANALYZE"))
+
+
+# ---- 3. explain and check ----
+
+def _nodes(plan: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child)
+
+
+def _parents(conn: Connection) -> dict[str, str]:
+    """Partition / partition index name -> root table / index name."""
+    rows = conn.execute(text("""
+        WITH RECURSIVE tree AS (
+            SELECT inhrelid AS child, inhparent AS root FROM pg_inherits
+            WHERE inhparent NOT IN (SELECT inhrelid FROM pg_inherits)
+            UNION ALL
+            SELECT i.inhrelid, t.root FROM pg_inherits i JOIN tree t ON i.inhparent = t.child
+        )
+        SELECT child::regclass::text, root::regclass::text FROM tree
+    """))
+    return {child: root for child, root in rows}
+
+
+def _relation_rows(conn: Connection) -> dict[str, float]:
+    rows = conn.execute(text("SELECT oid::regclass::text, reltuples FROM pg_class WHERE relkind IN ('r', 'p')"))
+    return {name: max(float(tuples), 0.0) for name, tuples in rows}
+
+
+def explain(conn: Connection, statement: str, parameters: Any) -> dict[str, Any]:
+    result = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    plan = result if isinstance(result, list) else json.loads(result)
+    return plan[0]["Plan"]
+
+
+def check_plans(
+    conn: Connection,
+    items: list[Check],
+    recorded: dict[str, list[tuple[str, Any]]],
+    max_fraction: float = PLANCHECK_MAX_FRACTION,
+    verbose: bool = False,
+) -> list[str]:
+    parents = _parents(conn)
+    rows = _relation_rows(conn)
+    sizes: dict[str, float] = {}  # root table -> rows across partitions
+    for name, n in rows.items():
+        root = parents.get(name, name)
+        sizes[root] = sizes.get(root, 0.0) + n
+    failures: list[str] = []
+    for check in items:
+        used: set[str] = set()
+        for n, (statement, parameters) in enumerate(recorded[check.name]):
+            plan = explain(conn, statement, parameters)
+            where = f"{check.name} [query {n + 1}]"
+            for node in _nodes(plan):
+                if "Index Name" in node:
+                    used.add(parents.get(node["Index Name"], node["Index Name"]))
+                relation = node.get("Relation Name")
+                if relation is None:
+                    continue
+                table = parents.get(relation, relation)
+                if table not in LARGE_TABLES:
+                    continue
+                if node["Node Type"] == "Seq Scan" and rows.get(relation, 0.0) >= PLANCHECK_MIN_ROWS:
+                    failures.append(f"{where}: sequential scan on {relation}")
+                total = sizes.get(table, 0.0)
+                if total and node["Plan Rows"] > max_fraction * total:
+                    failures.append(
+                        f"{where}: {node['Node Type']} on {relation} estimated at {node['Plan Rows']:.0f} "
+                        f"of {total:.0f} rows"
+                    )
+            if verbose:
+                print(f"{where}: {plan['Node Type']}, {plan['Plan Rows']} rows, cost {plan['Total Cost']}")
+        for index in sorted(check.indexes - used):
+            failures.append(f"{check.name}: expected index {index} not used (used: {', '.join(sorted(used)) or 'none'})")
+        if verbose:
+            print(f"{check.name}: {len(recorded[check.name])} queries, indexes {', '.join(sorted(used)) or 'none'}")
+    return failures
+
+
+def main():
+    verbose = "--verbose" in sys.argv[1:]
+    with SessionLocal() as db:
+        user_id = db.execute(select(Users.id).order_by(Users.created_at.asc())).scalar()
+        work_id = db.execute(select(Works.id).order_by(Works.id)).scalar()
+    if not user_id or not work_id:
+        raise SystemExit("Needs a user and a work: run python -m db.seed first")
+
+    items = checks(str(user_id), str(work_id))
+    recorded = record_statements(items)
+    with engine.connect() as conn:
+        conn.begin()
+        try:
+            seed(conn, PLANCHECK_USERS, PLANCHECK_DAYS)
+            failures = check_plans(conn, items, recorded, verbose=verbose)
+        finally:
+            conn.rollback()
+
+    queries = sum(len(v) for v in recorded.values())
+    if failures:
+        print("\n".join(failures))
+        raise SystemExit(f"Plan check failed: {len(failures)} problem(s) in {queries} queries")
+    print(f"Plan check passed: {len(items)} endpoints, {queries} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Routing of read-only requests between the primary and the read replica.
+
+Read handlers take ``get_read_db`` (db/deps.py), which uses the replica
+(``DATABASE_READ_URL``) unless:
+- no replica is configured
+- the user wrote recently: ``mark_write(user_id, response)`` pins that user's
+  reads to the primary for ``DB_READ_YOUR_WRITES_SECONDS``, so a session
+  logged a moment ago shows up immediately. The window is kept in-process and
+  in a cookie, so it also holds when the next request lands on another worker.
+- the replica lags more than ``DB_READ_MAX_LAG`` seconds or is unreachable
+  (checked at most every ``DB_READ_LAG_CHECK_INTERVAL`` seconds)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from core.auth import current_user
+from db.database import ReadSessionLocal, SessionLocal, engine, pool_status, read_engine
+
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+DB_READ_MAX_LAG = float(os.getenv("DB_READ_MAX_LAG", "10"))
+DB_READ_LAG_CHECK_INTERVAL = float(os.getenv("DB_READ_LAG_CHECK_INTERVAL", "5"))
+
+WRITE_COOKIE = "fuurin_rw"
+# Key used for requests without an explicit user_id (dev default user)
+DEFAULT_USER_KEY = ""
+_MAX_TRACKED_USERS = 10_000
+
+_recent_writes: dict[str, float] = {}
+_writes_lock = threading.Lock()
+
+
+def has_replica() -> bool:
+    return read_engine is not engine
+
+
+def mark_write(user_id: Optional[str], response: Optional[Response] = None) -> None:
+    """Pin ``user_id``'s reads to the primary for the read-your-writes window."""
+    if not has_replica():
+        return
+    now = time.monotonic()
+    with _writes_lock:
+        if len(_recent_writes) >= _MAX_TRACKED_USERS:
+            for key in [k for k, until in _recent_writes.items() if until <= now]:
+                del _recent_writes[key]
+        _recent_writes[str(user_id or DEFAULT_USER_KEY)] = now + DB_READ_YOUR_WRITES_SECONDS
+    if response is not None:
+        until = time.time() + DB_READ_YOUR_WRITES_SECONDS
+        response.set_cookie(
+            WRITE_COOKIE, f"{until:.3f}", max_age=int(DB_READ_YOUR_WRITES_SECONDS) + 1, httponly=True, samesite="lax"
+        )
+
+
+def wrote_recently(user_id: Optional[str]) -> bool:
+    until = _recent_writes.get(str(user_id or DEFAULT_USER_KEY))
+    return until is not None and until > time.monotonic()
+
+
+class _LagCheck:
+    """Cached replica lag; one check at a time, at most every ``interval`` seconds."""
+
+    def __init__(self, interval: float = DB_READ_LAG_CHECK_INTERVAL):
+        self.interval = interval
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def usable(self) -> bool:
+        if time.monotonic() - self._checked_at >= self.interval and self._lock.acquire(blocking=False):
+            try:
+                self._check()
+            finally:
+                self._lock.release()
+        return self.error is None and (self.lag is None or self.lag <= DB_READ_MAX_LAG)
+
+    def _check(self) -> None:
+        # An idle standby that has replayed everything it received is not lagging
+        query = text(
+            "SELECT CASE WHEN NOT pg_is_in_recovery() "
+            "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END"
+        )
+        try:
+            with read_engine.connect() as conn:
+                lag = conn.execute(query).scalar()
+            self.lag = float(lag) if lag is not None else None
+            self.error = None
+        except Exception as e:
+            self.error = str(e)
+        self._checked_at = time.monotonic()
+
+
+replica_lag = _LagCheck()
+
+
+def use_replica(request: Request) -> bool:
+    """Decided once per request and kept in ``request.state``: a streaming handler's
+    ``read_session_factory`` reads the same database as its ``get_read_db`` session.
+    """
+    decided = getattr(request.state, "use_replica", None)
+    if decided is None:
+        decided = request.state.use_replica = _decide(request)
+    return decided
+
+
+def _decide(request: Request) -> bool:
+    if not has_replica():
+        return False
+    user_id = request.query_params.get("user_id") or request.path_params.get("user_id") or current_user.get()
+    if wrote_recently(user_id):
+        return False
+    cookie = request.cookies.get(WRITE_COOKIE)
+    if cookie:
+        try:
+            if float(cookie) > time.time():
+                return False
+        except ValueError:
+            pass
+    return replica_lag.usable()
+
+
+def read_session_factory(request: Request) -> sessionmaker:
+    return ReadSessionLocal if use_replica(request) else SessionLocal
+
+
+def replica_status() -> Optional[dict[str, Any]]:
+    """Replica section of /db/health (None without a replica)."""
+    if not has_replica():
+        return None
+    return {
+        "lag_sec": replica_lag.lag,
+        "error": replica_lag.error,
+        "max_lag_sec": DB_READ_MAX_LAG,
+        "pool": pool_status(read_engine),
+    }
@@ -52,6 +52,9 @@ def ensure_seed(session: Session) -> None:
     w1 = Works(id=work1_id, title="Spy x Family", type="manga", created_at=now, updated_at=now)
     w2 = Works(id=work2_id, title="Amakano 2", type="game", created_at=now, updated_at=now)
     session.add_all([w1, w2])
+    # No relationship() links sessions/events to users and works, so the unit of
+    # work can't order these inserts: write the parents first.
+    session.flush()
 
     # Study sessions over the past 10 days
     sessions = []
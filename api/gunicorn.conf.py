@@ -0,0 +1,36 @@
+# Production server settings (APP_ENV=production, see start.sh)
+import os
+
+
+def _cpu_count() -> int:
+    # Respect CPU affinity/cgroup pinning when available
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+worker_class = "uvicorn.workers.UvicornWorker"
+# Async workers: one per core is enough. Each worker owns its own pool
+# (DB_POOL_SIZE + DB_MAX_OVERFLOW), so keep workers * pool under max_connections.
+workers = int(os.getenv("WEB_CONCURRENCY", str(_cpu_count())))
+
+# Import the app once in the master, then fork: faster worker boot, shared pages
+preload_app = True
+
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Never share pooled sockets opened in the master with forked workers
+    from db.database import engine, read_engine
+
+    engine.dispose(close=False)
+    if read_engine is not engine:
+        read_engine.dispose(close=False)
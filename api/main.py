@@ -1,12 +1,92 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-import os
 
-from db.database import engine
+from core import tracing
+from core.compression import CompressionMiddleware
+from core.ratelimit import RateLimitMiddleware
+from db.database import engine, pool_load, pool_status, read_engine, warm_pool
+from db.health import db_health, overall_status
+from db.replica import has_replica, replica_status
+from db.partitions import PARTITION_CHECK_INTERVAL, ensure_partitions
 from routers.api_v1 import router as v1_router
+from routers.api_v1.common import read_flight
+from services.reading_speeds import READING_SPEED_QUANTILES_INTERVAL, refresh_sketches
+from services.write_buffer import write_buffer
+
+logger = logging.getLogger("fuurin")
+
+
+async def _warm_up(app: FastAPI) -> None:
+    # Retry until the pool is warm; /ready stays 503 meanwhile
+    while True:
+        try:
+            opened = await asyncio.to_thread(warm_pool)
+            logger.info("DB pool warm (%d connections)", opened)
+            if has_replica():
+                opened = await asyncio.to_thread(warm_pool, target=read_engine)
+                logger.info("Read replica pool warm (%d connections)", opened)
+            app.state.ready = True
+            return
+        except Exception as e:
+            logger.warning("DB warm-up failed, retrying: %s", e)
+            await asyncio.sleep(2)
+
+
+async def _partition_maintenance() -> None:
+    # Keep future monthly partitions ahead of the clock (idempotent, advisory-locked)
+    while True:
+        await asyncio.sleep(PARTITION_CHECK_INTERVAL)
+        try:
+            await asyncio.to_thread(ensure_partitions)
+        except Exception as e:
+            logger.warning("Partition maintenance failed: %s", e)
+
+
+async def _speed_sketches_refresh() -> None:
+    # Per-work reading speed percentiles; skipped when another worker just did it
+    while True:
+        try:
+            await asyncio.to_thread(refresh_sketches, max_age=READING_SPEED_QUANTILES_INTERVAL * 0.9)
+        except Exception as e:
+            logger.warning("Reading speed sketch refresh failed: %s", e)
+        await asyncio.sleep(READING_SPEED_QUANTILES_INTERVAL)
+
 
-app = FastAPI(title="Fuurin API", version="0.3.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    write_buffer.start()
+    warm_task = asyncio.create_task(_warm_up(app))
+    partitions_task = asyncio.create_task(_partition_maintenance())
+    sketches_task = asyncio.create_task(_speed_sketches_refresh())
+    try:
+        await asyncio.wait_for(asyncio.shield(warm_task), timeout=float(os.getenv("WARMUP_TIMEOUT", "10")))
+    except asyncio.TimeoutError:
+        pass  # keep retrying in the background, not ready yet
+    yield
+    app.state.ready = False
+    warm_task.cancel()
+    partitions_task.cancel()
+    sketches_task.cancel()
+    # Flush buffered writes before the pool goes away
+    await asyncio.to_thread(write_buffer.stop)
+    engine.dispose()
+    if has_replica():
+        read_engine.dispose()
+
+
+app = FastAPI(title="Fuurin API", version="0.3.0", lifespan=lifespan)
+
+# Per-client token buckets (cheap / expensive routes); expensive requests are
+# shed while the pool serving reads is nearly exhausted. Added before CORS so
+# 429/503 answers still carry the CORS headers.
+app.add_middleware(RateLimitMiddleware, pool_load=lambda: pool_load(read_engine), state=app.state)
 
 # CORS for local front
 app.add_middleware(
@@ -15,8 +95,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
+# gzip/br/zstd above COMPRESSION_MIN_SIZE; streamed bodies are compressed per chunk
+app.add_middleware(CompressionMiddleware)
+
+# Local tracing (TRACE_EXPORTER=memory|jsonl); a no-op when unset.
+# Added last so the request span wraps every other middleware.
+tracing.configure_from_env()
+app.add_middleware(tracing.TracingMiddleware)
+
 # Mount versioned API
 app.include_router(v1_router, prefix="/api/v1")
 
@@ -26,14 +115,38 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/ready", tags=["System"]) 
+def ready():
+    # Readiness: 503 until the DB pool has been pre-warmed
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "warming"})
+    return {"status": "ready"}
+
+
 @app.get("/db/health", tags=["System"]) 
-def db_health():
-    try:
-        with engine.connect() as conn:
-            conn.execute("SELECT 1")
-        return {"status": "ok"}
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"status": "error", "detail": str(e)})
+async def db_health_check():
+    # Cached probe (DB_HEALTH_TTL) + pool occupancy: probes can't exhaust the pool
+    db = await db_health.status()
+    pool = pool_status()
+    content = {"status": overall_status(db, pool), "db": db, "pool": pool}
+    replica = replica_status()
+    if replica is not None:
+        content["replica"] = replica
+    if write_buffer.enabled:
+        content["write_buffer"] = write_buffer.status()
+    if db["reachable"] is False:
+        return JSONResponse(status_code=500, content=content)
+    return content
+
+
+@app.get("/metrics", tags=["System"])
+def metrics():
+    # In-process counters (per worker)
+    limiter = getattr(app.state, "ratelimit", None)
+    return {
+        "singleflight": read_flight.status(),
+        "ratelimit": limiter.status() if limiter is not None else None,
+    }
 
 
 @app.get("/version", tags=["System"]) 
@@ -47,6 +160,8 @@ def root():
         "message": "Fuurin API",
         "docs": "/docs",
         "health": "/health",
+        "ready": "/ready",
         "db_health": "/db/health",
+        "metrics": "/metrics",
         "v1": "/api/v1/health",
     })
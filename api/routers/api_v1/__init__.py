@@ -1,20 +1,27 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from .auth import bind_current_user, router as auth_router
 from .health import router as health_router
 from .users import router as users_router
 from .works import router as works_router
 from .study_sessions import router as study_sessions_router
 from .activity_events import router as activity_events_router
 from .stats import router as stats_router
+from .sync import router as sync_router
+from .srs import router as srs_router
 
-router = APIRouter()
+# Every v1 route resolves the bearer token (if any) up front, in-process
+router = APIRouter(dependencies=[Depends(bind_current_user)])
 
 # Compose all entity routers under one v1 router
 router.include_router(health_router)
+router.include_router(auth_router)
 router.include_router(users_router)
 router.include_router(works_router)
 router.include_router(study_sessions_router)
 router.include_router(activity_events_router)
 router.include_router(stats_router)
+router.include_router(sync_router)
+router.include_router(srs_router)
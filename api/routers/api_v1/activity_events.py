@@ -1,30 +1,89 @@
 from __future__ import annotations
 
-from typing import Optional
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Iterator, Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.orm import Session, sessionmaker
 
-from db.deps import get_db
+from db.deps import get_db, get_read_db
 from db.models import ActivityEvents, Works
-from routers.api_v1.common import get_default_user_id
+from db.replica import mark_write, read_session_factory
+from routers.api_v1.common import as_utc, buffered_write, resolve_user_id
 from schemas.activity import ActivityItem, WorkMini
+from schemas.sync import EventCreate, IngestResult
+from services.activity_archive import event_record, iter_archived
+from services.write_buffer import EVENT
 
 router = APIRouter(prefix="")
 
+# A page is first read within this look-back: bounding occurred_at lets the
+# planner prune to the latest monthly partitions, and a typical feed fills
+# from it. A short page is completed by one query for the rest, older rows only.
+FEED_WINDOW = timedelta(days=31)
+
+
+@router.post("/activity-events", tags=["Activity Events"], response_model=IngestResult, status_code=201)
+def create_activity_event(
+    body: EventCreate,
+    response: Response,
+    wait: bool = Query(True, description="Answer once committed (false: once queued in the write buffer)"),
+    db: Session = Depends(get_db),
+):
+    """Record one event (quick actions, high rate) through the write-behind buffer.
+
+    Events with a ``client_key`` are idempotent, like in /sync; they need an
+    explicit ``occurred_at`` (part of the key: a server default would differ
+    on each retry).
+    """
+    if body.client_key and body.occurred_at is None:
+        raise HTTPException(status_code=422, detail="occurred_at is required with client_key")
+    uid = resolve_user_id(db, body.user_id)
+    db.close()  # don't hold a connection while the buffer flushes
+    if not uid:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    event_id = str(uuid.uuid4())
+    status = buffered_write(EVENT, {
+        "id": event_id,
+        "user_id": uid,
+        "client_key": body.client_key,
+        "occurred_at": as_utc(body.occurred_at) if body.occurred_at else datetime.now(timezone.utc),
+        "type": body.type.value,
+        "ref_kind": body.ref_kind,
+        "ref_id": str(body.ref_id) if body.ref_id else None,
+        "summary": body.summary,
+        "metadata": body.metadata,
+        "visibility": body.visibility.value,
+    }, wait)
+    if status == "queued":
+        response.status_code = 202
+    mark_write(uid, response)
+    # A retried client_key keeps the id it was first stored with
+    return IngestResult(status=status, id=None if body.client_key else event_id)
+
 
 @router.get("/activity-events", tags=["Activity Events"], response_model=list[ActivityItem]) 
 def list_activity_events(
     user_id: Optional[str] = None,
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    before: Optional[datetime] = Query(None, description="Only events strictly older than this (pagination cursor)"),
+    include_archive: bool = Query(False, description="Fill from archived months when the table runs out (deep history)"),
+    db: Session = Depends(get_read_db),
 ):
-    uid = user_id or get_default_user_id(db)
+    uid = resolve_user_id(db, user_id)
     if not uid:
         return []
+    before = as_utc(before) if before else None
 
-    events = db.execute(
+    # Cached statement (lambda_stmt): built and compiled once per shape, the
+    # closure values (uid, limit, before, since) are the bound parameters
+    q = lambda_stmt(lambda: (
         select(
             ActivityEvents.id,
             ActivityEvents.occurred_at,
@@ -41,7 +100,17 @@ def list_activity_events(
         .where(ActivityEvents.user_id == uid)
         .order_by(ActivityEvents.occurred_at.desc())
         .limit(limit)
-    ).all()
+    ))
+    if before is not None:
+        q += lambda s: s.where(ActivityEvents.occurred_at < before)
+
+    since = (before or datetime.now(timezone.utc)) - FEED_WINDOW
+    events = db.execute(q + (lambda s: s.where(ActivityEvents.occurred_at >= since))).all()
+    if len(events) < limit:
+        rest = limit - len(events)
+        events += db.execute(
+            q + (lambda s: s.where(ActivityEvents.occurred_at < since).limit(rest))
+        ).all()
 
     items: list[ActivityItem] = []
     for e in events:
@@ -57,4 +126,65 @@ def list_activity_events(
                 work=work,
             )
         )
+    if include_archive and len(items) < limit:
+        oldest = items[-1].occurred_at if items else before
+        items.extend(_archived_items(db, uid, oldest, limit - len(items), {i.id for i in items}))
     return items
+
+
+def _archived_items(db: Session, uid: str, end: Optional[datetime], n: int, seen: set[str]) -> list[ActivityItem]:
+    rows = list(islice((r for r in iter_archived(uid, end=end, newest_first=True) if r["id"] not in seen), n))
+    work_ids = {r["ref_id"] for r in rows if r["ref_kind"] == "work" and r["ref_id"]}
+    works = {}
+    if work_ids:
+        works = {
+            str(w[0]): WorkMini(id=str(w[0]), title=w[1] or "", type=str(w[2]))
+            for w in db.execute(select(Works.id, Works.title, Works.type).where(Works.id.in_(work_ids))).all()
+        }
+    return [
+        ActivityItem(
+            id=r["id"],
+            occurred_at=r["occurred_at"],
+            type=r["type"],
+            summary=r["summary"] or "",
+            work=works.get(r["ref_id"]) if r["ref_kind"] == "work" else None,
+        )
+        for r in rows
+    ]
+
+
+@router.get("/activity-events/export", tags=["Activity Events"])
+def export_activity_events(
+    request: Request,
+    user_id: Optional[str] = None,
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """NDJSON export, oldest first: archived months, then rows still in the table."""
+    uid = resolve_user_id(db, user_id)
+    start = as_utc(start) if start else None
+    end = as_utc(end) if end else None
+    lines = _export_lines(uid, start, end, read_session_factory(request)) if uid else iter(())
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+def _export_lines(
+    uid: str, start: Optional[datetime], end: Optional[datetime], session_factory: sessionmaker
+) -> Iterator[str]:
+    seen: set[str] = set()
+    for r in iter_archived(uid, start=start, end=end):
+        seen.add(r["id"])
+        yield json.dumps({**r, "occurred_at": r["occurred_at"].isoformat()}, ensure_ascii=False) + "\n"
+
+    q = select(ActivityEvents).where(ActivityEvents.user_id == uid).order_by(ActivityEvents.occurred_at)
+    if start is not None:
+        q = q.where(ActivityEvents.occurred_at >= start)
+    if end is not None:
+        q = q.where(ActivityEvents.occurred_at < end)
+    # Own session: the request-scoped one is closed before the body is streamed
+    with session_factory() as db:
+        for row in db.execute(q.execution_options(yield_per=500)).scalars():
+            if str(row.id) in seen:
+                continue
+            yield json.dumps(event_record(row), ensure_ascii=False) + "\n"
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.auth import AUTH_TOKEN_TTL, TokenError, current_user, decode_token, encode_token, hash_password, verify_password
+from db.deps import get_db
+from db.models import Users, UserSettings
+from schemas.auth import LoginRequest, RegisterRequest, TokenResponse, UserProfile
+
+router = APIRouter(prefix="")
+
+
+async def bind_current_user(request: Request) -> Optional[str]:
+    """Router-level dependency: verify the bearer token, if any, and expose its subject.
+
+    No database access. Handlers without an explicit ``user_id`` then act for
+    this user (``get_default_user_id``). An invalid or expired token is a 401
+    rather than a silent fallback to the default user.
+    """
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        uid = decode_token(token.strip())["sub"]
+    except TokenError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+    current_user.set(uid)
+    return uid
+
+
+def require_user() -> str:
+    uid = current_user.get()
+    if uid is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return uid
+
+
+def _profile(user: Users) -> UserProfile:
+    return UserProfile(id=str(user.id), email=user.email, display_name=user.display_name, timezone=user.timezone)
+
+
+def _token(user: Users) -> TokenResponse:
+    return TokenResponse(access_token=encode_token(str(user.id)), expires_in=AUTH_TOKEN_TTL, user=_profile(user))
+
+
+# register / login are async so the password hash is awaited on its pool
+# instead of holding a request thread; their DB work runs in threads.
+
+def _email_taken(db: Session, email: str) -> bool:
+    return db.execute(select(Users.id).where(func.lower(Users.email) == email)).first() is not None
+
+
+def _create_user(db: Session, body: RegisterRequest, email: str, password_hash: str) -> TokenResponse:
+    now = datetime.now(timezone.utc)
+    user = Users(
+        id=str(uuid.uuid4()),
+        email=email,
+        password_hash=password_hash,
+        display_name=body.display_name,
+        timezone=body.timezone,
+        created_at=now,
+        updated_at=now,
+        last_login_at=now,
+    )
+    db.add(user)
+    db.flush()
+    db.add(UserSettings(user_id=user.id))
+    try:
+        db.commit()
+    except IntegrityError:  # concurrent registration of the same address
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Email already registered")
+    # Built here: reading the committed (expired) user reloads it from the DB
+    return _token(user)
+
+
+def _find_user(db: Session, email: str) -> Optional[Users]:
+    return db.execute(select(Users).where(func.lower(Users.email) == email)).scalar_one_or_none()
+
+
+def _record_login(db: Session, user: Users) -> TokenResponse:
+    user.last_login_at = datetime.now(timezone.utc)
+    db.commit()
+    return _token(user)
+
+
+@router.post("/auth/register", tags=["Auth"], response_model=TokenResponse, status_code=201)
+async def register(body: RegisterRequest, db: Session = Depends(get_db)):
+    if body.timezone:
+        try:
+            ZoneInfo(body.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise HTTPException(status_code=422, detail="Unknown timezone")
+    email = body.email.strip().lower()
+    if await asyncio.to_thread(_email_taken, db, email):
+        raise HTTPException(status_code=409, detail="Email already registered")
+
+    password_hash = await hash_password(body.password)
+    return await asyncio.to_thread(_create_user, db, body, email, password_hash)
+
+
+@router.post("/auth/login", tags=["Auth"], response_model=TokenResponse)
+async def login(body: LoginRequest, db: Session = Depends(get_db)):
+    user = await asyncio.to_thread(_find_user, db, body.email.strip().lower())
+    # The hash check runs even for unknown addresses (same timing)
+    if not await verify_password(body.password, user.password_hash if user else None) or user is None:
+        raise HTTPException(status_code=401, detail="Invalid email or password", headers={"WWW-Authenticate": "Bearer"})
+    return await asyncio.to_thread(_record_login, db, user)
+
+
+@router.get("/me", tags=["Auth"], response_model=UserProfile)
+def me(uid: str = Depends(require_user), db: Session = Depends(get_db)):
+    user = db.get(Users, uid)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return _profile(user)
@@ -1,20 +1,164 @@
 from __future__ import annotations
 
-from datetime import date
-from typing import Optional
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Callable, Optional
 
-from sqlalchemy import select
+from fastapi import HTTPException
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from db.models import Users
+from core.auth import current_user
+from core.localtime import as_utc  # noqa: F401 (re-exported for the routers)
+from core.singleflight import SingleFlight
+from core.tracing import span
+from db.models import StudySessions, Users
+from services.write_buffer import BufferFull, CommitTimeout, write_buffer
+
+
+class TTLCache:
+    """Small lock-guarded in-process cache: each entry is kept ``ttl`` seconds.
+
+    At most ``max_keys`` entries: when full, expired entries are dropped, then
+    everything if that wasn't enough.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_keys: int = 10_000):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: dict[Any, tuple[float, Any]] = {}  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return default
+
+    def set(self, key: Any, value: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_keys:
+                expired = [k for k, (at, _) in self._entries.items() if now - at >= self.ttl]
+                for k in expired:
+                    del self._entries[k]
+                if len(self._entries) >= self.max_keys:
+                    self._entries.clear()
+            self._entries[key] = (now, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Dev default user id (one entry); a miss (no user yet) isn't cached
+default_user_cache = TTLCache(ttl=300.0, max_keys=1)
 
 
 def get_default_user_id(db: Session) -> Optional[str]:
-    row = db.execute(select(Users.id).order_by(Users.created_at.asc())).first()
-    return row[0] if row else None
+    """User for requests without an explicit ``user_id``.
+
+    The bearer token's subject when there is one (verified in-process, no
+    query); otherwise the oldest user (dev single-user mode), cached.
+    """
+    uid = current_user.get()
+    if uid is not None:
+        return uid
+    uid = default_user_cache.get("default")
+    if uid is not None:
+        return uid
+    with span("dependency.get_default_user_id"):
+        row = db.execute(lambda_stmt(lambda: select(Users.id).order_by(Users.created_at.asc()).limit(1))).first()
+    uid = str(row[0]) if row else None
+    if uid is not None:
+        default_user_cache.set("default", uid)
+    return uid
+
+
+def resolve_user_id(db: Optional[Session], user_id: Any = None) -> Optional[str]:
+    """User a request acts for: the explicit ``user_id`` (query, body or path)
+    if given, else ``get_default_user_id``.
+
+    With a bearer token, an explicit ``user_id`` other than the token's
+    subject is a 403.
+    """
+    if not user_id:
+        return get_default_user_id(db)
+    uid = str(user_id)
+    sub = current_user.get()
+    if sub is not None and uid != sub:
+        raise HTTPException(status_code=403, detail="user_id does not match the authenticated user")
+    return uid
+
+
+# Concurrent identical reads (several dashboard tabs, retries) share one
+# execution; counters in /metrics
+read_flight = SingleFlight()
+
+
+def shared_read(db: Session, key: tuple, fn: Callable[[], Any]) -> Any:
+    """``fn()``, run once for concurrent callers with the same key on the same engine.
+
+    ``key`` starts with a name for the metrics, then everything the result
+    depends on (user, parameters). The engine is part of the key so a caller
+    pinned to the primary (read-your-writes) never gets a replica result.
+    """
+    return read_flight.do((*key, id(db.get_bind())), fn)
+
+
+# Users.timezone by user id (it rarely changes)
+timezone_cache = TTLCache(ttl=300.0, max_keys=10_000)
+_UNCACHED = object()
+
+
+def get_user_timezone(db: Session, user_id: str) -> Optional[str]:
+    """``Users.timezone`` with a short in-process cache (``timezone_cache``)."""
+    tz = timezone_cache.get(user_id, _UNCACHED)
+    if tz is not _UNCACHED:
+        return tz
+    tz = db.execute(lambda_stmt(lambda: select(Users.timezone).where(Users.id == user_id))).scalar_one_or_none()
+    timezone_cache.set(user_id, tz)
+    return tz
+
+
+def sessions_in_local_days(user_id: str, start: date, end: date, lo: datetime, hi: datetime):
+    """WHERE clause for a user's sessions on local days [start, end).
+
+    Filters on ``local_day`` (indexed with user_id) and adds a conservative
+    ``started_at`` range [lo, hi) = ``utc_bounds(start, end)`` so monthly
+    partitions are still pruned. The bounds are passed in, not computed here,
+    so the clause can be built inside a ``lambda_stmt``.
+    """
+    return (
+        (StudySessions.user_id == user_id)
+        & (StudySessions.local_day >= start)
+        & (StudySessions.local_day < end)
+        & (StudySessions.started_at >= lo)
+        & (StudySessions.started_at < hi)
+    )
 
 
 def minutes(seconds: Optional[int]) -> int:
     if not seconds:
         return 0
     return int(seconds // 60)
+
+
+def buffered_write(kind: str, values: dict, wait: bool) -> str:
+    """Submit one row to the write-behind buffer; returns the ingest status.
+
+    A full buffer or a commit not confirmed in time maps to 503 + Retry-After,
+    a row rejected by the database (unknown work, bad reference) to 422.
+    """
+    try:
+        write_buffer.submit(kind, values, wait=wait)
+    except BufferFull:
+        raise HTTPException(status_code=503, detail="Write buffer full", headers={"Retry-After": "1"})
+    except CommitTimeout:
+        raise HTTPException(status_code=503, detail="Write not confirmed in time", headers={"Retry-After": "1"})
+    except IntegrityError as e:
+        raise HTTPException(status_code=422, detail=str(e.orig).splitlines()[0])
+    return "committed" if wait or not write_buffer.running else "queued"
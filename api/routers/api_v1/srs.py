@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db.deps import get_db, get_read_db
+from db.models import Users
+from db.replica import mark_write
+from routers.api_v1.common import as_utc, resolve_user_id
+from schemas.srs import DueCard, GradeRequest, GradeResult, VocabItemsCreate, VocabItemsResult
+from services import srs
+
+router = APIRouter(prefix="")
+
+
+@router.post("/vocab-items", tags=["SRS"], response_model=VocabItemsResult, status_code=201)
+def create_vocab_items(body: VocabItemsCreate, response: Response, db: Session = Depends(get_db)):
+    """Add cards in bulk, due immediately. Re-adding an existing (term, reading) is a no-op."""
+    uid = resolve_user_id(db, body.user_id)
+    if not uid or (body.user_id and db.get(Users, uid) is None):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    items = {}
+    for item in body.items:
+        reading = (item.reading or "").strip()
+        items.setdefault((item.term.strip(), reading), {
+            "term": item.term.strip(),
+            "reading": reading,
+            "meaning": item.meaning,
+            "work_id": str(item.work_id) if item.work_id else None,
+        })
+    try:
+        ids = dict(zip(items, srs.add_items(db, uid, list(items.values()), datetime.now(timezone.utc))))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=422, detail="Unknown work_id")
+    result = [ids[(i.term.strip(), (i.reading or "").strip())] for i in body.items]
+    created = len({i for i in result if i})
+    if created:
+        mark_write(uid, response)
+    return VocabItemsResult(ids=result, created=created)
+
+
+@router.get("/reviews/due", tags=["SRS"], response_model=list[DueCard])
+def due_reviews(
+    user_id: Optional[str] = None,
+    at: Optional[datetime] = Query(None, description="Due up to this time (default: now)"),
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_read_db),
+):
+    uid = resolve_user_id(db, user_id)
+    if not uid:
+        return []
+    return srs.due_cards(db, uid, as_utc(at) if at else datetime.now(timezone.utc), limit)
+
+
+@router.post("/reviews/grade", tags=["SRS"], response_model=GradeResult)
+def grade_reviews(body: GradeRequest, response: Response, db: Session = Depends(get_db)):
+    """Grade many cards at once (one statement); each grade runs one SM-2 step.
+
+    Grades for unknown cards, other users' cards or older than the card's
+    last review (retries) are skipped.
+    """
+    uid = resolve_user_id(db, body.user_id)
+    if not uid:
+        raise HTTPException(status_code=404, detail="User not found")
+    item_ids = [str(g.item_id) for g in body.grades]
+    if len(set(item_ids)) != len(item_ids):
+        raise HTTPException(status_code=422, detail="A card can be graded once per request")
+
+    now = datetime.now(timezone.utc)
+    cards = srs.grade(db, uid, [
+        (item_id, g.grade, min(as_utc(g.reviewed_at), now) if g.reviewed_at else now)
+        for item_id, g in zip(item_ids, body.grades)
+    ])
+    db.commit()
+    if cards:
+        mark_write(uid, response)
+    return GradeResult(skipped=len(body.grades) - len(cards), cards=cards)
@@ -1,51 +1,98 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
-from typing import Optional
+import enum
+import json
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from typing import Any, Iterator, Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, func
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Date, Integer, and_, cast, func, lambda_stmt, literal_column, select, true, type_coerce
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Session, sessionmaker
 
-from db.deps import get_db
-from db.models import StudySessions
-from routers.api_v1.common import get_default_user_id, minutes
+from db.deps import get_read_db
+from db.models import Modality, StudyDailyRollups, StudyMediaRollups, StudyMonthlyRollups, StudySessions, WorkType
+from db.replica import read_session_factory
+from core import calendar_stats, heatmap
+from core.localtime import today_for, utc_bounds
+from routers.api_v1.common import get_user_timezone, minutes, resolve_user_id, sessions_in_local_days, shared_read
+from schemas.stats import BatchStatsRequest
 
 router = APIRouter(prefix="")
 
+# Longest range served in the packed heatmap formats (~20 years)
+MAX_PACKED_DAYS = 366 * 20
+
 
 @router.get("/stats/daily", tags=["Stats"]) 
 def stats_daily(
+    request: Request,
+    response: Response,
     user_id: Optional[str] = None,
     start: Optional[date] = Query(None),
     end: Optional[date] = Query(None),
-    db: Session = Depends(get_db),
+    format: Optional[str] = Query(
+        None,
+        pattern="^(json|base64|binary)$",
+        description="base64/binary: dense uint16le minutes per day from start (also via Accept: application/octet-stream)",
+    ),
+    db: Session = Depends(get_read_db),
 ):
-    uid = user_id or get_default_user_id(db)
-    if not uid:
+    uid = resolve_user_id(db, user_id)
+    response.headers["Vary"] = "Accept"
+    if format is None and "application/octet-stream" in request.headers.get("accept", ""):
+        format = "binary"
+    packed = format in ("base64", "binary")
+    if not uid and not packed:
         return {"minutes_by_date": {}, "words_by_date": {}}
 
+    # Days are the user's local days (study_sessions.local_day)
     if not end:
-        end = date.today() + timedelta(days=1)
+        end = today_for(get_user_timezone(db, uid) if uid else None) + timedelta(days=1)
     if not start:
         start = end - timedelta(days=365)
 
-    rows = db.execute(
-        select(
-            func.date_trunc('day', StudySessions.started_at).label('d'),
-            func.sum(StudySessions.duration_sec).label('sec'),
-            func.sum(func.coalesce(StudySessions.words_learned, 0)).label('words'),
-        )
-        .where(
-            (StudySessions.user_id == uid)
-            & (StudySessions.started_at >= start)
-            & (StudySessions.started_at < end)
-        )
-        .group_by('d')
-    ).all()
+    rows = []
+    if uid:
+        lo, hi = utc_bounds(start, end)
+        rows = shared_read(db, ("stats.daily", uid, start, end), lambda: db.execute(lambda_stmt(lambda: (
+            select(
+                StudySessions.local_day,
+                func.sum(StudySessions.duration_sec).label('sec'),
+                func.sum(func.coalesce(StudySessions.words_learned, 0)).label('words'),
+            )
+            .where(sessions_in_local_days(uid, start, end, lo, hi))
+            .group_by(StudySessions.local_day)
+        ))).all())
+
+    if packed:
+        days = max((end - start).days, 0)
+        if days > MAX_PACKED_DAYS:
+            raise HTTPException(status_code=400, detail=f"Range too long (max {MAX_PACKED_DAYS} days)")
+        minutes_by_day = {r[0]: minutes(int(r[1] or 0)) for r in rows}
+        if format == "binary":
+            return Response(
+                content=heatmap.pack(start, days, minutes_by_day),
+                media_type="application/octet-stream",
+                headers={
+                    "X-Heatmap-Start": start.isoformat(),
+                    "X-Heatmap-Days": str(days),
+                    "X-Heatmap-Encoding": heatmap.ENCODING,
+                    "Vary": "Accept",
+                },
+            )
+        return {
+            "start": start.isoformat(),
+            "days": days,
+            "encoding": heatmap.ENCODING,
+            "minutes": heatmap.pack_b64(start, days, minutes_by_day),
+            "words": heatmap.pack_b64(start, days, {r[0]: int(r[2] or 0) for r in rows}),
+        }
 
-    minutes_by_date = {r[0].date().isoformat(): minutes(int(r[1] or 0)) for r in rows}
-    words_by_date = {r[0].date().isoformat(): int(r[2] or 0) for r in rows}
+    minutes_by_date = {r[0].isoformat(): minutes(int(r[1] or 0)) for r in rows}
+    words_by_date = {r[0].isoformat(): int(r[2] or 0) for r in rows}
     return {"minutes_by_date": minutes_by_date, "words_by_date": words_by_date}
 
 
@@ -53,10 +100,12 @@ def stats_daily(
 def stats_weekly(
     user_id: Optional[str] = None,
     week: Optional[str] = Query(None, pattern=r"^\d{4}-W\d{2}$"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
+    uid = resolve_user_id(db, user_id)
     if not week:
-        today = date.today()
+        # Current ISO week in the user's timezone
+        today = today_for(get_user_timezone(db, uid) if uid else None)
         iso_year, iso_week, _ = today.isocalendar()
         week = f"{iso_year}-W{iso_week:02d}"
     year = int(week[:4])
@@ -66,22 +115,334 @@ def stats_weekly(
     week_start = jan4_monday + timedelta(weeks=wnum - 1)
     week_end = week_start + timedelta(days=7)
 
-    uid = user_id or get_default_user_id(db)
     if not uid:
         return {"week": week, "minutes": [0] * 7}
 
-    rows = db.execute(
-        select(
-            func.date_trunc('day', StudySessions.started_at).label('d'),
-            func.sum(StudySessions.duration_sec).label('sec')
-        )
-        .where((StudySessions.user_id == uid) & (StudySessions.started_at >= week_start) & (StudySessions.started_at < week_end))
-        .group_by('d')
-    ).all()
+    lo, hi = utc_bounds(week_start, week_end)
+    rows = shared_read(db, ("stats.weekly", uid, week_start), lambda: db.execute(lambda_stmt(lambda: (
+        select(StudySessions.local_day, func.sum(StudySessions.duration_sec).label('sec'))
+        .where(sessions_in_local_days(uid, week_start, week_end, lo, hi))
+        .group_by(StudySessions.local_day)
+    ))).all())
 
-    by_day = {r[0].date(): minutes(int(r[1] or 0)) for r in rows}
+    by_day = {r[0]: minutes(int(r[1] or 0)) for r in rows}
     minutes_series = []
     for i in range(7):
         d = week_start + timedelta(days=i)
         minutes_series.append(by_day.get(d, 0))
     return {"week": week, "minutes": minutes_series}
+
+
+@router.get("/stats/media", tags=["Stats"])
+def stats_media(
+    user_id: Optional[str] = None,
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Study time split by work type (books, manga, games, anime...) over local days [start, end).
+
+    One range read of ``study_media_rollups`` on its (user_id, day, work_type) key.
+    """
+    uid = resolve_user_id(db, user_id)
+    if not end:
+        end = today_for(get_user_timezone(db, uid) if uid else None) + timedelta(days=1)
+    if not start:
+        start = end - timedelta(days=365)
+    by_type = {}
+    if uid:
+        rows = db.execute(
+            select(
+                StudyMediaRollups.work_type,
+                func.sum(StudyMediaRollups.seconds),
+                func.sum(StudyMediaRollups.words),
+                func.sum(StudyMediaRollups.sessions),
+            )
+            .where(
+                StudyMediaRollups.user_id == uid,
+                StudyMediaRollups.day >= start,
+                StudyMediaRollups.day < end,
+            )
+            .group_by(StudyMediaRollups.work_type)
+        ).all()
+        by_type = {r[0]: (int(r[1] or 0), int(r[2] or 0), int(r[3] or 0)) for r in rows}
+
+    total_sec = sum(v[0] for v in by_type.values())
+    items = []
+    for t in WorkType:
+        sec, words, sessions = by_type.get(t.value, (0, 0, 0))
+        items.append({
+            "type": t.value,
+            "minutes": minutes(sec),
+            "words": words,
+            "sessions": sessions,
+            "share": round(sec / total_sec, 4) if total_sec else 0.0,
+        })
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "total_minutes": minutes(total_sec),
+        "items": items,
+    }
+
+
+@router.get("/stats/calendar", tags=["Stats"])
+def stats_calendar(
+    user_id: Optional[str] = None,
+    start: Optional[date] = Query(None, description="First local day (default: first active day)"),
+    end: Optional[date] = Query(None, description="Exclusive end local day (default: tomorrow)"),
+    min_streak: int = Query(2, ge=1, description="Shortest streak listed in the history"),
+    limit: int = Query(20, ge=0, le=500, description="Streaks listed, most recent first"),
+    db: Session = Depends(get_read_db),
+):
+    """Streaks (current, longest, history), active-day ratio and weekday distribution over local days [start, end).
+
+    The daily totals are read once from ``study_daily_rollups`` as two int
+    arrays; the metrics are vectorized over the dense series (core.calendar_stats).
+    """
+    uid = resolve_user_id(db, user_id)
+    if not end:
+        end = today_for(get_user_timezone(db, uid) if uid else None) + timedelta(days=1)
+
+    day_numbers, seconds = [], []
+    if uid:
+        cond = (StudyDailyRollups.user_id == uid) & (StudyDailyRollups.day < end)
+        if start:
+            cond = cond & (StudyDailyRollups.day >= start)
+        day_no = type_coerce(StudyDailyRollups.day - literal_column("DATE '1970-01-01'"), Integer)
+        per_day = (
+            select(day_no.label("d"), func.sum(StudyDailyRollups.seconds).label("s"))
+            .where(cond)
+            .group_by(StudyDailyRollups.day)
+            # Rollup rows can drop to 0 when sessions are deleted
+            .having(func.sum(StudyDailyRollups.seconds) > 0)
+            .subquery()
+        )
+        row = shared_read(db, ("stats.calendar", uid, start, end), lambda: db.execute(
+            select(func.array_agg(per_day.c.d), func.array_agg(per_day.c.s))
+        ).one())
+        day_numbers, seconds = row[0] or [], row[1] or []
+
+    if not start:
+        start = calendar_stats.EPOCH + timedelta(days=min(day_numbers)) if day_numbers else end - timedelta(days=1)
+    days = (end - start).days
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if days > MAX_PACKED_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range too long (max {MAX_PACKED_DAYS} days)")
+    series = calendar_stats.dense(start, days, day_numbers, seconds)
+    return calendar_stats.calendar_stats(start, series, min_streak=min_streak, limit=limit)
+
+
+@router.post("/stats/batch", tags=["Stats"])
+def stats_batch(body: BatchStatsRequest, request: Request):
+    """Daily/weekly/summary metrics for many users at once, as NDJSON (one line per user).
+
+    All users are served by one grouped query over ``study_daily_rollups``,
+    streamed in user_id order. Days are each user's local days; the default
+    range is the last 30 days up to today (UTC).
+    """
+    end = body.end or datetime.now(timezone.utc).date() + timedelta(days=1)
+    start = body.start or end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    # UUID text order matches Postgres uuid order, so the result can be merged in one pass
+    user_ids = sorted({resolve_user_id(None, u) for u in body.user_ids})
+    lines = _batch_lines(user_ids, start, end, body.daily, body.weekly, read_session_factory(request))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+def _batch_lines(
+    user_ids: list[str], start: date, end: date, daily: bool, weekly: bool, session_factory: sessionmaker
+) -> Iterator[str]:
+    q = (
+        select(
+            StudyDailyRollups.user_id,
+            StudyDailyRollups.day,
+            func.sum(StudyDailyRollups.seconds),
+            func.sum(StudyDailyRollups.words),
+            func.sum(StudyDailyRollups.sessions),
+        )
+        .where(
+            StudyDailyRollups.user_id.in_(user_ids),
+            StudyDailyRollups.day >= start,
+            StudyDailyRollups.day < end,
+        )
+        .group_by(StudyDailyRollups.user_id, StudyDailyRollups.day)
+        .order_by(StudyDailyRollups.user_id, StudyDailyRollups.day)
+    )
+    # Own session: the body is streamed after the request scope has ended
+    with session_factory() as db:
+        groups = groupby(db.execute(q.execution_options(yield_per=1000)), key=lambda r: str(r[0]))
+        current = next(groups, None)
+        for uid in user_ids:
+            days = []
+            if current is not None and current[0] == uid:
+                days = list(current[1])
+                current = next(groups, None)
+            record = _batch_record(uid, start, end, days, daily, weekly)
+            yield json.dumps(record) + "\n"
+
+
+def _batch_record(uid: str, start: date, end: date, days: list[Any], daily: bool, weekly: bool) -> dict[str, Any]:
+    seconds = sum(int(r[2]) for r in days)
+    record: dict[str, Any] = {
+        "user_id": uid,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "summary": {
+            "minutes": minutes(seconds),
+            "words": sum(int(r[3]) for r in days),
+            "sessions": sum(int(r[4]) for r in days),
+            "active_days": sum(1 for r in days if r[4] > 0),
+        },
+    }
+    if daily:
+        record["minutes_by_date"] = {r[1].isoformat(): minutes(int(r[2])) for r in days if r[2]}
+    if weekly:
+        by_week: dict[str, int] = {}
+        for r in days:
+            iso_year, iso_week, _ = r[1].isocalendar()
+            key = f"{iso_year}-W{iso_week:02d}"
+            by_week[key] = by_week.get(key, 0) + int(r[2])
+        record["minutes_by_week"] = {k: minutes(v) for k, v in by_week.items() if v}
+    return record
+
+
+class Granularity(str, enum.Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+    year = "year"
+
+
+class SeriesMetric(str, enum.Enum):
+    minutes = "minutes"
+    words = "words"
+    sessions = "sessions"
+
+
+# granularity -> (generate_series step, default number of buckets)
+_SERIES_STEPS = {
+    Granularity.day: ("interval '1 day'", 365),
+    Granularity.week: ("interval '1 week'", 52),
+    Granularity.month: ("interval '1 month'", 24),
+    Granularity.year: ("interval '1 year'", 5),
+}
+MAX_SERIES_BUCKETS = 4000
+
+
+def _bucket_start(d: date, g: Granularity) -> date:
+    if g is Granularity.week:
+        return d - timedelta(days=d.weekday())
+    if g is Granularity.month:
+        return d.replace(day=1)
+    if g is Granularity.year:
+        return d.replace(month=1, day=1)
+    return d
+
+
+def _shift(d: date, g: Granularity, n: int) -> date:
+    """Bucket start ``n`` buckets after (or before) the bucket start ``d``."""
+    if g is Granularity.day:
+        return d + timedelta(days=n)
+    if g is Granularity.week:
+        return d + timedelta(weeks=n)
+    months = d.year * 12 + d.month - 1 + (n * 12 if g is Granularity.year else n)
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def _bucket_count(first: date, last: date, g: Granularity) -> int:
+    if g is Granularity.day:
+        return (last - first).days + 1
+    if g is Granularity.week:
+        return (last - first).days // 7 + 1
+    months = (last.year - first.year) * 12 + last.month - first.month
+    return (months // 12 if g is Granularity.year else months) + 1
+
+
+@router.get("/stats/series", tags=["Stats"])
+def stats_series(
+    user_id: Optional[str] = None,
+    granularity: Granularity = Query(Granularity.day),
+    metric: SeriesMetric = Query(SeriesMetric.minutes),
+    start: Optional[date] = Query(None, description="First local day (aligned down to its bucket)"),
+    end: Optional[date] = Query(None, description="Exclusive end local day (aligned up to its bucket)"),
+    modality: Optional[Modality] = Query(None),
+    by_modality: bool = Query(False, description="One zero-filled series per modality"),
+    db: Session = Depends(get_read_db),
+):
+    """Zero-filled time series of one metric, served from the study rollups.
+
+    Day/week buckets read ``study_daily_rollups``; month/year buckets read
+    ``study_monthly_rollups`` (a 5-year monthly chart reads ~60 rows per modality).
+    """
+    g = granularity
+    step, default_buckets = _SERIES_STEPS[g]
+    uid = resolve_user_id(db, user_id)
+    if not end:
+        end = today_for(get_user_timezone(db, uid) if uid else None) + timedelta(days=1)
+    last = _bucket_start(end - timedelta(days=1), g)
+    first = _bucket_start(start, g) if start else _shift(last, g, 1 - default_buckets)
+    if first > last:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if _bucket_count(first, last, g) > MAX_SERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Too many buckets (max {MAX_SERIES_BUCKETS})")
+    upper = _shift(last, g, 1)
+
+    result = {
+        "granularity": g.value,
+        "metric": metric.value,
+        "start": first.isoformat(),
+        "end": upper.isoformat(),
+    }
+    if not uid:
+        return {**result, "buckets": [], "values": []}
+
+    if g in (Granularity.day, Granularity.week):
+        src, src_day = StudyDailyRollups, StudyDailyRollups.day
+    else:
+        src, src_day = StudyMonthlyRollups, StudyMonthlyRollups.month
+    value = {
+        SeriesMetric.minutes: func.sum(src.seconds) / 60,
+        SeriesMetric.words: func.sum(src.words),
+        SeriesMetric.sessions: func.sum(src.sessions),
+    }[metric]
+
+    bucket = cast(func.date_trunc(g.value, src_day), Date)
+    cond = (src.user_id == uid) & (src_day >= first) & (src_day < upper)
+    if modality:
+        cond = cond & (src.modality == modality.value)
+    group_cols = [bucket.label("b")] + ([src.modality.label("m")] if by_modality else [])
+    agg = select(*group_cols, value.label("v")).where(cond).group_by(*group_cols).subquery()
+
+    # Zero-fill in SQL: every bucket (x every modality) appears once
+    buckets = select(
+        cast(func.generate_series(first, last, literal_column(step)), Date).label("b")
+    ).subquery()
+    if by_modality:
+        mods = [modality.value] if modality else [m.value for m in Modality]
+        mod_list = select(func.unnest(array(mods)).label("m")).subquery()
+        q = (
+            select(buckets.c.b, mod_list.c.m, func.coalesce(agg.c.v, 0))
+            .select_from(buckets.join(mod_list, true()))
+            .outerjoin(agg, and_(agg.c.b == buckets.c.b, agg.c.m == mod_list.c.m))
+            .order_by(buckets.c.b, mod_list.c.m)
+        )
+        rows = db.execute(q).all()
+        series: dict[str, list[int]] = {m: [] for m in mods}
+        labels: list[str] = []
+        for b, m, v in rows:
+            if not labels or labels[-1] != b.isoformat():
+                labels.append(b.isoformat())
+            series[m].append(int(v))
+        return {**result, "buckets": labels, "series": series}
+
+    q = (
+        select(buckets.c.b, func.coalesce(agg.c.v, 0))
+        .select_from(buckets)
+        .outerjoin(agg, agg.c.b == buckets.c.b)
+        .order_by(buckets.c.b)
+    )
+    rows = db.execute(q).all()
+    return {**result, "buckets": [r[0].isoformat() for r in rows], "values": [int(r[1]) for r in rows]}
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
+import uuid
+from datetime import datetime, timezone
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.orm import Session
 
-from db.deps import get_db
+from db.deps import get_db, get_read_db
 from db.models import StudySessions
-from routers.api_v1.common import get_default_user_id
+from db.replica import mark_write
+from routers.api_v1.common import as_utc, buffered_write, resolve_user_id
+from schemas.sync import IngestResult, SessionHeartbeat
+from services.write_buffer import HEARTBEAT
 
 router = APIRouter(prefix="")
 
@@ -18,23 +23,23 @@ def list_study_sessions(
     user_id: Optional[str] = None,
     work_id: Optional[str] = None,
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    uid = user_id or get_default_user_id(db)
+    uid = resolve_user_id(db, user_id)
     if not uid:
         return []
 
-    q = select(
+    q = lambda_stmt(lambda: select(
         StudySessions.id,
         StudySessions.started_at,
         StudySessions.ended_at,
         StudySessions.duration_sec,
         StudySessions.modality,
         StudySessions.work_id,
-    ).where(StudySessions.user_id == uid)
+    ).where(StudySessions.user_id == uid))
     if work_id:
-        q = q.where(StudySessions.work_id == work_id)
-    q = q.order_by(StudySessions.started_at.desc()).limit(limit)
+        q += lambda s: s.where(StudySessions.work_id == work_id)
+    q += lambda s: s.order_by(StudySessions.started_at.desc()).limit(limit)
     rows = db.execute(q).all()
     return [
         {
@@ -47,3 +52,41 @@ def list_study_sessions(
         }
         for r in rows
     ]
+
+
+@router.post("/study-sessions/heartbeat", tags=["Study Sessions"], response_model=IngestResult, status_code=201)
+def study_session_heartbeat(
+    body: SessionHeartbeat,
+    response: Response,
+    wait: bool = Query(True, description="Answer once committed (false: once queued in the write buffer)"),
+    db: Session = Depends(get_db),
+):
+    """Create or extend the session (user, client_key, started_at) up to ``at``.
+
+    Heartbeats go through the write-behind buffer; ended_at only moves forward,
+    so late or repeated heartbeats are harmless.
+    """
+    uid = resolve_user_id(db, body.user_id)
+    db.close()  # don't hold a connection while the buffer flushes
+    if not uid:
+        raise HTTPException(status_code=404, detail="User not found")
+    started = as_utc(body.started_at)
+    at = as_utc(body.at) if body.at else datetime.now(timezone.utc)
+    if at < started:
+        raise HTTPException(status_code=422, detail="at before started_at")
+
+    status = buffered_write(HEARTBEAT, {
+        "id": str(uuid.uuid4()),
+        "user_id": uid,
+        "client_key": body.client_key,
+        "started_at": started,
+        "ended_at": at,
+        "duration_sec": int((at - started).total_seconds()),
+        "modality": body.modality.value,
+        "work_id": str(body.work_id) if body.work_id else None,
+        "work_segment_id": str(body.work_segment_id) if body.work_segment_id else None,
+    }, wait)
+    if status == "queued":
+        response.status_code = 202
+    mark_write(uid, response)
+    return IngestResult(status=status)
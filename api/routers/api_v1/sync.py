@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import Table, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from db.deps import get_db
+from db.models import ActivityEvents, StudySessions, Users, Works, WorkSegments
+from db.replica import mark_write
+from routers.api_v1.common import as_utc, resolve_user_id
+from schemas.sync import SyncEvent, SyncItemResult, SyncRequest, SyncResponse, SyncSession
+
+router = APIRouter(prefix="")
+
+
+@router.post("/sync", tags=["Sync"], response_model=SyncResponse, response_model_exclude_none=True)
+def sync(body: SyncRequest, response: Response, db: Session = Depends(get_db)):
+    """Idempotent batch upload of offline-logged sessions and events.
+
+    Every item carries a client-generated ``client_key``; a retried batch
+    inserts nothing new and reports the already stored items as ``duplicate``.
+    One bulk ``INSERT ... ON CONFLICT DO NOTHING`` per kind, plus one lookup
+    when there are duplicates.
+    """
+    uid = resolve_user_id(db, body.user_id)
+    if not uid or (body.user_id and db.get(Users, uid) is None):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    sessions = _sync_sessions(db, uid, body.sessions)
+    events = _sync_events(db, uid, body.events)
+    db.commit()
+    if any(r.status == "created" for r in sessions + events):
+        mark_write(uid, response)
+    return SyncResponse(sessions=sessions, events=events)
+
+
+def _sync_sessions(db: Session, uid: str, items: list[SyncSession]) -> list[SyncItemResult]:
+    if not items:
+        return []
+    work_ids = {str(i.work_id) for i in items if i.work_id}
+    segment_ids = {str(i.work_segment_id) for i in items if i.work_segment_id}
+    works = set(db.execute(select(Works.id).where(Works.id.in_(work_ids))).scalars()) if work_ids else set()
+    segments = dict(
+        db.execute(select(WorkSegments.id, WorkSegments.work_id).where(WorkSegments.id.in_(segment_ids))).all()
+    ) if segment_ids else {}
+
+    results: list[Optional[SyncItemResult]] = []
+    rows: list[tuple[int, dict[str, Any]]] = []
+    for n, item in enumerate(items):
+        started, ended = as_utc(item.started_at), as_utc(item.ended_at)
+        work_id = str(item.work_id) if item.work_id else None
+        segment_id = str(item.work_segment_id) if item.work_segment_id else None
+        error = None
+        if ended < started:
+            error = "ended_at before started_at"
+        elif work_id and work_id not in works:
+            error = "unknown work_id"
+        elif segment_id and (segment_id not in segments or (work_id and segments[segment_id] != work_id)):
+            error = "unknown work_segment_id"
+        if error:
+            results.append(SyncItemResult(client_key=item.client_key, status="invalid", error=error))
+            continue
+        results.append(None)
+        rows.append((n, {
+            "id": str(uuid.uuid4()),
+            "user_id": uid,
+            "client_key": item.client_key,
+            "started_at": started,
+            "ended_at": ended,
+            "duration_sec": item.duration_sec if item.duration_sec is not None else int((ended - started).total_seconds()),
+            "modality": item.modality.value,
+            "work_id": work_id,
+            "work_segment_id": segment_id,
+            "words_reviewed": item.words_reviewed,
+            "words_learned": item.words_learned,
+            "notes": item.notes,
+        }))
+    _insert_idempotent(db, StudySessions.__table__, "started_at", uid, rows, results)
+    return results
+
+
+def _sync_events(db: Session, uid: str, items: list[SyncEvent]) -> list[SyncItemResult]:
+    results: list[Optional[SyncItemResult]] = [None] * len(items)
+    rows = [
+        (n, {
+            "id": str(uuid.uuid4()),
+            "user_id": uid,
+            "client_key": item.client_key,
+            "occurred_at": as_utc(item.occurred_at),
+            "type": item.type.value,
+            "ref_kind": item.ref_kind,
+            "ref_id": str(item.ref_id) if item.ref_id else None,
+            "summary": item.summary,
+            "metadata": item.metadata,
+            "visibility": item.visibility.value,
+        })
+        for n, item in enumerate(items)
+    ]
+    _insert_idempotent(db, ActivityEvents.__table__, "occurred_at", uid, rows, results)
+    return results
+
+
+def _insert_idempotent(
+    db: Session,
+    table: Table,
+    ts_col: str,
+    uid: str,
+    rows: list[tuple[int, dict[str, Any]]],
+    results: list[Optional[SyncItemResult]],
+) -> None:
+    """Bulk insert ``rows`` (input position, values), filling ``results`` in place.
+
+    The conflict target is the (user_id, client_key, <partition key>) unique
+    index; existing rows are skipped and looked up afterwards for their ids.
+    """
+    if not rows:
+        return
+    ts = table.c[ts_col]
+    stmt = (
+        insert(table)
+        .values([values for _, values in rows])
+        .on_conflict_do_nothing(index_elements=["user_id", "client_key", ts_col])
+        .returning(table.c.id, table.c.client_key, ts)
+    )
+    created = {(r[1], r[2]): str(r[0]) for r in db.execute(stmt)}
+
+    pending = []
+    for n, values in rows:
+        key = (values["client_key"], values[ts_col])
+        row_id = created.pop(key, None)  # pop: a key repeated within the batch is a duplicate
+        if row_id:
+            results[n] = SyncItemResult(client_key=values["client_key"], status="created", id=row_id)
+        else:
+            pending.append((n, key))
+    if not pending:
+        return
+
+    stamps = [key[1] for _, key in pending]
+    existing = {
+        (r[1], r[2]): str(r[0])
+        for r in db.execute(
+            select(table.c.id, table.c.client_key, ts).where(
+                table.c.user_id == uid,
+                table.c.client_key.in_({key[0] for _, key in pending}),
+                ts >= min(stamps),
+                ts <= max(stamps),
+            )
+        )
+    }
+    for n, key in pending:
+        results[n] = SyncItemResult(client_key=key[0], status="duplicate", id=existing.get(key))
@@ -4,19 +4,20 @@ from datetime import datetime, timedelta, date
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func
+from sqlalchemy import func, lambda_stmt, select
 from sqlalchemy.orm import Session
 
-from db.deps import get_db
+from core.localtime import today_for
+from db.deps import get_read_db
 from db.models import Users, StudySessions
-from routers.api_v1.common import minutes
+from routers.api_v1.common import get_user_timezone, minutes, resolve_user_id, shared_read
 from schemas.summary import MeSummary
 
 router = APIRouter(prefix="")
 
 
 @router.get("/users", tags=["Users"]) 
-def list_users(limit: int = Query(50, ge=1, le=200), db: Session = Depends(get_db)):
+def list_users(limit: int = Query(50, ge=1, le=200), db: Session = Depends(get_read_db)):
     rows = db.execute(
         select(Users.id, Users.display_name, Users.email).order_by(Users.created_at.asc()).limit(limit)
     ).all()
@@ -24,7 +25,8 @@ def list_users(limit: int = Query(50, ge=1, le=200), db: Session = Depends(get_d
 
 
 @router.get("/users/{user_id}", tags=["Users"]) 
-def get_user(user_id: str, db: Session = Depends(get_db)):
+def get_user(user_id: str, db: Session = Depends(get_read_db)):
+    user_id = resolve_user_id(db, user_id)
     row = db.execute(select(Users.id, Users.display_name, Users.email, Users.timezone).where(Users.id == user_id)).first()
     if not row:
         raise HTTPException(status_code=404, detail="User not found")
@@ -32,25 +34,36 @@ def get_user(user_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/users/{user_id}/summary", response_model=MeSummary, tags=["Users"]) 
-def user_summary(user_id: str, db: Session = Depends(get_db)):
-    total_words = db.execute(
+def user_summary(user_id: str, db: Session = Depends(get_read_db)):
+    user_id = resolve_user_id(db, user_id)
+    return shared_read(db, ("users.summary", user_id), lambda: _summary(db, user_id))
+
+
+def _summary(db: Session, user_id: str) -> MeSummary:
+    total_words = db.execute(lambda_stmt(lambda: (
         select(func.coalesce(func.sum(StudySessions.words_learned), 0)).where(StudySessions.user_id == user_id)
-    ).scalar_one()
+    ))).scalar_one()
 
     since = datetime.utcnow() - timedelta(days=7)
-    total_sec_7d = db.execute(
+    total_sec_7d = db.execute(lambda_stmt(lambda: (
         select(func.coalesce(func.sum(StudySessions.duration_sec), 0)).where(
             (StudySessions.user_id == user_id) & (StudySessions.started_at >= since)
         )
-    ).scalar_one()
+    ))).scalar_one()
 
-    rows = db.execute(
-        select(func.date_trunc('day', StudySessions.started_at)).where(StudySessions.user_id == user_id)
-    ).all()
-    days = {r[0].date() for r in rows if r and r[0] is not None}
+    # Streak on the user's local days, newest first, stopping at the first gap
+    today = today_for(get_user_timezone(db, user_id))
+    days = db.execute(lambda_stmt(lambda: (
+        select(StudySessions.local_day)
+        .where((StudySessions.user_id == user_id) & (StudySessions.local_day <= today))
+        .group_by(StudySessions.local_day)
+        .order_by(StudySessions.local_day.desc())
+    ))).scalars()
     streak = 0
-    cur = date.today()
-    while cur in days:
+    cur = today
+    for d in days:
+        if d != cur:
+            break
         streak += 1
         cur = cur - timedelta(days=1)
 
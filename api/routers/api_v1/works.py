@@ -1,28 +1,45 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import extract, select, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
 from sqlalchemy.orm import Session
 
-from db.deps import get_db
-from db.models import Works, ReadingSpeeds
+from db.deps import get_read_db
+from db.models import Works, WorkSegments, ReadingSpeeds, UserWorkStats
+from routers.api_v1.common import minutes, resolve_user_id
+from services.reading_speeds import speed_percentile, speed_trends
+from services.work_search import search_works
 
 router = APIRouter(prefix="")
 
 
 @router.get("/works", tags=["Works"]) 
-def list_works(db: Session = Depends(get_db)):
+def list_works(db: Session = Depends(get_read_db)):
     rows = db.execute(select(Works.id, Works.title, Works.type).order_by(Works.created_at.desc())).all()
     return [{"id": str(r[0]), "title": r[1], "type": str(r[2])} for r in rows]
 
 
+@router.get("/works/search", tags=["Works"])
+def works_search(
+    q: str = Query(..., min_length=1, max_length=100, description="Title or author: kana, kanji or romaji"),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_read_db),
+):
+    return [hit.as_dict() for hit in search_works(db, q, limit)]
+
+
 @router.get("/reading-speeds", tags=["Reading Speeds"]) 
-def reading_speeds(work_id: Optional[str] = None, db: Session = Depends(get_db)):
+def reading_speeds(user_id: Optional[str] = None, work_id: Optional[str] = None, db: Session = Depends(get_read_db)):
+    uid = resolve_user_id(db, user_id)
+    if not uid:
+        return {"series": []}
     q = (
         select(ReadingSpeeds.work_id, Works.title, func.array_agg(ReadingSpeeds.chars_per_min).label('cpm'))
         .join(Works, Works.id == ReadingSpeeds.work_id)
+        .where(ReadingSpeeds.user_id == uid)
         .group_by(ReadingSpeeds.work_id, Works.title)
     )
     if work_id:
@@ -35,3 +52,166 @@ def reading_speeds(work_id: Optional[str] = None, db: Session = Depends(get_db))
             "cpm": list(r[2]) if r[2] is not None else [],
         })
     return {"series": series}
+
+
+@router.get("/reading-speeds/trends", tags=["Reading Speeds"])
+def reading_speed_trends(
+    user_id: Optional[str] = None,
+    work_id: Optional[str] = None,
+    window: int = Query(5, ge=1, le=50, description="Measurements in the rolling average"),
+    db: Session = Depends(get_read_db),
+):
+    """Per work: chronological measurements with a rolling average, and the linear trend (chars/min per day)."""
+    uid = resolve_user_id(db, user_id)
+    if not uid:
+        return {"window": window, "series": []}
+    return {"window": window, "series": speed_trends(db, uid, work_id, window)}
+
+
+@router.get("/works/{work_id}/speed-percentile", tags=["Reading Speeds"])
+def work_speed_percentile(work_id: str, user_id: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """The user's recent reading speed on the work and its percentile among the work's readers.
+
+    Read from the periodically refreshed per-work sketch: percentile is null
+    until the work has enough readers.
+    """
+    uid = resolve_user_id(db, user_id)
+    if not uid:
+        raise HTTPException(status_code=404, detail="User not found")
+    if db.get(Works, work_id) is None:
+        raise HTTPException(status_code=404, detail="Work not found")
+    return speed_percentile(db, uid, work_id)
+
+
+def _work_progress(
+    db: Session,
+    uid: str,
+    work_ids: Optional[list[str]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> list[dict[str, Any]]:
+    """Progress rows from user_work_stats plus segment totals and reading speed trend.
+
+    Three queries whatever the number of works: summaries, segment counts, speeds.
+    """
+    q = (
+        select(
+            UserWorkStats,
+            Works.title,
+            Works.type,
+            WorkSegments.kind,
+            WorkSegments.title,
+        )
+        .join(Works, Works.id == UserWorkStats.work_id)
+        .outerjoin(WorkSegments, WorkSegments.id == UserWorkStats.last_segment_id)
+        .where(UserWorkStats.user_id == uid)
+        .order_by(UserWorkStats.last_at.desc())
+        .offset(offset)
+    )
+    if work_ids:
+        q = q.where(UserWorkStats.work_id.in_(work_ids))
+    if limit:
+        q = q.limit(limit)
+    rows = db.execute(q).all()
+    if not rows:
+        return []
+    ids = [r[0].work_id for r in rows]
+
+    segment_totals = dict(db.execute(
+        select(WorkSegments.work_id, func.count())
+        .where(WorkSegments.work_id.in_(ids))
+        .group_by(WorkSegments.work_id)
+    ).all())
+    # Trend: least-squares slope of chars/min per day over all measurements
+    speeds = {
+        r[0]: r[1:]
+        for r in db.execute(
+            select(
+                ReadingSpeeds.work_id,
+                func.count(),
+                array_agg(aggregate_order_by(ReadingSpeeds.chars_per_min, ReadingSpeeds.measured_at.desc()))[1],
+                func.regr_slope(ReadingSpeeds.chars_per_min, extract("epoch", ReadingSpeeds.measured_at) / 86400),
+            )
+            .where(ReadingSpeeds.user_id == uid, ReadingSpeeds.work_id.in_(ids))
+            .group_by(ReadingSpeeds.work_id)
+        ).all()
+    }
+
+    items = []
+    for stats, title, wtype, seg_kind, seg_title in rows:
+        n_speeds, latest, slope = speeds.get(stats.work_id, (0, None, None))
+        items.append({
+            "work": {"id": str(stats.work_id), "title": title, "type": str(wtype)},
+            "minutes": minutes(stats.seconds),
+            "sessions": stats.sessions,
+            "words": stats.words,
+            "first_at": stats.first_at,
+            "last_at": stats.last_at,
+            "last_segment": {
+                "id": str(stats.last_segment_id),
+                "kind": str(seg_kind),
+                "index_no": stats.last_segment_index,
+                "title": seg_title,
+            } if stats.last_segment_id else None,
+            "segments_total": int(segment_totals.get(stats.work_id, 0)),
+            "reading_speed": {
+                "measurements": int(n_speeds),
+                "latest_cpm": latest,
+                "cpm_per_day": round(float(slope), 3) if slope is not None else None,
+            },
+        })
+    return items
+
+
+@router.get("/works/progress", tags=["Works"])
+def works_progress(
+    user_id: Optional[str] = None,
+    work_id: Optional[list[str]] = Query(None, description="Restrict to these works (repeatable)"),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_read_db),
+):
+    """Library view: progress of the user's works, most recently studied first."""
+    uid = resolve_user_id(db, user_id)
+    if not uid:
+        return []
+    return _work_progress(db, uid, work_ids=work_id, limit=limit, offset=offset)
+
+
+@router.get("/works/{work_id}/stats", tags=["Works"])
+def work_stats(
+    work_id: str,
+    user_id: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    uid = resolve_user_id(db, user_id)
+    items = _work_progress(db, uid, work_ids=[work_id]) if uid else []
+    if items:
+        item = items[0]
+    else:
+        work = db.get(Works, work_id)
+        if work is None:
+            raise HTTPException(status_code=404, detail="Work not found")
+        # Not studied yet: same shape as a progress row, zeroed
+        item = {
+            "work": {"id": str(work.id), "title": work.title, "type": str(work.type)},
+            "minutes": 0,
+            "sessions": 0,
+            "words": 0,
+            "first_at": None,
+            "last_at": None,
+            "last_segment": None,
+            "segments_total": db.scalar(
+                select(func.count()).select_from(WorkSegments).where(WorkSegments.work_id == work_id)
+            ),
+            "reading_speed": {"measurements": 0, "latest_cpm": None, "cpm_per_day": None},
+        }
+    rows = db.execute(
+        select(ReadingSpeeds.measured_at, ReadingSpeeds.chars_per_min)
+        .where(ReadingSpeeds.user_id == uid, ReadingSpeeds.work_id == work_id)
+        .order_by(ReadingSpeeds.measured_at)
+    ).all() if uid else []
+    if not items and rows:
+        item["reading_speed"].update(measurements=len(rows), latest_cpm=rows[-1][1])
+    item["speeds"] = [{"measured_at": r[0], "cpm": r[1]} for r in rows]
+    return item
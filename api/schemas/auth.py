@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+# Deliberately loose: the address is only an identifier until e-mail confirmation exists
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+
+class RegisterRequest(BaseModel):
+    email: str = Field(..., max_length=254, pattern=EMAIL_PATTERN)
+    password: str = Field(..., min_length=8, max_length=256)
+    display_name: Optional[str] = Field(None, max_length=100)
+    timezone: Optional[str] = Field(None, max_length=64)
+
+
+class LoginRequest(BaseModel):
+    email: str = Field(..., max_length=254)
+    password: str = Field(..., max_length=256)
+
+
+class UserProfile(BaseModel):
+    id: str
+    email: str
+    display_name: Optional[str] = None
+    timezone: Optional[str] = None
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+    user: UserProfile
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+# Items per /vocab-items or /reviews/grade request
+MAX_SRS_BATCH = 1000
+
+
+class VocabItemCreate(BaseModel):
+    term: str = Field(..., min_length=1, max_length=200)
+    reading: Optional[str] = Field(None, max_length=200)
+    meaning: Optional[str] = None
+    work_id: Optional[UUID] = None
+
+
+class VocabItemsCreate(BaseModel):
+    user_id: Optional[UUID] = None
+    items: list[VocabItemCreate] = Field(..., min_length=1, max_length=MAX_SRS_BATCH)
+
+
+class VocabItemsResult(BaseModel):
+    # Per input item: the new card id, or None when the (term, reading) card already existed
+    ids: list[Optional[str]]
+    created: int
+
+
+class DueCard(BaseModel):
+    item_id: str
+    due_at: datetime
+    interval_days: float
+    reps: int
+    term: str
+    reading: Optional[str] = None
+    meaning: Optional[str] = None
+
+
+class ReviewGrade(BaseModel):
+    item_id: UUID
+    # SM-2 quality: 0-2 forgotten, 3 hard, 4 good, 5 easy
+    grade: int = Field(..., ge=0, le=5)
+    reviewed_at: Optional[datetime] = None
+
+
+class GradeRequest(BaseModel):
+    user_id: Optional[UUID] = None
+    grades: list[ReviewGrade] = Field(..., min_length=1, max_length=MAX_SRS_BATCH)
+
+
+class CardState(BaseModel):
+    item_id: str
+    due_at: datetime
+    interval_days: float
+    ease: float
+    reps: int
+    lapses: int
+
+
+class GradeResult(BaseModel):
+    # Unknown, foreign or stale grades (older than the card's last review)
+    skipped: int
+    cards: list[CardState]
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+# Upper bound on users per batch request (one class / coach group)
+MAX_BATCH_USERS = 1000
+
+
+class BatchStatsRequest(BaseModel):
+    user_ids: list[UUID] = Field(..., min_length=1, max_length=MAX_BATCH_USERS)
+    start: Optional[date] = None
+    end: Optional[date] = None
+    daily: bool = True
+    weekly: bool = True
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+from db.models import ActivityType, Modality, Visibility
+
+# Items per kind in one /sync request
+MAX_SYNC_ITEMS = 500
+
+
+class SyncSession(BaseModel):
+    client_key: str = Field(..., min_length=1, max_length=64)
+    started_at: datetime
+    ended_at: datetime
+    duration_sec: Optional[int] = Field(None, ge=0)
+    modality: Modality
+    work_id: Optional[UUID] = None
+    work_segment_id: Optional[UUID] = None
+    words_reviewed: Optional[int] = Field(None, ge=0)
+    words_learned: Optional[int] = Field(None, ge=0)
+    notes: Optional[str] = None
+
+
+class SyncEvent(BaseModel):
+    client_key: str = Field(..., min_length=1, max_length=64)
+    occurred_at: datetime
+    type: ActivityType
+    ref_kind: Optional[str] = None
+    ref_id: Optional[UUID] = None
+    summary: Optional[str] = None
+    metadata: Optional[dict[str, Any]] = None
+    visibility: Visibility = Visibility.private
+
+
+class SyncRequest(BaseModel):
+    user_id: Optional[UUID] = None
+    sessions: list[SyncSession] = Field(default_factory=list, max_length=MAX_SYNC_ITEMS)
+    events: list[SyncEvent] = Field(default_factory=list, max_length=MAX_SYNC_ITEMS)
+
+
+class SyncItemResult(BaseModel):
+    client_key: str
+    # created | duplicate | invalid
+    status: str
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class SyncResponse(BaseModel):
+    sessions: list[SyncItemResult]
+    events: list[SyncItemResult]
+
+
+# Single-item ingestion (write-behind buffer, services/write_buffer.py)
+
+class EventCreate(BaseModel):
+    user_id: Optional[UUID] = None
+    client_key: Optional[str] = Field(None, min_length=1, max_length=64)
+    # Defaults to the server time; required with client_key
+    occurred_at: Optional[datetime] = None
+    type: ActivityType
+    ref_kind: Optional[str] = None
+    ref_id: Optional[UUID] = None
+    summary: Optional[str] = None
+    metadata: Optional[dict[str, Any]] = None
+    visibility: Visibility = Visibility.private
+
+
+class SessionHeartbeat(BaseModel):
+    """Periodic "still studying" ping; the session (user_id, client_key, started_at) is
+    created by the first heartbeat and extended to ``at`` by the following ones."""
+
+    user_id: Optional[UUID] = None
+    client_key: str = Field(..., min_length=1, max_length=64)
+    started_at: datetime
+    # Defaults to the server time
+    at: Optional[datetime] = None
+    modality: Modality
+    work_id: Optional[UUID] = None
+    work_segment_id: Optional[UUID] = None
+
+
+class IngestResult(BaseModel):
+    # committed | queued
+    status: str
+    id: Optional[str] = None
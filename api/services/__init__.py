@@ -0,0 +1 @@
+# Domain logic and jobs called by routers and CLIs (see ARCHITECTURE.md)
@@ -0,0 +1,225 @@
+"""Cold archival of old activity events.
+
+Events older than ``ACTIVITY_RETENTION_DAYS`` are moved out of Postgres into
+gzip-compressed JSONL files on local disk, one file per (user, UTC month):
+
+    {ARCHIVE_DIR}/{user_id}/{YYYY-MM}.jsonl.gz
+
+The job works in small batches, each in its own short transaction:
+1. lock a batch of old rows (FOR UPDATE SKIP LOCKED, so it never waits on writers)
+2. append them to the archive files and fsync
+3. delete exactly those rows and commit
+
+A crash between 2 and 3 leaves rows both archived and in the table; the next
+run archives them again. Readers de-duplicate by event id, so this is harmless.
+
+Run with ``python -m services.activity_archive`` (cron / one-off job).
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from core.localtime import as_utc
+from db.database import SessionLocal
+from db.models import ActivityEvents
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ACTIVITY_RETENTION_DAYS = int(os.getenv("ACTIVITY_RETENTION_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+# Comma-separated activity types to archive; empty means every type
+ARCHIVE_TYPES = [t for t in os.getenv("ARCHIVE_TYPES", "").split(",") if t]
+
+
+def _month_key(ts: datetime) -> str:
+    return ts.astimezone(timezone.utc).strftime("%Y-%m")
+
+
+def _user_dir(user_id: str, root: str) -> str:
+    # Normalizing through UUID also keeps request input from escaping ``root``
+    return os.path.join(root, str(uuid.UUID(str(user_id))))
+
+
+def _month_path(user_id: str, month: str, root: str) -> str:
+    return os.path.join(_user_dir(user_id, root), f"{month}.jsonl.gz")
+
+
+def event_record(row: Any) -> dict[str, Any]:
+    """JSON-ready form of an ActivityEvents row (archive files and exports)."""
+    return {
+        "id": str(row.id),
+        "user_id": str(row.user_id),
+        "occurred_at": row.occurred_at.isoformat(),
+        "type": str(row.type),
+        "ref_kind": row.ref_kind,
+        "ref_id": str(row.ref_id) if row.ref_id else None,
+        "summary": row.summary,
+        "metadata": row.meta,
+        "visibility": str(row.visibility),
+    }
+
+
+def _append(path: str, records: list[dict[str, Any]]) -> None:
+    # Each append is a new gzip member; concatenated members are a valid gzip stream
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as fh:
+        with gzip.GzipFile(fileobj=fh, mode="wb") as gz:
+            for r in records:
+                gz.write((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8"))
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE, root: str = ARCHIVE_DIR) -> int:
+    """Archive and delete one batch of events older than ``cutoff``; returns the row count."""
+    q = (
+        select(ActivityEvents)
+        .where(ActivityEvents.occurred_at < cutoff)
+        .order_by(ActivityEvents.occurred_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    if ARCHIVE_TYPES:
+        q = q.where(ActivityEvents.type.in_(ARCHIVE_TYPES))
+    rows = db.execute(q).scalars().all()
+    if not rows:
+        db.rollback()
+        return 0
+
+    groups: dict[tuple[str, str], list[dict[str, Any]]] = defaultdict(list)
+    for r in rows:
+        groups[(str(r.user_id), _month_key(r.occurred_at))].append(event_record(r))
+    for (uid, month), records in groups.items():
+        _append(_month_path(uid, month, root), records)
+
+    keys = [(r.id, r.occurred_at) for r in rows]
+    db.expunge_all()
+    db.execute(
+        ActivityEvents.__table__.delete().where(
+            tuple_(ActivityEvents.id, ActivityEvents.occurred_at).in_(keys)
+        )
+    )
+    db.commit()
+    return len(rows)
+
+
+def drop_empty_partitions(db: Session, cutoff: datetime) -> list[str]:
+    """Drop monthly activity_events partitions entirely older than ``cutoff`` once emptied.
+
+    Each drop is its own short transaction: lock_timeout bounds the wait for the
+    parent lock, and emptiness is re-checked under the lock so a late insert
+    into an old month can't be lost.
+    """
+    month = cutoff.astimezone(timezone.utc).strftime("%Y%m")
+    parts = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'activity_events'::regclass AND c.relname ~ '^activity_events_p[0-9]{6}$' "
+        "AND substring(c.relname from '[0-9]{6}$') < :month ORDER BY 1"
+    ), {"month": month}).scalars().all()
+    db.commit()
+    dropped = []
+    for name in parts:
+        try:
+            db.execute(text("SET LOCAL lock_timeout = '2s'"))
+            db.execute(text(f'LOCK TABLE activity_events, "{name}" IN ACCESS EXCLUSIVE MODE'))
+            if db.execute(text(f'SELECT NOT EXISTS (SELECT 1 FROM "{name}")')).scalar_one():
+                db.execute(text(f'DROP TABLE "{name}"'))
+                dropped.append(name)
+            db.commit()
+        except OperationalError:
+            db.rollback()  # busy: try again on the next run
+    return dropped
+
+
+def run_retention(
+    retention_days: int = ACTIVITY_RETENTION_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    root: str = ARCHIVE_DIR,
+) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            n = archive_batch(db, cutoff, batch_size=batch_size, root=root)
+            total += n
+            if n < batch_size:
+                break
+        drop_empty_partitions(db, cutoff)
+    finally:
+        db.close()
+    return total
+
+
+# ---- Readers ----
+
+def archived_months(user_id: str, root: str = ARCHIVE_DIR) -> list[str]:
+    """Archived months for a user, oldest first ("YYYY-MM")."""
+    try:
+        d = _user_dir(user_id, root)
+    except ValueError:
+        return []
+    if not os.path.isdir(d):
+        return []
+    return sorted(f[: -len(".jsonl.gz")] for f in os.listdir(d) if f.endswith(".jsonl.gz"))
+
+
+def read_month(user_id: str, month: str, root: str = ARCHIVE_DIR) -> list[dict[str, Any]]:
+    """All archived events of one month, de-duplicated, ordered by occurred_at."""
+    by_id: dict[str, dict[str, Any]] = {}
+    with gzip.open(_month_path(user_id, month, root), "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                r = json.loads(line)
+                r["occurred_at"] = datetime.fromisoformat(r["occurred_at"])
+                by_id[r["id"]] = r
+    return sorted(by_id.values(), key=lambda r: r["occurred_at"])
+
+
+def iter_archived(
+    user_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    newest_first: bool = False,
+    root: str = ARCHIVE_DIR,
+) -> Iterator[dict[str, Any]]:
+    """Archived events in [start, end), skipping months outside the range.
+
+    Bounds without an offset are taken as UTC (archived timestamps are aware).
+    """
+    start = as_utc(start) if start else None
+    end = as_utc(end) if end else None
+    months = archived_months(user_id, root)
+    if newest_first:
+        months.reverse()
+    lo = _month_key(start) if start else None
+    hi = _month_key(end) if end else None
+    for month in months:
+        if (lo and month < lo) or (hi and month > hi):
+            continue
+        rows = read_month(user_id, month, root)
+        if newest_first:
+            rows.reverse()
+        for r in rows:
+            if (start and r["occurred_at"] < start) or (end and r["occurred_at"] >= end):
+                continue
+            yield r
+
+
+def main():
+    n = run_retention()
+    print(f"Archived {n} activity events")
+
+
+if __name__ == "__main__":
+    main()
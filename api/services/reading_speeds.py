@@ -0,0 +1,197 @@
+"""Reading-speed analytics: per-work rolling averages, trends and percentiles.
+
+Trends are computed in SQL over the user's measurements (read in
+(user_id, work_id, measured_at) index order): a rolling average as a
+``ROWS`` window, and the least-squares slope / r² as ``regr_*`` window
+aggregates per work.
+
+"You vs other readers of this work" reads a per-work quantile sketch
+(``work_speed_quantiles``: 101 percentiles of the readers' recent speeds)
+instead of every reader's measurements: the lookup is the user's last
+``READING_SPEED_RECENT`` measurements plus one primary-key row, then an
+interpolation in the sketch. The sketch includes the user's own speed as of
+the last refresh (they are one of its ``readers``), like any rank among all
+readers: the fastest reader is at p100. Sketches are rebuilt in one statement
+every ``READING_SPEED_QUANTILES_INTERVAL`` seconds by the API process
+(advisory-locked, skipped when another worker refreshed recently: the run time
+is kept in ``work_speed_quantiles_meta``, since a run may leave no sketch) or
+with ``python -m services.reading_speeds``. Works with fewer than
+``READING_SPEED_MIN_READERS`` readers get no sketch, so a percentile never
+exposes one or two people's speeds.
+"""
+
+from __future__ import annotations
+
+import os
+from itertools import groupby
+from typing import Any, Optional
+
+import numpy as np
+from sqlalchemy import extract, func, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from db.database import engine
+from db.models import ReadingSpeeds, WorkSpeedQuantiles, Works
+
+# A reader's speed for a work: mean of their latest measurements
+READING_SPEED_RECENT = int(os.getenv("READING_SPEED_RECENT", "5"))
+READING_SPEED_MIN_READERS = int(os.getenv("READING_SPEED_MIN_READERS", "5"))
+READING_SPEED_QUANTILES_INTERVAL = float(os.getenv("READING_SPEED_QUANTILES_INTERVAL", "3600"))
+
+# Sketch resolution: percentiles 0, 1, ..., 100
+PERCENTILES = np.linspace(0.0, 100.0, 101)
+
+REFRESH_SQL = text("""
+WITH recent AS (
+    SELECT work_id, user_id, chars_per_min,
+           row_number() OVER (PARTITION BY user_id, work_id ORDER BY measured_at DESC) AS rn
+    FROM reading_speeds
+),
+readers AS (
+    SELECT work_id, avg(chars_per_min) AS cpm, count(*) AS n
+    FROM recent WHERE rn <= :recent
+    GROUP BY work_id, user_id
+),
+sketches AS (
+    SELECT work_id, count(*) AS readers, sum(n) AS measurements,
+           percentile_cont(CAST(:fractions AS float8[])) WITHIN GROUP (ORDER BY cpm) AS quantiles
+    FROM readers
+    GROUP BY work_id
+    HAVING count(*) >= :min_readers
+),
+dropped AS (
+    DELETE FROM work_speed_quantiles q
+    WHERE NOT EXISTS (SELECT 1 FROM sketches s WHERE s.work_id = q.work_id)
+),
+ran AS (
+    INSERT INTO work_speed_quantiles_meta (id, refreshed_at) VALUES (1, now())
+    ON CONFLICT (id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+)
+INSERT INTO work_speed_quantiles (work_id, readers, measurements, quantiles, refreshed_at)
+SELECT work_id, readers, measurements, quantiles, now() FROM sketches
+ON CONFLICT (work_id) DO UPDATE SET
+    readers = EXCLUDED.readers,
+    measurements = EXCLUDED.measurements,
+    quantiles = EXCLUDED.quantiles,
+    refreshed_at = EXCLUDED.refreshed_at
+""")
+
+
+def speed_trends(db: Session, user_id: str, work_id: Optional[str], window: int) -> list[dict[str, Any]]:
+    """Per work: measurements with their rolling average over ``window`` points, and the linear trend."""
+    days = extract("epoch", ReadingSpeeds.measured_at) / 86400
+    per_work = {"partition_by": ReadingSpeeds.work_id}
+    q = (
+        select(
+            ReadingSpeeds.work_id,
+            ReadingSpeeds.measured_at,
+            ReadingSpeeds.chars_per_min,
+            func.avg(ReadingSpeeds.chars_per_min).over(
+                **per_work, order_by=ReadingSpeeds.measured_at, rows=(-(window - 1), 0)
+            ),
+            func.regr_slope(ReadingSpeeds.chars_per_min, days).over(**per_work),
+            func.regr_r2(ReadingSpeeds.chars_per_min, days).over(**per_work),
+        )
+        .where(ReadingSpeeds.user_id == user_id)
+        .order_by(ReadingSpeeds.work_id, ReadingSpeeds.measured_at)
+    )
+    if work_id:
+        q = q.where(ReadingSpeeds.work_id == work_id)
+    rows = db.execute(q).all()
+    if not rows:
+        return []
+    titles = dict(db.execute(select(Works.id, Works.title).where(Works.id.in_({r[0] for r in rows}))).all())
+
+    series = []
+    for wid, points in groupby(rows, key=lambda r: r[0]):
+        points = list(points)
+        slope, r2 = points[-1][4], points[-1][5]
+        series.append({
+            "work": {"id": str(wid), "title": titles.get(wid)},
+            "measurements": len(points),
+            "points": [
+                {"measured_at": p[1], "cpm": p[2], "rolling_cpm": round(float(p[3]), 1)}
+                for p in points
+            ],
+            "trend": {
+                "cpm_per_day": round(float(slope), 3) if slope is not None else None,
+                "r2": round(float(r2), 3) if r2 is not None else None,
+            },
+        })
+    return series
+
+
+def speed_percentile(db: Session, user_id: str, work_id: str) -> dict[str, Any]:
+    """The user's recent speed on ``work_id`` and where it falls among the work's readers.
+
+    The readers include the user (their speed at the last refresh).
+    """
+    recent = (
+        select(ReadingSpeeds.chars_per_min)
+        .where(ReadingSpeeds.user_id == user_id, ReadingSpeeds.work_id == work_id)
+        .order_by(ReadingSpeeds.measured_at.desc())
+        .limit(READING_SPEED_RECENT)
+        .subquery()
+    )
+    cpm, n = db.execute(select(func.avg(recent.c.chars_per_min), func.count())).one()
+    sketch = db.execute(
+        select(WorkSpeedQuantiles.readers, WorkSpeedQuantiles.quantiles, WorkSpeedQuantiles.refreshed_at)
+        .where(WorkSpeedQuantiles.work_id == work_id)
+    ).first()
+
+    result: dict[str, Any] = {
+        "work_id": work_id,
+        "cpm": round(float(cpm), 1) if cpm is not None else None,
+        "measurements": int(n),
+        "percentile": None,
+        "readers": None,
+        "quantiles": None,
+        "refreshed_at": None,
+    }
+    if sketch is None:
+        return result
+    quantiles = np.asarray(sketch.quantiles, dtype=np.float64)
+    result.update(
+        readers=sketch.readers,
+        quantiles={f"p{p}": round(float(quantiles[p]), 1) for p in (10, 25, 50, 75, 90)},
+        refreshed_at=sketch.refreshed_at,
+    )
+    if cpm is not None:
+        # Linear interpolation between the sketch's percentiles
+        result["percentile"] = round(float(np.interp(float(cpm), quantiles, PERCENTILES)), 1)
+    return result
+
+
+def compute_sketches(conn: Connection) -> int:
+    """Rebuild every work's sketch in one statement; number of works with a sketch."""
+    return conn.execute(REFRESH_SQL, {
+        "recent": READING_SPEED_RECENT,
+        "fractions": (PERCENTILES / 100).tolist(),
+        "min_readers": READING_SPEED_MIN_READERS,
+    }).rowcount
+
+
+def refresh_sketches(target: Engine = engine, max_age: float = 0.0) -> Optional[int]:
+    """Rebuild the sketches unless another process is at it or did it less than ``max_age`` seconds ago.
+
+    None when skipped, else the number of works with a sketch.
+    """
+    with target.begin() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_xact_lock(hashtext('fuurin_speed_quantiles'))")).scalar():
+            return None
+        if max_age > 0 and conn.execute(
+            text("SELECT refreshed_at > now() - make_interval(secs => :age) FROM work_speed_quantiles_meta"),
+            {"age": max_age},
+        ).scalar():
+            return None
+        return compute_sketches(conn)
+
+
+def main():
+    works = refresh_sketches()
+    print(f"Reading speed sketches refreshed: {works} works")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Spaced repetition: vocabulary cards and their SM-2 review schedule.
+
+Each vocabulary item has one ``review_states`` row (due date, interval, ease,
+repetitions). The due queue is read from ``ix_review_states_user_due``
+(user_id, due_at, item_id, INCLUDE interval_days, reps): "next N due cards" is
+a bounded index-only range scan, so its cost doesn't depend on how many cards
+the user has; only the N vocab_items rows are fetched by primary key.
+
+Grading is one statement for the whole batch: the grades are passed as arrays
+(``unnest``), joined to the current state, and the SM-2 step runs inside the
+``UPDATE`` (so it always starts from the row's latest version, even with
+concurrent graders). The same statement appends to ``review_logs``. A grade
+older than the card's last review is ignored, which makes retried batches
+harmless.
+
+SM-2 (grades 0-5): below 3 the card lapses (repetitions reset, 1 day, ease
+kept); otherwise the interval goes 1 day, 6 days, then previous interval x
+ease, and the ease moves by ``0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)``
+(floor 1.3). Intervals are capped by ``srs_prefs.max_interval_days``, else
+``SRS_MAX_INTERVAL_DAYS``.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import lambda_stmt, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from db.models import ReviewStates, VocabItems
+
+SRS_MAX_INTERVAL_DAYS = float(os.getenv("SRS_MAX_INTERVAL_DAYS", "36500"))
+
+# Next interval in days, from the row's current state (used twice in the UPDATE:
+# a FROM item can't reference the updated table)
+_INTERVAL = """least(cap.days, CASE
+    WHEN g.grade < 3 OR r.reps = 0 THEN 1
+    WHEN r.reps = 1 THEN 6
+    ELSE round((r.interval_days * r.ease)::numeric)::float
+END)"""
+
+GRADE_SQL = text(f"""
+WITH cap AS (
+    SELECT coalesce(
+        (SELECT (srs_prefs->>'max_interval_days')::float FROM user_settings
+         WHERE user_id = CAST(:user_id AS uuid) AND json_typeof(srs_prefs->'max_interval_days') = 'number'),
+        :max_interval
+    ) AS days
+),
+graded AS (
+    UPDATE review_states r SET
+        reps = CASE WHEN g.grade < 3 THEN 0 ELSE r.reps + 1 END,
+        lapses = r.lapses + CASE WHEN g.grade < 3 THEN 1 ELSE 0 END,
+        ease = CASE WHEN g.grade < 3 THEN r.ease
+                    ELSE greatest(1.3, r.ease + 0.1 - (5 - g.grade) * (0.08 + (5 - g.grade) * 0.02)) END,
+        interval_days = {_INTERVAL},
+        due_at = g.reviewed_at + {_INTERVAL} * interval '1 day',
+        last_reviewed_at = g.reviewed_at
+    FROM unnest(CAST(:item_ids AS uuid[]), CAST(:grades AS smallint[]), CAST(:reviewed_at AS timestamptz[]))
+             AS g(item_id, grade, reviewed_at),
+         cap
+    WHERE r.item_id = g.item_id
+      AND r.user_id = CAST(:user_id AS uuid)
+      AND (r.last_reviewed_at IS NULL OR g.reviewed_at > r.last_reviewed_at)
+    RETURNING r.item_id, g.grade, r.due_at, r.interval_days, r.ease, r.reps, r.lapses, r.last_reviewed_at
+),
+logged AS (
+    INSERT INTO review_logs (user_id, item_id, reviewed_at, grade, interval_days, ease)
+    SELECT CAST(:user_id AS uuid), item_id, last_reviewed_at, grade, interval_days, ease FROM graded
+)
+SELECT item_id, due_at, interval_days, ease, reps, lapses FROM graded
+""")
+
+
+def add_items(db: Session, user_id: str, items: list[dict[str, Any]], due_at: datetime) -> list[Optional[str]]:
+    """Create cards (due at ``due_at``); ids of the new ones, None for those already there.
+
+    Two bulk statements whatever the batch size; the caller commits.
+    """
+    rows = [{**item, "id": str(uuid.uuid4()), "user_id": user_id} for item in items]
+    created = db.execute(
+        insert(VocabItems)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["user_id", "term", "reading"])
+        .returning(VocabItems.id, VocabItems.term, VocabItems.reading)
+    ).all()
+    if created:
+        db.execute(insert(ReviewStates).values([
+            {"item_id": r.id, "user_id": user_id, "due_at": due_at} for r in created
+        ]))
+    by_key = {(r.term, r.reading): str(r.id) for r in created}
+    return [by_key.get((item["term"], item["reading"])) for item in items]
+
+
+def due_cards(db: Session, user_id: str, at: datetime, limit: int) -> list[dict[str, Any]]:
+    """The ``limit`` cards due first (due_at <= ``at``), oldest due first."""
+    rows = db.execute(lambda_stmt(lambda: (
+        select(
+            ReviewStates.item_id,
+            ReviewStates.due_at,
+            ReviewStates.interval_days,
+            ReviewStates.reps,
+            VocabItems.term,
+            VocabItems.reading,
+            VocabItems.meaning,
+        )
+        .join(VocabItems, VocabItems.id == ReviewStates.item_id)
+        .where(ReviewStates.user_id == user_id, ReviewStates.due_at <= at)
+        .order_by(ReviewStates.due_at, ReviewStates.item_id)
+        .limit(limit)
+    ))).all()
+    return [
+        {
+            "item_id": str(r.item_id),
+            "due_at": r.due_at,
+            "interval_days": r.interval_days,
+            "reps": r.reps,
+            "term": r.term,
+            "reading": r.reading or None,
+            "meaning": r.meaning,
+        }
+        for r in rows
+    ]
+
+
+def grade(db: Session, user_id: str, grades: list[tuple[str, int, datetime]]) -> list[dict[str, Any]]:
+    """Apply ``(item_id, grade, reviewed_at)`` grades in one statement; new states of the updated cards.
+
+    Unknown cards, other users' cards and stale grades are left out of the
+    result. The caller commits.
+    """
+    if not grades:
+        return []
+    item_ids, values, reviewed_at = (list(col) for col in zip(*grades))
+    rows = db.execute(GRADE_SQL, {
+        "user_id": user_id,
+        "item_ids": item_ids,
+        "grades": values,
+        "reviewed_at": reviewed_at,
+        "max_interval": SRS_MAX_INTERVAL_DAYS,
+    }).all()
+    return [
+        {
+            "item_id": str(r.item_id),
+            "due_at": r.due_at,
+            "interval_days": r.interval_days,
+            "ease": round(r.ease, 3),
+            "reps": r.reps,
+            "lapses": r.lapses,
+        }
+        for r in rows
+    ]
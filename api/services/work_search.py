@@ -0,0 +1,154 @@
+"""Work search / autocomplete over titles and authors.
+
+Two tiers:
+1. an in-process prefix index over the ``WORK_SEARCH_HOT_TITLES`` most read
+   works (sorted keys + bisect), rebuilt every ``WORK_SEARCH_INDEX_TTL``
+   seconds; most keystrokes are answered here without touching the DB
+2. Postgres for the rest of the catalog, on ``works.search_text``: a
+   ``text_pattern_ops`` index for prefixes and a pg_trgm GIN index for
+   substrings / fuzzy matches (queries of 3+ characters)
+
+Queries and ``search_text`` share the same normalization (core.kana), and a
+romaji query is also matched by its hiragana reading.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from core.kana import normalize, search_terms
+from db.models import UserWorkStats, Works
+
+WORK_SEARCH_HOT_TITLES = int(os.getenv("WORK_SEARCH_HOT_TITLES", "5000"))
+WORK_SEARCH_INDEX_TTL = float(os.getenv("WORK_SEARCH_INDEX_TTL", "300"))
+
+# pg_trgm needs 3 characters to build a trigram
+MIN_TRIGRAM_LEN = 3
+
+
+@dataclass(frozen=True)
+class WorkHit:
+    id: str
+    title: str
+    type: str
+    author: Optional[str]
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "title": self.title, "type": self.type, "author": self.author}
+
+
+def _keys(hit: WorkHit) -> set[str]:
+    """Index keys: the full title, each word start in it, and the author."""
+    title = normalize(hit.title)
+    keys = {title}
+    keys.update(title[i + 1:] for i, ch in enumerate(title) if ch == " ")
+    if hit.author:
+        keys.add(normalize(hit.author))
+    return {k for k in keys if k}
+
+
+class PrefixIndex:
+    def __init__(self, max_titles: int = WORK_SEARCH_HOT_TITLES, ttl: float = WORK_SEARCH_INDEX_TTL):
+        self.max_titles = max_titles
+        self.ttl = ttl
+        # (sorted keys, rank of each key's work, works hottest first); swapped as a whole
+        self._state: tuple[list[str], list[int], list[WorkHit]] = ([], [], [])
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def build(self, hits: list[WorkHit]) -> None:
+        pairs = sorted((key, rank) for rank, hit in enumerate(hits) for key in _keys(hit))
+        self._state = ([k for k, _ in pairs], [r for _, r in pairs], list(hits))
+        self._built_at = time.monotonic()
+
+    def lookup(self, prefix: str, limit: int) -> list[WorkHit]:
+        keys, ranks, hits = self._state
+        found: set[int] = set()
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            found.add(ranks[i])
+            i += 1
+        return [hits[r] for r in sorted(found)[:limit]]
+
+    def refresh(self, db: Session) -> None:
+        self.build(load_hot_works(db, self.max_titles))
+
+    def refresh_if_stale(self, db: Session) -> None:
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at < self.ttl:
+            return
+        # Only the first build makes callers wait; later ones serve the stale index meanwhile
+        if not self._lock.acquire(blocking=built_at is None):
+            return
+        try:
+            if self._built_at == built_at:
+                self.refresh(db)
+        finally:
+            self._lock.release()
+
+
+def load_hot_works(db: Session, limit: int) -> list[WorkHit]:
+    """Works with the most readers first, then the newest."""
+    readers = (
+        select(UserWorkStats.work_id, func.count().label("n"))
+        .group_by(UserWorkStats.work_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(Works.id, Works.title, Works.type, Works.author)
+        .outerjoin(readers, readers.c.work_id == Works.id)
+        .order_by(func.coalesce(readers.c.n, 0).desc(), Works.created_at.desc())
+        .limit(limit)
+    ).all()
+    return [WorkHit(str(r[0]), r[1], str(r[2]), r[3]) for r in rows]
+
+
+prefix_index = PrefixIndex()
+
+
+def _like_escape(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_works(db: Session, query: str, limit: int = 10) -> list[WorkHit]:
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    prefix_index.refresh_if_stale(db)
+    hits: list[WorkHit] = []
+    seen: set[str] = set()
+    for term in terms:
+        for hit in prefix_index.lookup(term, limit):
+            if hit.id not in seen:
+                seen.add(hit.id)
+                hits.append(hit)
+    if len(hits) >= limit:
+        return hits[:limit]
+
+    col = Works.search_text
+    prefix_conds = [col.like(_like_escape(t) + "%", escape="\\") for t in terms]
+    conds = list(prefix_conds)
+    long_terms = [t for t in terms if len(t) >= MIN_TRIGRAM_LEN]
+    for t in long_terms:
+        conds.append(col.like("%" + _like_escape(t) + "%", escape="\\"))
+        conds.append(col.op("%>")(t))  # word_similarity(t, search_text) above pg_trgm's threshold
+    order = [case((or_(*prefix_conds), 0), else_=1)]
+    if long_terms:
+        order.append(func.greatest(*[func.word_similarity(t, col) for t in long_terms]).desc())
+    order.append(Works.title)
+
+    q = select(Works.id, Works.title, Works.type, Works.author).where(or_(*conds))
+    if seen:
+        q = q.where(Works.id.notin_(seen))
+    rows = db.execute(q.order_by(*order).limit(limit - len(hits))).all()
+    hits.extend(WorkHit(str(r[0]), r[1], str(r[2]), r[3]) for r in rows)
+    return hits
@@ -0,0 +1,285 @@
+"""Write-behind buffer for high-rate small writes (activity events, session heartbeats).
+
+Producers (request threads) ``submit`` rows; a background thread collects them
+for up to ``WRITE_BUFFER_MAX_DELAY_MS`` or ``WRITE_BUFFER_MAX_ITEMS`` items
+and writes the whole batch in one transaction: one multi-row INSERT per kind,
+one commit. Heartbeats for the same session within a batch collapse to the
+latest one.
+
+Durability, per submit:
+- ``wait=True`` (default): the call returns once the batch holding the item is
+  committed, and raises if that write failed. Same guarantee as a direct
+  insert; only the commits are shared (group commit), at the cost of up to
+  ``WRITE_BUFFER_MAX_DELAY_MS`` extra latency. If the commit isn't confirmed
+  within ``WRITE_BUFFER_COMMIT_TIMEOUT`` seconds (database stalled), it raises
+  ``CommitTimeout`` (503): the item may still be written later, so clients
+  retry with the same ``client_key``.
+- ``wait=False``: acknowledged once queued. Graceful shutdown flushes the
+  queue (``stop``), but a crash (SIGKILL, OOM, power loss) loses the queued
+  items: at most ``WRITE_BUFFER_CAPACITY`` rows, normally a few ms worth.
+  Items that still fail after retries are logged and counted as failed.
+
+Backpressure: the queue holds at most ``WRITE_BUFFER_CAPACITY`` items. When it
+is full, ``submit`` waits up to ``WRITE_BUFFER_ENQUEUE_TIMEOUT`` seconds, then
+raises ``BufferFull`` (the API answers 503 with Retry-After).
+
+With ``WRITE_BUFFER_ENABLED`` unset, ``submit`` writes the single item
+inline, through the same code path.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Callable, Optional
+
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal
+from db.models import ActivityEvents, StudySessions
+
+logger = logging.getLogger("fuurin.write_buffer")
+
+WRITE_BUFFER_ENABLED = os.getenv("WRITE_BUFFER_ENABLED", "0").lower() in ("1", "true", "yes")
+WRITE_BUFFER_MAX_ITEMS = int(os.getenv("WRITE_BUFFER_MAX_ITEMS", "500"))
+WRITE_BUFFER_MAX_DELAY_MS = float(os.getenv("WRITE_BUFFER_MAX_DELAY_MS", "20"))
+WRITE_BUFFER_CAPACITY = int(os.getenv("WRITE_BUFFER_CAPACITY", "10000"))
+WRITE_BUFFER_ENQUEUE_TIMEOUT = float(os.getenv("WRITE_BUFFER_ENQUEUE_TIMEOUT", "0.5"))
+WRITE_BUFFER_RETRIES = int(os.getenv("WRITE_BUFFER_RETRIES", "3"))
+WRITE_BUFFER_COMMIT_TIMEOUT = float(os.getenv("WRITE_BUFFER_COMMIT_TIMEOUT", "10"))
+
+EVENT = "event"
+HEARTBEAT = "heartbeat"
+
+
+class BufferFull(Exception):
+    """The buffer is at capacity; the caller should retry later."""
+
+
+class CommitTimeout(Exception):
+    """The item's batch wasn't committed in time; it may still be, the caller should retry later."""
+
+
+# One queued row: (kind, values, future resolved after the commit)
+_Item = tuple[str, dict[str, Any], Future]
+_STOP = object()
+
+
+def _insert_events(db: Session, rows: list[dict[str, Any]]) -> None:
+    table = ActivityEvents.__table__
+    db.execute(
+        insert(table).values(rows).on_conflict_do_nothing(index_elements=["user_id", "client_key", "occurred_at"])
+    )
+
+
+def _insert_heartbeats(db: Session, rows: list[dict[str, Any]]) -> None:
+    # ON CONFLICT DO UPDATE can't touch a row twice in one statement: keep the latest per session
+    latest: dict[tuple, dict[str, Any]] = {}
+    for row in rows:
+        key = (row["user_id"], row["client_key"], row["started_at"])
+        if key not in latest or row["ended_at"] > latest[key]["ended_at"]:
+            latest[key] = row
+    table = StudySessions.__table__
+    stmt = insert(table).values(list(latest.values()))
+    ended_at = func.greatest(table.c.ended_at, stmt.excluded.ended_at)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "client_key", "started_at"],
+            set_={
+                "ended_at": ended_at,
+                "duration_sec": cast(func.extract("epoch", ended_at - table.c.started_at), Integer),
+            },
+        )
+    )
+
+
+WRITERS: dict[str, Callable[[Session, list[dict[str, Any]]], None]] = {
+    EVENT: _insert_events,
+    HEARTBEAT: _insert_heartbeats,
+}
+
+
+class WriteBuffer:
+    def __init__(
+        self,
+        enabled: bool = WRITE_BUFFER_ENABLED,
+        max_items: int = WRITE_BUFFER_MAX_ITEMS,
+        max_delay_ms: float = WRITE_BUFFER_MAX_DELAY_MS,
+        capacity: int = WRITE_BUFFER_CAPACITY,
+        commit_timeout: float = WRITE_BUFFER_COMMIT_TIMEOUT,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.enabled = enabled
+        self.max_items = max_items
+        self.max_delay = max_delay_ms / 1000
+        self.commit_timeout = commit_timeout
+        self.session_factory = session_factory
+        self._queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self._thread: Optional[threading.Thread] = None
+        # Producers between the "accepting" check and their put; stop waits for them
+        self._accepting = False
+        self._producers = 0
+        self._lifecycle = threading.Condition()
+        # Updated by request threads and the flusher
+        self.stats = {"submitted": 0, "flushes": 0, "written": 0, "failed": 0, "rejected": 0, "timeouts": 0}
+        self._stats_lock = threading.Lock()
+
+    # ---- producer side ----
+
+    def submit(self, kind: str, values: dict[str, Any], wait: bool = True, timeout: float = WRITE_BUFFER_ENQUEUE_TIMEOUT) -> None:
+        fut: Future = Future()
+        item = (kind, values, fut)
+        self._count(submitted=1)
+        with self._lifecycle:
+            queued = self._accepting
+            if queued:
+                self._producers += 1
+        if not queued:
+            self._flush([item])
+        else:
+            try:
+                self._queue.put(item, timeout=timeout)
+            except queue.Full:
+                self._count(rejected=1)
+                raise BufferFull()
+            finally:
+                with self._lifecycle:
+                    self._producers -= 1
+                    self._lifecycle.notify_all()
+        if wait:
+            try:
+                fut.result(timeout=self.commit_timeout)
+            except FutureTimeout:
+                self._count(timeouts=1)
+                raise CommitTimeout()
+        elif fut.done() and fut.exception() is not None:
+            raise fut.exception()
+
+    def _count(self, **deltas: int) -> None:
+        with self._stats_lock:
+            for name, n in deltas.items():
+                self.stats[name] += n
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    # ---- lifecycle ----
+
+    def start(self) -> None:
+        if self.enabled and not self.running:
+            self._thread = threading.Thread(target=self._run, name="write-buffer", daemon=True)
+            self._thread.start()
+            with self._lifecycle:
+                self._accepting = True
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Flush everything queued, then stop the worker (graceful shutdown).
+
+        From here on ``submit`` writes inline; producers already enqueueing
+        are waited for, so nothing lands in the queue after the worker's drain.
+        """
+        with self._lifecycle:
+            self._accepting = False
+            self._lifecycle.wait_for(lambda: self._producers == 0, timeout)
+        if not self.running:
+            self._drain()
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self._thread = None
+            self._drain()
+
+    # ---- consumer side ----
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            stop = False
+            while len(batch) < self.max_items:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stop:
+                self._drain()
+                return
+
+    def _drain(self) -> None:
+        """Flush whatever is still queued, in batches (the worker is stopping or gone)."""
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        for i in range(0, len(rest), self.max_items):
+            self._flush(rest[i:i + self.max_items])
+
+    def _write(self, batch: list[_Item]) -> None:
+        by_kind: dict[str, list[dict[str, Any]]] = {}
+        for kind, values, _ in batch:
+            by_kind.setdefault(kind, []).append(values)
+        with self.session_factory() as db:
+            for kind, rows in by_kind.items():
+                WRITERS[kind](db, rows)
+            db.commit()
+
+    def _flush(self, batch: list[_Item]) -> None:
+        error: Optional[BaseException] = None
+        for attempt in range(WRITE_BUFFER_RETRIES + 1):
+            try:
+                self._write(batch)
+                error = None
+                break
+            except OperationalError as e:  # connection trouble: retry the whole batch
+                error = e
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+            except DBAPIError as e:  # a bad row: isolate it below
+                error = e
+                break
+        if error is None:
+            self._count(flushes=1, written=len(batch))
+            for _, _, fut in batch:
+                fut.set_result(None)
+            return
+        self._count(flushes=1)
+        if len(batch) > 1 and not isinstance(error, OperationalError):
+            for item in batch:
+                self._flush([item])
+            return
+        self._count(failed=len(batch))
+        for _, _, fut in batch:
+            fut.set_exception(error)
+        logger.error("Write buffer: %d item(s) failed: %s", len(batch), getattr(error, "orig", error))
+
+    def status(self) -> dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {"enabled": self.enabled, "running": self.running, "pending": self.pending(), **stats}
+
+
+write_buffer = WriteBuffer()
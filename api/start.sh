@@ -4,8 +4,14 @@ set -e
 # Ensure Python can import local packages
 export PYTHONPATH="/app:${PYTHONPATH}"
 
-# Run migrations
-alembic upgrade head
+# Run migrations (no-op when the DB is already at head)
+if [ "${SKIP_MIGRATIONS:-0}" != "1" ]; then
+    python -m db.migrate
+fi
 
 # Start API
+if [ "${APP_ENV:-development}" = "production" ]; then
+    # N workers (WEB_CONCURRENCY, default: CPU count), preloaded app, graceful shutdown
+    exec gunicorn main:app -c gunicorn.conf.py
+fi
 exec uvicorn main:app --host 0.0.0.0 --port 8000
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+import uuid
+
+import pytest
+
+# Tests hammer the same endpoints; the per-client limiter would answer 429
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """The configured database engine; skips the test when Postgres isn't reachable."""
+    from sqlalchemy import text
+
+    from db.database import engine
+
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:  # no database in this environment
+        pytest.skip(f"database not reachable: {e}")
+    return engine
+
+
+@pytest.fixture
+def db_conn(db_engine):
+    """A connection inside a transaction that is rolled back after the test."""
+    with db_engine.connect() as conn:
+        tx = conn.begin()
+        try:
+            yield conn
+        finally:
+            tx.rollback()
+
+
+@pytest.fixture
+def make_user(db_conn):
+    """Insert a user in the test transaction; returns its id."""
+    from sqlalchemy import text
+
+    def make(timezone=None) -> str:
+        user_id = str(uuid.uuid4())
+        db_conn.execute(text(
+            "INSERT INTO users (id, email, timezone, created_at, updated_at) VALUES (:id, :email, :tz, now(), now())"
+        ), {"id": user_id, "email": f"{user_id}@example.com", "tz": timezone})
+        return user_id
+
+    return make
+
+
+@pytest.fixture
+def make_work(db_conn):
+    """Insert a work in the test transaction; returns its id."""
+    from sqlalchemy import text
+
+    def make(title="雪国", type="book", author=None) -> str:
+        work_id = str(uuid.uuid4())
+        db_conn.execute(text(
+            "INSERT INTO works (id, title, type, author, created_at, updated_at) "
+            "VALUES (:id, :title, :type, :author, now(), now())"
+        ), {"id": work_id, "title": title, "type": type, "author": author})
+        return work_id
+
+    return make
+
+
+@pytest.fixture
+def db_session(db_conn):
+    """Sessions on the test connection: their commits only release a savepoint."""
+    from sqlalchemy.orm import Session
+
+    return lambda: Session(bind=db_conn, join_transaction_mode="create_savepoint")
+
+
+@pytest.fixture
+def api_client(db_session):
+    """TestClient on the app (no lifespan) whose DB dependencies use the test transaction."""
+    from fastapi.testclient import TestClient
+
+    from db.deps import get_db, get_read_db
+    from main import app
+
+    app.dependency_overrides[get_db] = db_session
+    app.dependency_overrides[get_read_db] = db_session
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_read_db, None)
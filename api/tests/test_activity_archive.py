@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import functools
+import json
+import uuid
+from datetime import datetime, timezone
+
+from services.activity_archive import _append, _month_path, iter_archived
+
+USER = str(uuid.UUID(int=1))
+
+
+def _record(ts: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": USER,
+        "occurred_at": ts.isoformat(),
+        "type": "session_logged",
+        "ref_kind": None,
+        "ref_id": None,
+        "summary": ts.date().isoformat(),
+        "metadata": None,
+        "visibility": "private",
+    }
+
+
+def _archive(root: str) -> None:
+    for month, days in (("2023-12", (30, 31)), ("2024-01", (1, 2)), ("2024-02", (1,))):
+        year, mon = map(int, month.split("-"))
+        stamps = [datetime(year, mon, d, 12, tzinfo=timezone.utc) for d in days]
+        _append(_month_path(USER, month, root), [_record(ts) for ts in stamps])
+
+
+def test_iter_archived_naive_bounds_are_utc(tmp_path):
+    _archive(str(tmp_path))
+    rows = list(iter_archived(USER, start=datetime(2024, 1, 1), end=datetime(2024, 2, 1), root=str(tmp_path)))
+    assert [r["summary"] for r in rows] == ["2024-01-01", "2024-01-02"]
+
+    aware = list(iter_archived(USER, start=datetime(2024, 1, 1, tzinfo=timezone.utc), root=str(tmp_path)))
+    assert [r["summary"] for r in aware] == ["2024-01-01", "2024-01-02", "2024-02-01"]
+
+
+def test_iter_archived_newest_first_with_naive_end(tmp_path):
+    _archive(str(tmp_path))
+    rows = list(iter_archived(USER, end=datetime(2024, 1, 2), newest_first=True, root=str(tmp_path)))
+    assert [r["summary"] for r in rows] == ["2024-01-01", "2023-12-31", "2023-12-30"]
+
+
+def test_export_and_feed_accept_naive_bounds(db_engine, tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from main import app
+    from routers.api_v1 import activity_events
+
+    _archive(str(tmp_path))
+    monkeypatch.setattr(activity_events, "iter_archived", functools.partial(iter_archived, root=str(tmp_path)))
+    client = TestClient(app)
+
+    response = client.get(
+        "/api/v1/activity-events/export",
+        params={"user_id": USER, "start": "2024-01-01T00:00", "end": "2024-02-01T00:00"},
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["summary"] for r in lines] == ["2024-01-01", "2024-01-02"]
+
+    response = client.get(
+        "/api/v1/activity-events",
+        params={"user_id": USER, "before": "2024-01-02T00:00", "include_archive": "true", "limit": 5},
+    )
+    assert response.status_code == 200
+    assert [r["summary"] for r in response.json()] == ["2024-01-01", "2023-12-31", "2023-12-30"]
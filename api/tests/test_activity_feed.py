@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event, text
+
+from routers.api_v1.activity_events import FEED_WINDOW
+
+NOW = datetime.now(timezone.utc)
+
+
+@pytest.fixture
+def feed(db_conn, api_client, make_user):
+    """Monthly partitions over the last two years, and the feed's SELECTs recorded."""
+    db_conn.execute(
+        text("SELECT fuurin_ensure_month_partitions('activity_events', 'occurred_at', :d, 1)"),
+        {"d": date.today() - timedelta(days=730)},
+    )
+    statements: list = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM activity_events" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(db_conn, "before_cursor_execute", record)
+    try:
+        yield api_client, make_user(), statements
+    finally:
+        event.remove(db_conn, "before_cursor_execute", record)
+
+
+def _events(db_conn, user_id, ages: list[timedelta]) -> None:
+    for age in ages:
+        db_conn.execute(text(
+            "INSERT INTO activity_events (id, user_id, occurred_at, type, summary, visibility) "
+            "VALUES (gen_random_uuid(), :u, :at, 'session_logged', 'feed test', 'private')"
+        ), {"u": user_id, "at": NOW - age})
+
+
+def _page(client, user_id, **params):
+    r = client.get("/api/v1/activity-events", params={"user_id": user_id, **params})
+    assert r.status_code == 200
+    return r.json()
+
+
+def test_full_first_window_is_one_query(db_conn, feed):
+    client, user_id, statements = feed
+    _events(db_conn, user_id, [timedelta(hours=h) for h in range(1, 30)])
+    assert len(_page(client, user_id, limit=20)) == 20
+    assert len(statements) == 1
+
+
+def test_sparse_user_is_two_queries(db_conn, feed):
+    client, user_id, statements = feed
+    ages = [timedelta(days=2), timedelta(days=200), timedelta(days=500)]
+    _events(db_conn, user_id, ages)
+    items = _page(client, user_id, limit=50)
+    assert [datetime.fromisoformat(i["occurred_at"]) for i in items] == [NOW - a for a in ages]
+    # The bounded window, then the rest (older rows only), whatever the user's history
+    assert len(statements) == 2
+
+    # Next page from a cursor: same shape, no duplicates
+    statements.clear()
+    older = _page(client, user_id, limit=2, before=items[0]["occurred_at"])
+    assert [i["id"] for i in older] == [i["id"] for i in items[1:]]
+    assert len(statements) == 2
+
+
+def test_window_prunes_partitions(db_conn, feed):
+    client, user_id, statements = feed
+    _events(db_conn, user_id, [timedelta(hours=1)])
+    _page(client, user_id, limit=50)
+    statement, parameters = statements[0]
+    plan = db_conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+
+    def relations(node):
+        if "Relation Name" in node:
+            yield node["Relation Name"]
+        for child in node.get("Plans", []):
+            yield from relations(child)
+
+    scanned = {r for r in relations(plan[0]["Plan"]) if r.startswith("activity_events_p")}
+    # Only the lower bound is known: months before the window are pruned (the
+    # empty future ones, if any, are not)
+    first = f"activity_events_p{NOW - FEED_WINDOW:%Y%m}"
+    assert first in scanned and min(scanned) == first, scanned
+    older = db_conn.execute(text(
+        "SELECT count(*) FROM pg_inherits WHERE inhparent = 'activity_events'::regclass "
+        "AND inhrelid::regclass::text < :first AND inhrelid::regclass::text LIKE 'activity_events_p%'"
+    ), {"first": first}).scalar()
+    assert older >= 12
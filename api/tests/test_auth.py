@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+import pytest
+
+from core import auth
+from core.auth import TokenError, decode_token, hash_password, verify_password
+from core.ratelimit import client_key
+from routers.api_v1 import common
+from routers.api_v1.common import TTLCache, get_default_user_id
+
+
+def test_password_hash_is_awaited_off_the_loop():
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        task = asyncio.create_task(ticker())
+        stored = await hash_password("correct horse")
+        ok = await verify_password("correct horse", stored)
+        bad = await verify_password("wrong", stored)
+        unknown = await verify_password("correct horse", None)
+        task.cancel()
+        return ticks, ok, bad, unknown
+
+    ticks, ok, bad, unknown = asyncio.run(run())
+    assert (ok, bad, unknown) == (True, False, False)
+    # The loop kept running while scrypt ran on the hash pool
+    assert ticks > 3
+
+
+def test_register_and_login(api_client):
+    email = f"{uuid.uuid4()}@example.com"
+    r = api_client.post("/api/v1/auth/register", json={"email": email, "password": "correct horse"})
+    assert r.status_code == 201
+    uid = r.json()["user"]["id"]
+    assert decode_token(r.json()["access_token"])["sub"] == uid
+    assert api_client.post("/api/v1/auth/register", json={"email": email, "password": "x" * 8}).status_code == 409
+
+    r = api_client.post("/api/v1/auth/login", json={"email": email.upper(), "password": "correct horse"})
+    assert r.status_code == 200 and r.json()["user"]["id"] == uid
+    assert api_client.post("/api/v1/auth/login", json={"email": email, "password": "wrong horse"}).status_code == 401
+
+
+def _signed(header, payload) -> str:
+    def part(obj):
+        return auth._b64encode(json.dumps(obj).encode())
+
+    signing_input = part(header) + "." + part(payload)
+    signature = hmac.new(auth._KEYS[auth._SIGNING_KID], signing_input.encode(), hashlib.sha256).digest()
+    return signing_input + "." + auth._b64encode(signature)
+
+
+_OK = {"sub": "u1", "exp": int(time.time()) + 60}
+
+
+@pytest.mark.parametrize("token", [
+    _signed({"alg": "HS256", "kid": []}, _OK),
+    _signed({"alg": "HS256", "kid": {"a": 1}}, _OK),
+    _signed(["alg", "HS256"], _OK),
+    _signed({"alg": "HS256"}, {"sub": ["u1"], "exp": _OK["exp"]}),
+    _signed({"alg": "HS256"}, {"sub": "u1", "exp": "tomorrow"}),
+    "a.b",
+], ids=["list-kid", "dict-kid", "list-header", "list-sub", "str-exp", "two-parts"])
+def test_malformed_tokens_are_token_errors(api_client, token):
+    with pytest.raises(TokenError):
+        decode_token(token)
+    scope = {"headers": [(b"authorization", b"Bearer " + token.encode())], "client": ("10.0.0.1", 5000)}
+    assert client_key(scope) == "ip:10.0.0.1"
+    r = api_client.get("/api/v1/works", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 401
+
+
+class _Rows:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class FakeDB:
+    def __init__(self, *rows):
+        self.rows = list(rows)
+        self.queries = 0
+
+    def execute(self, stmt):
+        self.queries += 1
+        return _Rows(self.rows.pop(0))
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    c = TTLCache(ttl=300.0, max_keys=1)
+    monkeypatch.setattr(common, "default_user_cache", c)
+    return c
+
+
+def test_default_user_miss_is_not_cached(cache):
+    db = FakeDB(None, ("u1",))
+    assert get_default_user_id(db) is None
+    # The first user appeared: found right away, then served from the cache
+    assert get_default_user_id(db) == "u1"
+    assert get_default_user_id(db) == "u1"
+    assert db.queries == 2
+
+
+def test_default_user_cache_expires(cache):
+    cache.set("default", "u1")
+    assert get_default_user_id(FakeDB()) == "u1"
+    cache.ttl = 0.0
+    assert get_default_user_id(FakeDB(("u2",))) == "u2"
+
+
+def test_explicit_user_id_must_match_the_token(api_client, make_user):
+    me, other = make_user(), make_user()
+    bearer = {"Authorization": f"Bearer {auth.encode_token(me)}"}
+
+    assert api_client.get("/api/v1/stats/daily", headers=bearer).status_code == 200
+    assert api_client.get(f"/api/v1/stats/daily?user_id={me}", headers=bearer).status_code == 200
+    assert api_client.get(f"/api/v1/stats/daily?user_id={other}", headers=bearer).status_code == 403
+    assert api_client.get(f"/api/v1/users/{other}", headers=bearer).status_code == 403
+    assert api_client.post("/api/v1/sync", json={"user_id": other}, headers=bearer).status_code == 403
+    assert api_client.post("/api/v1/stats/batch", json={"user_ids": [me, other]}, headers=bearer).status_code == 403
+    # Without a token (dev single-user mode) any user can still be named
+    assert api_client.get(f"/api/v1/stats/daily?user_id={other}").status_code == 200
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from core.calendar_stats import _loop_stats, calendar_stats, dense, epoch_day
+
+
+def _both(start: date, by_day: dict[date, int], days: int):
+    """The vectorized metrics and the per-day loop's, for the same history."""
+    series = dense(start, days, [epoch_day(d) for d in by_day], list(by_day.values()))
+    return calendar_stats(start, series), _loop_stats(start, by_day, days)
+
+
+def _assert_same(vec, ref):
+    assert vec["active_days"] == ref["active_days"]
+    assert vec["current_streak"] == ref["current_streak"]
+    if ref["longest_streak"] is None:
+        assert vec["longest_streak"] is None
+    else:
+        first, length = ref["longest_streak"]
+        assert (vec["longest_streak"]["start"], vec["longest_streak"]["days"]) == (first.isoformat(), length)
+    assert [(s["start"], s["days"]) for s in vec["streaks"]] == [(d.isoformat(), n) for d, n in ref["streaks"]]
+    assert [w["active_days"] for w in vec["weekdays"]] == ref["weekday_active"]
+    assert [w["minutes"] for w in vec["weekdays"]] == [s // 60 for s in ref["weekday_seconds"]]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_the_per_day_loop(seed):
+    rng = np.random.default_rng(seed)
+    days = int(rng.integers(30, 800))
+    # Not a Monday: the weekday offset matters
+    start = date(2024, 1, 3) + timedelta(days=int(rng.integers(0, 7)))
+    active = np.repeat(rng.random(days // 7 + 1) < 0.8, 7)[:days] & (rng.random(days) < 0.75)
+    by_day = {start + timedelta(days=int(i)): int(rng.integers(60, 5400)) for i in np.flatnonzero(active)}
+    # Outside the range: ignored by both
+    by_day[start - timedelta(days=1)] = 600
+    _assert_same(*_both(start, by_day, days))
+
+
+def test_streak_ending_on_the_last_day():
+    start = date(2026, 10, 1)  # a Thursday
+    by_day = {start + timedelta(days=i): 600 for i in (0, 1, 2, 5, 6, 7, 8, 9)}
+    vec, ref = _both(start, by_day, 10)
+    _assert_same(vec, ref)
+    assert vec["current_streak"] == 5
+    assert vec["longest_streak"] == {"start": "2026-10-06", "end": "2026-10-10", "days": 5}
+    assert [s["days"] for s in vec["streaks"]] == [5, 3]
+    # Thursday is slot 0; weekday 0 is Monday
+    assert [w["active_days"] for w in vec["weekdays"]] == [0, 1, 1, 2, 2, 2, 0]
+
+    # A gap on the last day ends it
+    vec, ref = _both(start, by_day, 11)
+    _assert_same(vec, ref)
+    assert vec["current_streak"] == 0
+
+
+def test_empty_series():
+    start = date(2026, 10, 1)
+    vec, ref = _both(start, {}, 0)
+    _assert_same(vec, ref)
+    assert (vec["days"], vec["active_days"], vec["active_ratio"]) == (0, 0, 0.0)
+    assert vec["streaks"] == [] and vec["longest_streak"] is None
+
+    # No activity over a range
+    vec, ref = _both(start, {}, 14)
+    _assert_same(vec, ref)
+    assert vec["active_ratio"] == 0.0 and all(w["share"] == 0.0 for w in vec["weekdays"])
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from db.health import overall_status
+
+
+@pytest.mark.parametrize("db, pool, expected", [
+    ({"reachable": True, "latency_ms": 1.0}, {"saturated": False}, "ok"),
+    ({"reachable": None, "age_sec": None}, {"saturated": False}, "unknown"),
+    ({"reachable": None, "skipped": "pool saturated"}, {"saturated": True}, "unknown"),
+    ({"reachable": True, "skipped": "pool saturated"}, {"saturated": True}, "degraded"),
+    ({"reachable": True}, {"saturated": True}, "degraded"),
+    ({"reachable": False, "error": "refused"}, {"saturated": False}, "error"),
+])
+def test_overall_status(db, pool, expected):
+    assert overall_status(db, pool) == expected
+
+
+@pytest.mark.parametrize("reachable, code, status", [(None, 200, "unknown"), (False, 500, "error")])
+def test_db_health_endpoint(monkeypatch, reachable, code, status):
+    async def probe():
+        return {"reachable": reachable, "age_sec": None}
+
+    monkeypatch.setattr(main.db_health, "status", probe)
+    r = TestClient(main.app).get("/db/health")
+    assert r.status_code == code
+    assert r.json()["status"] == status
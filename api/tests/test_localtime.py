@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from core.localtime import local_day, utc_bounds
+
+PARIS = "Europe/Paris"
+UTC = timezone.utc
+
+# (UTC instant, expected Europe/Paris local day) around both 2026 transitions:
+# 2026-03-29 02:00 CET -> 03:00 CEST (02:30 doesn't exist), 2026-10-25 03:00
+# CEST -> 02:00 CET (02:30 happens twice).
+CASES = [
+    # Spring forward
+    (datetime(2026, 3, 28, 22, 59, tzinfo=UTC), date(2026, 3, 28)),  # 23:59 CET
+    (datetime(2026, 3, 28, 23, 30, tzinfo=UTC), date(2026, 3, 29)),  # 00:30 CET
+    (datetime(2026, 3, 29, 0, 30, tzinfo=UTC), date(2026, 3, 29)),  # 01:30 CET
+    (datetime(2026, 3, 29, 1, 30, tzinfo=UTC), date(2026, 3, 29)),  # 03:30 CEST ("02:30" + 1h)
+    (datetime(2026, 3, 29, 21, 59, tzinfo=UTC), date(2026, 3, 29)),  # 23:59 CEST
+    (datetime(2026, 3, 29, 22, 0, tzinfo=UTC), date(2026, 3, 30)),  # 00:00 CEST
+    # Fall back
+    (datetime(2026, 10, 24, 21, 59, tzinfo=UTC), date(2026, 10, 24)),  # 23:59 CEST
+    (datetime(2026, 10, 24, 22, 30, tzinfo=UTC), date(2026, 10, 25)),  # 00:30 CEST
+    (datetime(2026, 10, 25, 0, 30, tzinfo=UTC), date(2026, 10, 25)),  # 02:30 CEST (first)
+    (datetime(2026, 10, 25, 1, 30, tzinfo=UTC), date(2026, 10, 25)),  # 02:30 CET (second)
+    (datetime(2026, 10, 25, 22, 59, tzinfo=UTC), date(2026, 10, 25)),  # 23:59 CET
+    (datetime(2026, 10, 25, 23, 0, tzinfo=UTC), date(2026, 10, 26)),  # 00:00 CET
+]
+
+
+@pytest.mark.parametrize("ts, expected", CASES)
+def test_local_day_across_dst(ts, expected):
+    assert local_day(ts, PARIS) == expected
+
+
+@pytest.mark.parametrize("fold, utc_hour", [(0, 0), (1, 1)])
+def test_local_day_ambiguous_wall_time(fold, utc_hour):
+    # 02:30 on 2026-10-25 is both 00:30 and 01:30 UTC; both are that local day
+    wall = datetime(2026, 10, 25, 2, 30, fold=fold, tzinfo=ZoneInfo(PARIS))
+    assert wall.astimezone(UTC).hour == utc_hour
+    assert local_day(wall, PARIS) == date(2026, 10, 25)
+
+
+def test_local_day_nonexistent_wall_time():
+    # 02:30 on 2026-03-29 doesn't exist; zoneinfo resolves it with the CET offset
+    wall = datetime(2026, 3, 29, 2, 30, tzinfo=ZoneInfo(PARIS))
+    assert wall.astimezone(UTC) == datetime(2026, 3, 29, 1, 30, tzinfo=UTC)
+    assert local_day(wall, PARIS) == date(2026, 3, 29)
+
+
+def test_local_day_naive_is_utc():
+    assert local_day(datetime(2026, 10, 24, 22, 30), PARIS) == date(2026, 10, 25)
+
+
+@pytest.mark.parametrize("day, hours", [(date(2026, 3, 29), 23), (date(2026, 10, 25), 25)])
+def test_utc_bounds_cover_dst_days(day, hours):
+    tz = ZoneInfo(PARIS)
+    first = datetime.combine(day, datetime.min.time(), tzinfo=tz).astimezone(UTC)
+    after = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=tz).astimezone(UTC)
+    assert after - first == timedelta(hours=hours)
+
+    lo, hi = utc_bounds(day, day + timedelta(days=1))
+    assert lo <= first and after <= hi
+    for ts, expected in CASES:
+        if expected == day:
+            assert lo <= ts < hi
+
+
+def test_sql_local_day_matches_python(db_engine):
+    from sqlalchemy import text
+
+    with db_engine.connect() as conn:
+        for ts, expected in CASES:
+            got = conn.execute(text("SELECT fuurin_local_day(:ts, :tz)"), {"ts": ts, "tz": PARIS}).scalar()
+            assert got == expected == local_day(ts, PARIS)
+
+
+def test_user_timezone_is_cached(db_conn, make_user, monkeypatch):
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+
+    from routers.api_v1 import common
+
+    monkeypatch.setattr(common, "timezone_cache", common.TTLCache(ttl=300.0, max_keys=2))
+    db = Session(bind=db_conn)
+    paris, none = make_user(PARIS), make_user()
+    assert common.get_user_timezone(db, paris) == PARIS
+    assert common.get_user_timezone(db, none) is None
+    db_conn.execute(text("UPDATE users SET timezone = 'Asia/Tokyo' WHERE id IN (:a, :b)"), {"a": paris, "b": none})
+    # Cached, the None included
+    assert common.get_user_timezone(db, paris) == PARIS
+    assert common.get_user_timezone(db, none) is None
+    # Full: a new key evicts (nothing has expired, so everything goes)
+    common.get_user_timezone(db, make_user())
+    assert common.get_user_timezone(db, paris) == "Asia/Tokyo"
+
+
+def test_timezone_change_recompute(db_conn, make_user):
+    from sqlalchemy import text
+
+    uid = make_user(PARIS)
+    # 20:30 UTC: the 19th in Paris, the 20th in Tokyo
+    started = datetime(2026, 10, 19, 20, 30, tzinfo=UTC)
+    db_conn.execute(text(
+        "INSERT INTO study_sessions (id, user_id, started_at, ended_at, duration_sec, modality) "
+        "VALUES (gen_random_uuid(), :u, :s, :s + interval '10 minutes', 600, 'read')"
+    ), {"u": uid, "s": started})
+
+    def days():
+        return db_conn.execute(text(
+            "SELECT (SELECT local_day FROM study_sessions WHERE user_id = :u), "
+            "(SELECT array_agg(day) FROM study_daily_rollups WHERE user_id = :u AND sessions > 0)"
+        ), {"u": uid}).one()
+
+    assert days() == (date(2026, 10, 19), [date(2026, 10, 19)])
+    db_conn.execute(text("UPDATE users SET timezone = 'Asia/Tokyo' WHERE id = :u"), {"u": uid})
+    # Stored rows keep the day computed at write time...
+    assert days() == (date(2026, 10, 19), [date(2026, 10, 19)])
+    # ...until recomputed as documented in PLAN.md (rollups follow)
+    db_conn.execute(text("UPDATE study_sessions SET user_id = user_id WHERE user_id = :u"), {"u": uid})
+    assert days() == (date(2026, 10, 20), [date(2026, 10, 20)])
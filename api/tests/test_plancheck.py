@@ -0,0 +1,60 @@
+"""The query-plan regression check (db/plancheck.py) as a test.
+
+Seeds ``PLANCHECK_USERS`` x ``PLANCHECK_DAYS`` once for the module, in a
+transaction rolled back at the end; lower them to trade accuracy for speed.
+"""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import select, text
+
+from db import plancheck
+from db.models import Users, Works
+
+
+@pytest.fixture(scope="module")
+def recorded(db_engine):
+    with db_engine.connect() as conn:
+        user_id = conn.execute(select(Users.id).order_by(Users.created_at.asc())).scalar()
+        work_id = conn.execute(select(Works.id).order_by(Works.id)).scalar()
+    if not user_id or not work_id:
+        pytest.skip("needs a user and a work: run python -m db.seed")
+    items = plancheck.checks(str(user_id), str(work_id))
+    return items, plancheck.record_statements(items)
+
+
+@pytest.fixture(scope="module")
+def seeded(db_engine):
+    with db_engine.connect() as conn:
+        conn.begin()
+        try:
+            plancheck.seed(conn, plancheck.PLANCHECK_USERS, plancheck.PLANCHECK_DAYS)
+            yield conn
+        finally:
+            conn.rollback()
+
+
+def test_every_check_recorded_queries(recorded):
+    items, statements = recorded
+    assert [c.name for c in items] == list(statements)
+    for check in items:
+        assert statements[check.name], f"{check.name}: no query recorded"
+
+
+def test_read_endpoint_plans(recorded, seeded):
+    items, statements = recorded
+    failures = plancheck.check_plans(seeded, items, statements)
+    assert failures == []
+
+
+def test_missing_index_is_reported(recorded, seeded):
+    items, statements = recorded
+    feed = [c for c in items if c.name == "activity-events"]
+    savepoint = seeded.begin_nested()
+    try:
+        seeded.execute(text("DROP INDEX ix_activity_user_occurred"))
+        failures = plancheck.check_plans(seeded, feed, statements)
+    finally:
+        savepoint.rollback()
+    assert any("ix_activity_user_occurred" in f for f in failures), failures
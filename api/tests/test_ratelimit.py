@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.auth import encode_token
+from core.ratelimit import RateLimitMiddleware, client_key
+
+
+def _scope(path="/api/v1/stats/daily", query=b"", headers=(), client=("10.0.0.1", 5000)):
+    return {"type": "http", "path": path, "query_string": query, "headers": list(headers), "client": client}
+
+
+def test_client_key_ignores_client_supplied_ids():
+    assert client_key(_scope(query=b"user_id=a")) == "ip:10.0.0.1"
+    assert client_key(_scope(path="/api/v1/users/b/summary")) == "ip:10.0.0.1"
+
+
+def test_client_key_uses_the_verified_token_subject():
+    token = encode_token("user-1").encode()
+    assert client_key(_scope(headers=[(b"authorization", b"Bearer " + token)], query=b"user_id=x")) == "u:user-1"
+    # A forged token counts against the IP
+    assert client_key(_scope(headers=[(b"authorization", b"Bearer " + token[:-2] + b"xx")])) == "ip:10.0.0.1"
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, enabled=True, state=app.state)
+
+    @app.get("/api/v1/stats/daily")
+    def daily(user_id: str = ""):
+        return {"user_id": user_id}
+
+    return app
+
+
+def test_rotating_user_id_shares_one_bucket():
+    app = _app()
+    client = TestClient(app)
+    codes = []
+    for i in range(30):
+        codes.append(client.get("/api/v1/stats/daily", params={"user_id": f"u{i}"}).status_code)
+    limiter = app.state.ratelimit
+    burst = int(limiter.buckets["expensive"].burst)
+    assert codes[:burst] == [200] * burst
+    assert 429 in codes[burst:]
+    status = limiter.status()["classes"]["expensive"]
+    assert status["clients"] == 1 and status["limited"] == codes.count(429)
+
+
+def test_limiter_state_is_per_instance():
+    first, second = _app(), _app()
+    TestClient(first).get("/api/v1/stats/daily")
+    # Built lazily: nothing published until the first request
+    assert getattr(second.state, "ratelimit", None) is None
+    TestClient(second).get("/api/v1/stats/daily")
+    assert first.state.ratelimit is not second.state.ratelimit
+    assert first.state.ratelimit.status()["classes"]["expensive"]["allowed"] == 1
+
+
+def test_metrics_reports_the_app_limiter(monkeypatch):
+    import main
+
+    monkeypatch.setattr(main.app, "state", SimpleNamespace())
+    assert main.metrics()["ratelimit"] is None
+    limiter = SimpleNamespace(status=lambda: {"enabled": False})
+    main.app.state.ratelimit = limiter
+    assert main.metrics()["ratelimit"] == {"enabled": False}
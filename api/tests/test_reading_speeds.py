@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services import reading_speeds as rs
+
+T0 = datetime(2026, 9, 1, 20, 0, tzinfo=timezone.utc)
+
+
+def test_reading_speeds_are_scoped_to_the_user(db_conn, api_client, make_user, make_work):
+    work_id = make_work("Kokoro")
+    mine, other = make_user(), make_user()
+    for user_id, cpm in ((mine, 200), (mine, 220), (other, 90)):
+        db_conn.execute(text(
+            "INSERT INTO reading_speeds (id, user_id, work_id, measured_at, chars_per_min, method) "
+            "VALUES (gen_random_uuid(), :u, :w, now(), :cpm, 'manual')"
+        ), {"u": user_id, "w": work_id, "cpm": cpm})
+
+    r = api_client.get("/api/v1/reading-speeds", params={"user_id": mine, "work_id": work_id})
+    assert r.status_code == 200
+    [series] = r.json()["series"]
+    assert sorted(series["cpm"]) == [200, 220]
+
+
+def _measure(db_conn, user_id, work_id, cpms, start=T0):
+    """One measurement per day from ``start``."""
+    for i, cpm in enumerate(cpms):
+        db_conn.execute(text(
+            "INSERT INTO reading_speeds (id, user_id, work_id, measured_at, chars_per_min, method) "
+            "VALUES (gen_random_uuid(), :u, :w, :at, :cpm, 'manual')"
+        ), {"u": user_id, "w": work_id, "at": start + timedelta(days=i), "cpm": cpm})
+
+
+def test_speed_trends_rolling_average_and_slope(db_conn, make_user, make_work):
+    uid, kokoro, yukiguni = make_user(), make_work("Kokoro"), make_work("雪国")
+    _measure(db_conn, uid, kokoro, [100, 110, 120, 130])
+    _measure(db_conn, uid, yukiguni, [300])
+    db = Session(bind=db_conn, join_transaction_mode="create_savepoint")
+
+    series = {s["work"]["title"]: s for s in rs.speed_trends(db, uid, None, window=2)}
+    assert set(series) == {"Kokoro", "雪国"}
+    kokoro_series = series["Kokoro"]
+    assert [p["rolling_cpm"] for p in kokoro_series["points"]] == [100, 105, 115, 125]
+    assert kokoro_series["trend"] == {"cpm_per_day": 10.0, "r2": 1.0}
+    # One point: no slope
+    assert series["雪国"]["trend"] == {"cpm_per_day": None, "r2": None}
+
+    [only] = rs.speed_trends(db, uid, yukiguni, window=2)
+    assert only["work"]["id"] == yukiguni and only["measurements"] == 1
+    assert rs.speed_trends(db, make_user(), None, window=2) == []
+
+
+@pytest.fixture
+def readers(db_conn, make_user, make_work, monkeypatch):
+    """A work read by five users at 100..500 cpm (recent mean), and one read by two."""
+    monkeypatch.setattr(rs, "READING_SPEED_MIN_READERS", 5)
+    popular, niche = make_work("Kokoro"), make_work("雪国")
+    users = [make_user() for _ in range(5)]
+    for n, uid in enumerate(users, start=1):
+        # An old slow measurement outside the recent window, then the recent ones
+        _measure(db_conn, uid, popular, [10] + [n * 100] * rs.READING_SPEED_RECENT)
+    for uid in users[:2]:
+        _measure(db_conn, uid, niche, [250])
+    return users, popular, niche
+
+
+def test_compute_sketches_and_percentile(db_conn, readers):
+    users, popular, niche = readers
+    assert rs.compute_sketches(db_conn) >= 1
+    db = Session(bind=db_conn, join_transaction_mode="create_savepoint")
+
+    third = rs.speed_percentile(db, users[2], popular)
+    assert (third["cpm"], third["readers"], third["percentile"]) == (300, 5, 50)
+    assert third["quantiles"]["p25"] == 200 and third["quantiles"]["p75"] == 400
+    # The user is one of the readers: the fastest is at p100
+    assert rs.speed_percentile(db, users[4], popular)["percentile"] == 100
+
+    # Too few readers: no sketch, so no percentile
+    few = rs.speed_percentile(db, users[0], niche)
+    assert (few["cpm"], few["readers"], few["percentile"]) == (250, None, None)
+
+
+class _InTransaction:
+    """Engine stand-in for refresh_sketches: ``begin`` opens a savepoint in the test's transaction."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @contextmanager
+    def begin(self):
+        with self.conn.begin_nested():
+            yield self.conn
+
+
+def test_refresh_skip_uses_the_last_run_time(db_conn, readers, monkeypatch):
+    target = _InTransaction(db_conn)
+    db_conn.execute(text("DELETE FROM work_speed_quantiles_meta"))
+    db_conn.execute(text("DELETE FROM work_speed_quantiles"))
+    # A run that leaves no sketch still counts as a run
+    monkeypatch.setattr(rs, "READING_SPEED_MIN_READERS", 1000)
+    assert rs.refresh_sketches(target, max_age=3600) == 0
+    assert rs.refresh_sketches(target, max_age=3600) is None
+    monkeypatch.setattr(rs, "READING_SPEED_MIN_READERS", 5)
+    assert rs.refresh_sketches(target) >= 1
+    db_conn.execute(text("UPDATE work_speed_quantiles_meta SET refreshed_at = now() - interval '2 hours'"))
+    assert rs.refresh_sketches(target, max_age=3600) >= 1
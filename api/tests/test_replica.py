@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from starlette.requests import Request
+
+from db import replica
+
+
+def _request(query: bytes = b"") -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": query, "headers": []})
+
+
+def test_replica_decision_is_made_once_per_request(monkeypatch):
+    checks = []
+    monkeypatch.setattr(replica, "has_replica", lambda: True)
+    monkeypatch.setattr(replica.replica_lag, "usable", lambda: checks.append(1) or len(checks) == 1)
+
+    request = _request()
+    assert replica.use_replica(request) is True
+    # The lag check would now say no: the request keeps its first answer
+    assert replica.read_session_factory(request) is replica.ReadSessionLocal
+    assert checks == [1]
+    # A new request decides afresh
+    assert replica.use_replica(_request()) is False
+
+
+def test_recent_writer_reads_the_primary(monkeypatch):
+    monkeypatch.setattr(replica, "has_replica", lambda: True)
+    monkeypatch.setattr(replica.replica_lag, "usable", lambda: True)
+    monkeypatch.setattr(replica, "_recent_writes", {})
+    replica.mark_write("u1")
+    assert replica.read_session_factory(_request(b"user_id=u1")) is replica.SessionLocal
+    assert replica.read_session_factory(_request(b"user_id=u2")) is replica.ReadSessionLocal
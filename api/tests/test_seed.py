@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from db.models import ActivityEvents, ReadingSpeeds, StudySessions, Users
+from db.seed import ensure_seed
+
+
+def test_seed_on_an_empty_database(db_conn):
+    # Rolled back with the test transaction
+    db_conn.execute(text("TRUNCATE users, works CASCADE"))
+    db = Session(bind=db_conn, join_transaction_mode="create_savepoint")
+    ensure_seed(db)
+    counts = [db.scalar(select(func.count()).select_from(m)) for m in (Users, StudySessions, ActivityEvents, ReadingSpeeds)]
+    assert counts[0] == 1 and all(counts), counts
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from core.singleflight import SingleFlight
+
+
+def _followers(flight: SingleFlight, key: tuple, fn, n: int):
+    """Start ``n`` callers of ``key``; their outcomes and threads, once all have joined the call."""
+    outcomes: list = []
+
+    def call():
+        try:
+            outcomes.append(flight.do(key, fn))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 2
+    while flight.status()["collapsed"] < n and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return outcomes, threads
+
+
+def _leader(flight: SingleFlight, key: tuple, fn):
+    """Start the leader of ``key`` and wait until ``fn`` is running."""
+    started = threading.Event()
+    outcome: list = []
+
+    def lead():
+        def run():
+            started.set()
+            return fn()
+
+        try:
+            outcome.append(flight.do(key, run))
+        except Exception as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=lead)
+    thread.start()
+    assert started.wait(2)
+    return outcome, thread
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs: list[int] = []
+
+    def fn():
+        runs.append(1)
+        release.wait(2)
+        return {"n": 42}
+
+    lead, leader = _leader(flight, ("stats", 1), fn)
+    outcomes, followers = _followers(flight, ("stats", 1), fn, 5)
+    assert flight.in_flight() == 1
+    release.set()
+    for t in (leader, *followers):
+        t.join(2)
+
+    assert runs == [1]
+    assert lead + outcomes == [{"n": 42}] * 6
+    assert flight.status()["by_name"]["stats"] == {"executions": 1, "collapsed": 5, "errors": 0}
+    assert flight.in_flight() == 0
+
+
+def test_the_leaders_error_reaches_every_waiter_and_releases_the_key():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fail():
+        release.wait(2)
+        raise ValueError("db down")
+
+    lead, leader = _leader(flight, ("summary", "u1"), fail)
+    outcomes, followers = _followers(flight, ("summary", "u1"), fail, 3)
+    release.set()
+    for t in (leader, *followers):
+        t.join(2)
+
+    errors = lead + outcomes
+    assert len(errors) == 4 and all(isinstance(e, ValueError) for e in errors)
+    assert flight.status()["by_name"]["summary"] == {"executions": 1, "collapsed": 3, "errors": 1}
+    # The key is free again: the next call runs afresh
+    assert flight.in_flight() == 0
+    assert flight.do(("summary", "u1"), lambda: "ok") == "ok"
+    assert flight.status()["by_name"]["summary"]["executions"] == 2
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight()
+    release = threading.Event()
+    _, leader = _leader(flight, ("stats", 1), lambda: release.wait(2))
+    try:
+        assert flight.do(("stats", 2), lambda: "other") == "other"
+    finally:
+        release.set()
+        leader.join(2)
+    with pytest.raises(KeyError):
+        flight.do(("stats", 3), lambda: {}["missing"])
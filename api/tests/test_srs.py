@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from services import srs
+
+T0 = datetime(2026, 10, 1, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def card(db_session, make_user):
+    """(session, user id, item id) of one new card, due at T0."""
+    db = db_session()
+    uid = make_user()
+    [item_id] = srs.add_items(db, uid, [{"term": "猫", "reading": "ねこ", "meaning": "cat", "work_id": None}], T0)
+    return db, uid, item_id
+
+
+def test_intervals_follow_sm2(card):
+    db, uid, item_id = card
+    [first] = srs.grade(db, uid, [(item_id, 5, T0)])
+    assert (first["interval_days"], first["reps"], first["ease"]) == (1, 1, 2.6)
+    assert first["due_at"] == T0 + timedelta(days=1)
+
+    [second] = srs.grade(db, uid, [(item_id, 5, T0 + timedelta(days=1))])
+    assert (second["interval_days"], second["reps"], second["ease"]) == (6, 2, 2.7)
+
+    at = T0 + timedelta(days=7)
+    [third] = srs.grade(db, uid, [(item_id, 4, at)])
+    # I(n) = round(I(n-1) * EF), with the ease before this grade
+    assert third["interval_days"] == round(6 * second["ease"]) == 16
+    assert third["due_at"] == at + timedelta(days=16)
+    assert third["reps"] == 3
+
+    assert srs.due_cards(db, uid, at + timedelta(days=15), 10) == []
+    [due] = srs.due_cards(db, uid, at + timedelta(days=16), 10)
+    assert (due["item_id"], due["term"], due["reps"]) == (item_id, "猫", 3)
+
+
+def test_a_lapse_resets_reps_and_keeps_ease(card):
+    db, uid, item_id = card
+    srs.grade(db, uid, [(item_id, 4, T0)])
+    [before] = srs.grade(db, uid, [(item_id, 4, T0 + timedelta(days=1))])
+    [lapsed] = srs.grade(db, uid, [(item_id, 1, T0 + timedelta(days=7))])
+    assert (lapsed["reps"], lapsed["lapses"], lapsed["interval_days"]) == (0, 1, 1)
+    assert lapsed["ease"] == before["ease"]
+    # Relearning starts over at 1 day, then 6
+    [again] = srs.grade(db, uid, [(item_id, 4, T0 + timedelta(days=8))])
+    assert (again["reps"], again["lapses"], again["interval_days"]) == (1, 1, 1)
+
+
+def test_stale_and_foreign_grades_are_skipped(card, make_user):
+    db, uid, item_id = card
+    assert len(srs.grade(db, uid, [(item_id, 4, T0)])) == 1
+    # A retried (older or same) grade changes nothing
+    assert srs.grade(db, uid, [(item_id, 5, T0)]) == []
+    assert srs.grade(db, uid, [(item_id, 5, T0 - timedelta(minutes=1))]) == []
+    # Another user's card
+    assert srs.grade(db, make_user(), [(item_id, 5, T0 + timedelta(days=1))]) == []
+    logged = db.execute(text("SELECT count(*) FROM review_logs WHERE item_id = :i"), {"i": item_id}).scalar()
+    assert logged == 1
+
+
+def test_interval_cap_from_srs_prefs(card):
+    db, uid, item_id = card
+    db.execute(text(
+        "INSERT INTO user_settings (user_id, srs_prefs) VALUES (:u, CAST(:prefs AS json))"
+    ), {"u": uid, "prefs": '{"max_interval_days": 3}'})
+    srs.grade(db, uid, [(item_id, 5, T0)])
+    [capped] = srs.grade(db, uid, [(item_id, 5, T0 + timedelta(days=1))])
+    assert capped["interval_days"] == 3
+    assert capped["due_at"] == T0 + timedelta(days=4)
+
+
+def test_duplicate_vocab_items_are_merged(api_client, make_user):
+    uid = make_user()
+    items = [{"term": "犬", "reading": "いぬ"}, {"term": " 犬 ", "reading": "いぬ "}, {"term": "犬"}]
+    r = api_client.post("/api/v1/vocab-items", json={"user_id": uid, "items": items})
+    assert r.status_code == 201
+    ids = r.json()["ids"]
+    assert ids[0] == ids[1] and ids[0] != ids[2] and r.json()["created"] == 2
+
+    r = api_client.post("/api/v1/vocab-items", json={"user_id": uid, "items": items[:1]})
+    assert r.json() == {"ids": [None], "created": 0}
+    due = api_client.get("/api/v1/reviews/due", params={"user_id": uid}).json()
+    assert sorted(c["item_id"] for c in due) == sorted({ids[0], ids[2]})
+
+
+def test_due_queue_is_index_only_on_review_states(card):
+    db, uid, _ = card
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    db.execute(text("SET LOCAL enable_bitmapscan = off"))
+    plan = "\n".join(db.execute(text(
+        "EXPLAIN SELECT r.item_id, r.due_at, r.interval_days, r.reps, v.term, v.reading, v.meaning "
+        "FROM review_states r JOIN vocab_items v ON v.id = r.item_id "
+        "WHERE r.user_id = :u AND r.due_at <= :at ORDER BY r.due_at, r.item_id LIMIT 20"
+    ), {"u": uid, "at": T0}).scalars())
+    assert "Index Only Scan using ix_review_states_user_due" in plan, plan
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from core import tracing
+
+
+@pytest.fixture
+def exporter():
+    exporter = tracing.InMemoryExporter()
+    tracing.configure(exporter)
+    yield exporter
+    tracing.configure(None)
+
+
+def _app() -> FastAPI:
+    engine = create_engine("sqlite://")
+    tracing.instrument_engine(engine)
+
+    def dependency():
+        with tracing.span("dependency.lookup", key="k"):
+            return 42
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int, value: int = Depends(dependency)):
+        with engine.connect() as conn:
+            return {"id": item_id, "value": value + conn.execute(text("SELECT 1")).scalar()}
+
+    app.add_middleware(tracing.TracingMiddleware)
+    return app
+
+
+def test_request_span_breakdown(exporter):
+    response = TestClient(_app()).get("/items/7")
+    assert response.status_code == 200
+
+    trace_id = response.headers["x-trace-id"]
+    spans = {s.name: s for s in exporter.spans(trace_id)}
+    assert set(spans) == {"http.request", "dependency.lookup", "db.query"}
+
+    root = spans["http.request"]
+    assert root.parent_id is None
+    assert root.attributes["method"] == "GET"
+    assert root.attributes["status_code"] == 200
+    assert root.attributes["route"] == "/items/{item_id}"
+    assert spans["dependency.lookup"].parent_id == root.span_id
+    assert spans["dependency.lookup"].attributes == {"key": "k"}
+    assert spans["db.query"].parent_id == root.span_id
+    assert spans["db.query"].attributes["statement"] == "SELECT 1"
+    assert all(s.duration_ns > 0 for s in spans.values())
+    assert root.duration_ns >= spans["db.query"].duration_ns
+
+
+def test_no_spans_when_tracing_is_off():
+    tracing.configure(None)
+    response = TestClient(_app()).get("/items/1")
+    assert response.status_code == 200
+    assert "x-trace-id" not in response.headers
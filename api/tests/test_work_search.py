@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from services import work_search
+from services.work_search import PrefixIndex, WorkHit, search_works
+
+WORKS = [
+    ("雪国", "book", "Kawabata Yasunari"),
+    ("ゆきのした", "manga", None),
+    ("Kaze Tachinu", "anime", "Miyazaki Hayao"),
+    ("風の谷のナウシカ", "anime", "Miyazaki Hayao"),
+]
+
+
+def test_prefix_index_keys_and_rank():
+    index = PrefixIndex()
+    hits = [WorkHit(str(i), title, wtype, author) for i, (title, wtype, author) in enumerate(WORKS)]
+    index.build(hits)
+
+    assert [h.title for h in index.lookup("ゆき", 10)] == ["ゆきのした"]
+    # Word starts and authors are keys; hottest work first
+    assert [h.title for h in index.lookup("tachi", 10)] == ["Kaze Tachinu"]
+    assert [h.title for h in index.lookup("miyazaki", 10)] == ["Kaze Tachinu", "風の谷のナウシカ"]
+    assert [h.title for h in index.lookup("miyazaki", 1)] == ["Kaze Tachinu"]
+    assert index.lookup("zzz", 10) == []
+
+
+@pytest.fixture
+def catalog(db_conn, make_work, monkeypatch):
+    """The works above in the DB, with an empty hot-title index so every query goes to SQL."""
+    for title, wtype, author in WORKS:
+        make_work(title, wtype, author)
+    monkeypatch.setattr(work_search, "prefix_index", PrefixIndex(max_titles=0))
+    # The test catalog is tiny: make the planner show which index it would use
+    db_conn.execute(text("SET LOCAL enable_seqscan = off"))
+    return Session(bind=db_conn)
+
+
+def test_prefix_search_in_sql(catalog):
+    titles = {h.title for h in search_works(catalog, "ゆき")}
+    # "ゆき" is a prefix of ゆきのした only (雪国 is kanji)
+    assert titles == {"ゆきのした"}
+    # Romaji is matched by its hiragana reading too
+    assert {h.title for h in search_works(catalog, "yu")} == {"ゆきのした"}
+
+    plan = "\n".join(r[0] for r in catalog.execute(text(
+        "EXPLAIN SELECT id FROM works WHERE search_text LIKE 'ゆき%'"
+    )))
+    assert "ix_works_search_prefix" in plan
+
+
+def test_trigram_search(catalog):
+    if catalog.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is None:
+        pytest.skip("pg_trgm is not installed")
+
+    # Not a prefix of search_text ("kaze tachinu"): only the substring / trigram conditions match
+    hits = search_works(catalog, "tachinu")
+    assert [h.title for h in hits] == ["Kaze Tachinu"]
+    # Typo: matched by word similarity
+    assert "Kaze Tachinu" in {h.title for h in search_works(catalog, "tachinn")}
+
+    plan = "\n".join(r[0] for r in catalog.execute(text(
+        "EXPLAIN SELECT id FROM works WHERE search_text %> 'tachinu'"
+    )))
+    assert "ix_works_search_trgm" in plan
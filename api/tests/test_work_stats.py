@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+STARTED = datetime(2026, 10, 19, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def work(db_conn, make_user, make_work):
+    user_id, work_id, segment_id = make_user(), make_work(), str(uuid.uuid4())
+    db_conn.execute(text("INSERT INTO work_segments (id, work_id, kind, index_no) VALUES (:id, :work, 'chapter', 3)"),
+                    {"id": segment_id, "work": work_id})
+    return user_id, work_id, segment_id
+
+
+def _session(conn, user_id, work_id, segment_id, started_at, duration, words=None):
+    sid = str(uuid.uuid4())
+    conn.execute(text(
+        "INSERT INTO study_sessions (id, user_id, started_at, ended_at, duration_sec, modality, "
+        "work_id, work_segment_id, words_learned) "
+        "VALUES (:id, :user, :started, :ended, :duration, 'read', :work, :segment, :words)"
+    ), {"id": sid, "user": user_id, "started": started_at, "ended": started_at + timedelta(seconds=duration),
+        "duration": duration, "work": work_id, "segment": segment_id, "words": words})
+    return sid
+
+
+def _stats(conn, user_id, work_id):
+    return conn.execute(text(
+        "SELECT seconds, sessions, words, first_at, last_at, last_segment_id, last_segment_index "
+        "FROM user_work_stats WHERE user_id = :user AND work_id = :work"
+    ), {"user": user_id, "work": work_id}).one()
+
+
+def _rebuilt(conn, user_id, work_id):
+    conn.execute(text("SELECT fuurin_user_work_stats_refresh(:user, :work)"), {"user": user_id, "work": work_id})
+    return _stats(conn, user_id, work_id)
+
+
+def test_heartbeat_updates_apply_deltas(db_conn, work):
+    user_id, work_id, segment_id = work
+    sid = _session(db_conn, user_id, work_id, segment_id, STARTED, 60, words=2)
+    _session(db_conn, user_id, work_id, None, STARTED + timedelta(hours=2), 120)
+
+    # Heartbeats: duration and words grow, the row stays in the same (user, work, segment)
+    for duration, words in ((300, 5), (900, None)):
+        db_conn.execute(text(
+            "UPDATE study_sessions SET duration_sec = :d, words_learned = :w, "
+            "ended_at = started_at + make_interval(secs => :d) WHERE id = :id"
+        ), {"d": duration, "w": words, "id": sid})
+        stats = _stats(db_conn, user_id, work_id)
+        assert stats.seconds == duration + 120
+        assert stats.words == (words or 0)
+        assert stats == _rebuilt(db_conn, user_id, work_id)
+
+    # Updates of columns the rollup doesn't read leave it untouched
+    db_conn.execute(text("UPDATE study_sessions SET notes = 'x' WHERE id = :id"), {"id": sid})
+    assert _stats(db_conn, user_id, work_id).seconds == 1020
+
+
+def test_moving_a_session_rebuilds(db_conn, work):
+    user_id, work_id, segment_id = work
+    sid = _session(db_conn, user_id, work_id, segment_id, STARTED, 60)
+    _session(db_conn, user_id, work_id, None, STARTED + timedelta(hours=2), 120)
+
+    db_conn.execute(text("UPDATE study_sessions SET work_segment_id = NULL WHERE id = :id"), {"id": sid})
+    stats = _stats(db_conn, user_id, work_id)
+    assert stats.last_segment_id is None
+    assert stats == _rebuilt(db_conn, user_id, work_id)
+
+
+def test_work_stats_unstudied_work_has_progress_shape(db_conn, api_client, work):
+    user_id, work_id, segment_id = work
+    empty = api_client.get(f"/api/v1/works/{work_id}/stats", params={"user_id": user_id}).json()
+    _session(db_conn, user_id, work_id, segment_id, STARTED, 60)
+    studied = api_client.get(f"/api/v1/works/{work_id}/stats", params={"user_id": user_id}).json()
+
+    assert set(empty) == set(studied)
+    assert empty["work"] == {"id": work_id, "title": "雪国", "type": "book"}
+    assert (empty["minutes"], empty["sessions"], empty["segments_total"]) == (0, 0, 1)
+    assert empty["reading_speed"] == {"measurements": 0, "latest_cpm": None, "cpm_per_day": None}
+    assert studied["sessions"] == 1
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from services import write_buffer as wb
+from services.write_buffer import CommitTimeout, WriteBuffer
+
+
+class FakeSession:
+    """Stands in for a Session: rows written by the fake writer become visible on commit."""
+
+    def __init__(self, store: "FakeStore"):
+        self.store = store
+        self.rows: list = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def commit(self):
+        with self.store.lock:
+            self.store.committed.extend(self.rows)
+            self.store.commits += 1
+
+
+class FakeStore:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.committed: list = []
+        self.commits = 0
+        # Raise these from the writer, one per call, before succeeding
+        self.errors: list[Exception] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def writer(self, db: FakeSession, rows: list) -> None:
+        self.gate.wait()
+        if self.errors:
+            raise self.errors.pop(0)
+        db.rows.extend(rows)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    s = FakeStore()
+    monkeypatch.setitem(wb.WRITERS, "fake", s.writer)
+    return s
+
+
+def _buffer(store: FakeStore, **kwargs) -> WriteBuffer:
+    return WriteBuffer(enabled=True, session_factory=lambda: FakeSession(store), **kwargs)
+
+
+def test_wait_returns_after_commit(store):
+    buf = _buffer(store, max_delay_ms=5)
+    buf.start()
+    try:
+        for i in range(3):
+            buf.submit("fake", {"n": i})
+            # Durable when submit returns: already committed
+            assert {"n": i} in store.committed
+    finally:
+        buf.stop()
+
+
+def test_group_commit_and_stop_drains(store):
+    buf = _buffer(store, max_delay_ms=50)
+    store.gate.clear()
+    buf.start()
+    for i in range(10):
+        buf.submit("fake", {"n": i}, wait=False)
+    store.gate.set()
+    buf.stop()
+    assert sorted(r["n"] for r in store.committed) == list(range(10))
+    assert store.commits < 10
+    assert buf.status()["written"] == 10 and buf.pending() == 0
+
+
+def test_connection_errors_are_retried(store):
+    buf = _buffer(store)
+    store.errors = [OperationalError("INSERT", {}, Exception("connection reset")) for _ in range(2)]
+    buf.submit("fake", {"n": 1})  # not started: written inline, same path
+    assert store.committed == [{"n": 1}]
+    assert buf.status()["failed"] == 0
+
+
+def test_persistent_failure_raises(store, monkeypatch):
+    monkeypatch.setattr(wb, "WRITE_BUFFER_RETRIES", 1)
+    buf = _buffer(store)
+    store.errors = [OperationalError("INSERT", {}, Exception("down")) for _ in range(2)]
+    with pytest.raises(OperationalError):
+        buf.submit("fake", {"n": 1})
+    assert store.committed == []
+    assert buf.status()["failed"] == 1
+
+
+def test_commit_wait_is_bounded(store):
+    buf = _buffer(store, commit_timeout=0.05)
+    store.gate.clear()
+    buf.start()
+    try:
+        with pytest.raises(CommitTimeout):
+            buf.submit("fake", {"n": 1})
+        assert buf.status()["timeouts"] == 1
+    finally:
+        store.gate.set()
+        buf.stop()
+    # Not lost: written once the database came back
+    assert store.committed == [{"n": 1}]
+
+
+def test_stats_under_concurrent_producers(store):
+    buf = _buffer(store, max_delay_ms=1)
+    buf.start()
+    threads = [
+        threading.Thread(target=lambda: [buf.submit("fake", {"n": i}, wait=False) for i in range(200)])
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    buf.stop()
+    status = buf.status()
+    assert status["submitted"] == status["written"] == len(store.committed) == 1600
+
+
+def test_stop_waits_for_a_producer_mid_enqueue(store):
+    buf = _buffer(store, max_delay_ms=1)
+    buf.start()
+    # Hold one producer after it was accepted but before its put lands
+    checked, release = threading.Event(), threading.Event()
+    put = buf._queue.put
+
+    def slow_put(item, *args, **kwargs):
+        if item is not wb._STOP:
+            checked.set()
+            release.wait()
+        put(item, *args, **kwargs)
+
+    buf._queue.put = slow_put
+    producer = threading.Thread(target=buf.submit, args=("fake", {"n": 1}))
+    producer.start()
+    checked.wait()
+    stopper = threading.Thread(target=buf.stop)
+    stopper.start()
+    try:
+        stopper.join(0.05)
+        assert stopper.is_alive()  # waiting for the producer
+
+        buf._queue.put = put
+        buf.submit("fake", {"n": 2})  # after stop began: written inline
+    finally:
+        release.set()
+    producer.join(1)
+    stopper.join(1)
+    assert not producer.is_alive() and not stopper.is_alive()
+    assert sorted(r["n"] for r in store.committed) == [1, 2]
+    assert buf.pending() == 0
+
+
+# ---- POST /activity-events against the database ----
+
+@pytest.fixture
+def api(api_client, db_session, make_user, monkeypatch):
+    from routers.api_v1 import common
+
+    # Buffer commits become savepoint releases inside the test transaction
+    monkeypatch.setattr(common.write_buffer, "session_factory", db_session)
+    return api_client, make_user()
+
+
+def _events(db_conn, user_id):
+    return db_conn.execute(text("SELECT client_key FROM activity_events WHERE user_id = :u"), {"u": user_id}).all()
+
+
+def test_activity_event_retry_is_idempotent(api, db_conn):
+    client, user_id = api
+    body = {
+        "user_id": user_id,
+        "client_key": "evt-1",
+        "occurred_at": datetime(2026, 10, 19, 8, 0, tzinfo=timezone.utc).isoformat(),
+        "type": "achievement_unlocked",
+    }
+    for _ in range(3):
+        r = client.post("/api/v1/activity-events", json=body)
+        assert r.status_code == 201 and r.json()["status"] == "committed"
+    assert _events(db_conn, user_id) == [("evt-1",)]
+
+
+def test_activity_event_client_key_requires_occurred_at(api, db_conn):
+    client, user_id = api
+    r = client.post("/api/v1/activity-events", json={"user_id": user_id, "client_key": "evt-2", "type": "achievement_unlocked"})
+    assert r.status_code == 422
+    assert _events(db_conn, user_id) == []
+    # Without a client_key the server time is fine
+    r = client.post("/api/v1/activity-events", json={"user_id": user_id, "type": "achievement_unlocked"})
+    assert r.status_code == 201
+
+
+def test_activity_event_long_summary(api, db_conn):
+    client, user_id = api
+    # ~10 kB that doesn't compress: larger than a btree index tuple can hold
+    summary = db_conn.execute(text(
+        "SELECT string_agg(md5(g::text || random()::text), '') FROM generate_series(1, 320) g"
+    )).scalar()
+    r = client.post(
+        "/api/v1/activity-events", json={"user_id": user_id, "type": "achievement_unlocked", "summary": summary},
+    )
+    assert r.status_code == 201
+    r = client.get("/api/v1/activity-events", params={"user_id": user_id})
+    assert r.json()[0]["summary"] == summary